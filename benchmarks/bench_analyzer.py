@@ -0,0 +1,66 @@
+"""
+Per-call overhead of module-level create_commit_message vs a shared Analyzer.
+
+    python benchmarks/bench_analyzer.py --path /some/repo --commits 300 --passes 3
+
+Collects one diff per commit, then analyzes the whole set several times:
+once with the module functions, once with an Analyzer that renders the
+display, and once with a render-free Analyzer (the history/batch setup).
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gitsmartcommit.analyzer import Analyzer  # noqa: E402
+from gitsmartcommit.generate_commit_message import create_commit_message  # noqa: E402
+from gitsmartcommit.git import DIFF_PROFILE  # noqa: E402
+
+
+def collect(path: str, count: int) -> list:
+    shas = subprocess.check_output(
+        ["git", "-C", path, "rev-list", "--no-merges", f"--max-count={count}", "HEAD"]
+    ).decode().split()
+    return [
+        subprocess.check_output(["git", "-C", path, "show", "--format="] + DIFF_PROFILE + [sha])
+        .decode("utf-8", errors="replace")
+        for sha in shas
+    ]
+
+
+def timed(fn, diffs: list, passes: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(passes):
+        fn(diffs)
+    return (time.perf_counter() - t0) / (passes * max(len(diffs), 1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--path", default=os.getcwd())
+    parser.add_argument("--commits", type=int, default=200)
+    parser.add_argument("--passes", type=int, default=3)
+    args = parser.parse_args()
+
+    diffs = collect(args.path, args.commits)
+    print(f"{len(diffs)} diffs, {args.passes} passes\n")
+
+    variants = [
+        ("module functions", lambda ds: [create_commit_message(d) for d in ds]),
+        ("Analyzer", Analyzer().analyze_many),
+        ("Analyzer(render=False)", Analyzer(render=False).analyze_many),
+    ]
+    baseline = None
+    print(f"{'variant':<24} {'us/call':>10} {'vs module':>10}")
+    for label, fn in variants:
+        per_call = timed(fn, diffs, args.passes)
+        baseline = baseline or per_call
+        print(f"{label:<24} {per_call * 1e6:>10.1f} {per_call / baseline:>9.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Compare the default `git diff` call with the minimal-bytes DIFF_PROFILE.
+
+    python benchmarks/bench_diff_profile.py --path /some/repo --rev HEAD~50..HEAD
+
+Reports bytes transferred from git, fetch time and end-to-end time
+(fetch + create_commit_message) for each variant.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gitsmartcommit.generate_commit_message import create_commit_message  # noqa: E402
+from gitsmartcommit.git import DIFF_PROFILE  # noqa: E402
+
+
+def run(cmd: list, repeat: int) -> tuple:
+    fetch = total = 0.0
+    size = 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = subprocess.check_output(cmd).decode("utf-8", errors="replace")
+        t1 = time.perf_counter()
+        create_commit_message(out)
+        t2 = time.perf_counter()
+        fetch += t1 - t0
+        total += t2 - t0
+        size = len(out.encode("utf-8"))
+    return size, fetch / repeat, total / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--path", default=os.getcwd())
+    parser.add_argument("--rev", default="HEAD~20..HEAD",
+                        help="revision range to diff (default: HEAD~20..HEAD)")
+    parser.add_argument("-n", "--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    base = ["git", "-C", args.path, "diff", args.rev]
+    variants = [
+        ("current (git diff)", base),
+        ("profile (DIFF_PROFILE)", base + DIFF_PROFILE),
+    ]
+
+    print(f"{'variant':<24} {'bytes':>12} {'fetch ms':>10} {'total ms':>10}")
+    baseline = None
+    for label, cmd in variants:
+        size, fetch, total = run(cmd, args.repeat)
+        print(f"{label:<24} {size:>12,} {fetch * 1000:>10.1f} {total * 1000:>10.1f}")
+        if baseline is None:
+            baseline = (size, total)
+        else:
+            print(f"{'':<24} {size / max(baseline[0], 1):>11.0%} "
+                  f"{'':>10} {total / max(baseline[1], 1e-9):>9.0%}")
+
+
+if __name__ == "__main__":
+    main()
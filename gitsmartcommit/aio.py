@@ -0,0 +1,148 @@
+"""
+asyncio API for embedding in async services.
+
+    analyzer = AsyncAnalyzer(max_concurrency=8)
+    result = await analyzer.analyze("/path/to/repo")
+
+The repository check, branch lookup and staged diff run concurrently via
+asyncio subprocesses, the diff is parsed line by line as git writes it, and
+the CPU-bound analysis runs in an executor so the event loop stays free.
+The repository's .smartcommit.toml rules are read in the executor too, as
+is the whole diff of a partial clone, which must not fetch (partial.py).
+Cancelling the awaiting task kills any git process still running.
+"""
+
+import asyncio
+from asyncio.subprocess import DEVNULL, PIPE
+from functools import partial
+
+from .generate_commit_message import DiffParser, commit_message_for_files
+from .partial import is_partial_clone
+from .rules import Rules
+
+
+# asyncio's default 64 KiB line limit is too small for minified files
+STREAM_LIMIT = 16 * 1024 * 1024
+
+
+class GitError(Exception):
+    pass
+
+
+async def _reap(proc):
+    if proc.returncode is None:
+        try:
+            proc.kill()
+        except ProcessLookupError:
+            pass
+        await proc.wait()
+
+
+async def _git(path: str, *args) -> str:
+    proc = await asyncio.create_subprocess_exec("git", "-C", path, *args, stdout=PIPE, stderr=PIPE)
+    try:
+        out, err = await proc.communicate()
+    finally:
+        await _reap(proc)
+    if proc.returncode:
+        raise GitError(err.decode("utf-8", errors="replace").strip())
+    return out.decode("utf-8", errors="replace")
+
+
+async def _git_diff_files(path: str, args: list) -> list:
+    """Run a git diff and feed its output to the parser as it streams in."""
+    proc = await asyncio.create_subprocess_exec(
+        "git", "-C", path, "diff", *args,
+        stdout=PIPE, stderr=DEVNULL, limit=STREAM_LIMIT,
+    )
+    parser = DiffParser()
+    try:
+        async for raw in proc.stdout:
+            parser.feed(raw.decode("utf-8", errors="replace").rstrip("\r\n"))
+        await proc.wait()
+    finally:
+        await _reap(proc)
+    if proc.returncode:
+        raise GitError(f"git diff exited with status {proc.returncode}")
+    return parser.close()
+
+
+async def _done(value):
+    return value
+
+
+def _partial_diff_files(path: str, include, exclude) -> tuple:
+    """(files, source, notes) of a partial clone, staged else unstaged, fetching nothing."""
+    from .git import open_store, working_tree_diff
+
+    store = open_store(path, True)
+    try:
+        files, source, notes = working_tree_diff(path, include, exclude, store, True)
+        return list(files), source, notes
+    finally:
+        if store is not None:
+            store.close()
+
+
+async def analyze_repo(path: str, branch: str = "", include=(), exclude=(),
+                       executor=None, store=None) -> dict:
+    """
+    Async create_commit_message() for the repository at `path`.
+    Analyzes staged changes, or unstaged ones when nothing is staged; the
+    result carries `source` ("staged" / "unstaged" / "") either way.
+    In a partial clone nothing is fetched, and the result carries `notes`.
+    """
+    from .git import DIFF_PROFILE, pathspecs
+
+    loop = asyncio.get_running_loop()
+    partial_clone = await loop.run_in_executor(executor, is_partial_clone, path)
+    args = DIFF_PROFILE + pathspecs(include, exclude)
+    check, current, files = await asyncio.gather(
+        _git(path, "rev-parse", "--is-inside-work-tree"),
+        _git(path, "branch", "--show-current") if not branch else _done(branch),
+        _done(None) if partial_clone else _git_diff_files(path, ["--cached"] + args),
+        return_exceptions=True,
+    )
+    if isinstance(check, BaseException):
+        raise GitError(f"Not a git repository: {path}") from check
+    for res in (current, files):
+        if isinstance(res, BaseException):
+            raise res
+    branch = current.strip()
+
+    notes = []
+    if partial_clone:
+        files, source, notes = await loop.run_in_executor(
+            executor, _partial_diff_files, path, include, exclude)
+    else:
+        source = "staged"
+        if not files:
+            files = await _git_diff_files(path, args)
+            source = "unstaged" if files else ""
+
+    rules = await loop.run_in_executor(executor, Rules.load, path)
+    result = await loop.run_in_executor(
+        executor, partial(commit_message_for_files, files, branch, store, rules=rules))
+    result["source"] = source
+    if notes:
+        result["notes"] = notes
+    return result
+
+
+class AsyncAnalyzer:
+    """
+    Shares an executor and caps how many repositories are analyzed at once;
+    extra callers wait their turn instead of piling up git processes.
+    """
+
+    def __init__(self, max_concurrency: int = 8, executor=None):
+        self.max_concurrency = max_concurrency
+        self.executor = executor
+        self._limiter = None
+
+    async def analyze(self, path: str, branch: str = "", include=(), exclude=()) -> dict:
+        if self._limiter is None:
+            # Created lazily so it binds to the loop that actually runs us
+            self._limiter = asyncio.Semaphore(self.max_concurrency)
+        async with self._limiter:
+            return await analyze_repo(path, branch, include, exclude, self.executor)
@@ -0,0 +1,136 @@
+"""
+Reusable, thread-safe analyzer.
+
+The module-level functions in generate_commit_message remember nothing
+between calls.  An Analyzer keeps a per-instance cache of per-file results
+keyed by blob ids, so long-running callers (history, batch, the HTTP
+service) stop paying for files they have already described.  Per instance
+are the tag priority, the repository rules and the object store; the
+definition patterns, SPECIAL_FILES and SPECIAL_DESC stay module constants,
+compiled once at import and shared by every instance.  Results are deep
+copies, so a caller may change one without touching the cache.
+The cache can be saved to and loaded from a JSON file, so repeated runs
+over the same range (PR mode) only describe files whose blobs changed.
+One Analyzer, and the ObjectStore attached to it, may be shared by threads:
+the store and the outline cache lock their own state.
+
+    analyzer = Analyzer()
+    for result in analyzer.analyze_many(diffs):
+        print(result["subject"])
+"""
+
+import copy
+import json
+import threading
+from collections import OrderedDict
+
+from .generate_commit_message import TAG_PRIORITY, compose_message, describe_file, parse_diff
+
+
+DEFAULT_CACHE_SIZE = 4096
+FULL_OID_LEN = 40
+
+
+class Analyzer:
+    def __init__(self, tag_priority=TAG_PRIORITY, store=None,
+                 cache_size: int = DEFAULT_CACHE_SIZE, render: bool = True, rules=None):
+        self.tag_priority = tuple(tag_priority)
+        self.store = store
+        self.rules = rules
+        self.render = render
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # ── per-file results ─────────────────────────────────────────────────
+
+    @staticmethod
+    def cache_key(fd: dict):
+        """
+        Identity of a file change, or None when it can't be pinned down.
+        Only full blob ids qualify: abbreviated ones may collide.
+        """
+        old, new = fd.get("old_oid", ""), fd.get("new_oid", "")
+        if not (old or new) or any(o and len(o) != FULL_OID_LEN for o in (old, new)):
+            return None
+        return (fd["path"], fd["old_path"], old, new, fd["is_new"], fd["is_deleted"],
+                fd["is_rename"], fd["is_binary"], tuple(fd.get("hunks", ())),
+                tuple(fd.get("parents", ())))
+
+    def describe(self, fd: dict) -> dict:
+        key = self.cache_key(fd)
+        if key is not None:
+            with self._lock:
+                info = self._cache.get(key)
+                if info is not None:
+                    self._cache.move_to_end(key)
+                    self.hits += 1
+                    return copy.deepcopy(info)
+                self.misses += 1
+
+        info = describe_file(fd, self.store, self.rules)
+
+        if key is not None:
+            with self._lock:
+                self._cache[key] = info
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            info = copy.deepcopy(info)
+        return info
+
+    # ── whole diffs ──────────────────────────────────────────────────────
+
+    def analyze_files(self, file_diffs: list, branch: str = "") -> dict:
+        if not file_diffs:
+            return {"subject": "[UPDATE] Minor changes", "display": ""}
+        results = [self.describe(fd) for fd in file_diffs]
+        return compose_message(file_diffs, results, branch, self.tag_priority, self.render)
+
+    def analyze(self, diff: str, branch: str = "") -> dict:
+        """Same result as create_commit_message(diff, branch)."""
+        if not diff or not diff.strip():
+            return {"subject": "[UPDATE] Minor changes", "display": ""}
+        return self.analyze_files(parse_diff(diff), branch)
+
+    def analyze_many(self, diffs, branch: str = "") -> list:
+        return [self.analyze(d, branch) for d in diffs]
+
+    # ── persistence ──────────────────────────────────────────────────────
+
+    def load_cache(self, cache_file: str, stamp: str = "") -> int:
+        """
+        Add the entries saved by save_cache() under the same `stamp` (which
+        should change whenever results could: version, rules); returns how many.
+        """
+        try:
+            with open(cache_file, encoding="utf-8") as f:
+                saved = json.load(f)
+            if saved.get("stamp") != stamp:
+                return 0
+            # JSON turned the key's hunks and parent blobs into lists
+            entries = [(tuple(k[:-2]) + (tuple(tuple(h) for h in k[-2]), tuple(k[-1])), info)
+                       for k, info in saved["entries"]]
+        except (OSError, ValueError, KeyError, TypeError, IndexError):
+            return 0
+        with self._lock:
+            for key, info in entries[-self.cache_size:]:
+                self._cache[key] = info
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return len(entries)
+
+    def save_cache(self, cache_file: str, stamp: str = ""):
+        with self._lock:
+            entries = [[list(k), info] for k, info in self._cache.items()]
+        try:
+            with open(cache_file, "w", encoding="utf-8") as f:
+                json.dump({"stamp": stamp, "entries": entries}, f)
+        except OSError:
+            pass
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = self.misses = 0
@@ -0,0 +1,176 @@
+"""
+Multi-repository batch mode.
+
+Validates, diffs and analyzes many repositories in one process: git
+subprocess waits run on a bounded thread pool, the CPU-bound analysis on a
+process pool, and every repository gets its own deadline.  Each repository
+is analyzed under its own .smartcommit.toml rules, if it has any.  Results are
+yielded as each repository finishes, not in input order.
+"""
+
+import glob
+import os
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from .analyzer import Analyzer
+from .partial import is_partial_clone
+from .rules import Rules
+
+
+DEFAULT_THREADS = 16
+DEFAULT_TIMEOUT = 60.0
+
+
+# Shared by the I/O threads (and one per pool worker); no display is needed
+_analyzer = Analyzer(render=False)
+
+
+class RepoTimeout(Exception):
+    pass
+
+
+def repos_from(spec: str) -> list:
+    """
+    Repositories listed in a file (one path per line, '#' comments allowed)
+    or matched by a directory glob such as '~/work/*'.
+    """
+    spec = os.path.expanduser(spec)
+    if os.path.isfile(spec):
+        base = os.path.dirname(os.path.abspath(spec))
+        with open(spec, encoding="utf-8") as f:
+            lines = [l.strip() for l in f]
+        return [os.path.join(base, os.path.expanduser(l)) for l in lines if l and not l.startswith("#")]
+    matches = glob.glob(spec) if glob.has_magic(spec) else [spec]
+    return sorted(p for p in matches if os.path.exists(os.path.join(p, ".git")))
+
+
+def _git(path: str, args: list, deadline: float) -> str:
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise RepoTimeout()
+    try:
+        out = subprocess.run(
+            ["git", "-C", path] + args,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            timeout=remaining, check=True,
+        ).stdout
+    except subprocess.TimeoutExpired:
+        raise RepoTimeout()
+    return out.decode("utf-8", errors="replace")
+
+
+def collect(path: str, deadline: float, include=(), exclude=()) -> dict:
+    """
+    Repo check, branch, rules and diff (staged, else unstaged) for one
+    repository.  In a partial clone nothing is fetched: the diff comes back
+    already parsed as "files", with "notes" (git.diff_files()).
+    """
+    from .git import DIFF_PROFILE, open_store, pathspecs, working_tree_diff
+
+    specs = pathspecs(include, exclude)
+    _git(path, ["rev-parse", "--is-inside-work-tree"], deadline)
+    branch = _git(path, ["branch", "--show-current"], deadline).strip()
+    rules = Rules.load(path)
+    if is_partial_clone(path):
+        store = open_store(path, True)
+        try:
+            files, source, notes = working_tree_diff(path, include, exclude, store, True)
+            files = list(files)
+        finally:
+            if store is not None:
+                store.close()
+        return {"branch": branch, "diff": "", "files": files, "notes": notes, "source": source,
+                "rules": rules}
+    diff = _git(path, ["diff", "--cached"] + DIFF_PROFILE + specs, deadline)
+    source = "staged"
+    if not diff.strip():
+        diff = _git(path, ["diff"] + DIFF_PROFILE + specs, deadline)
+        source = "unstaged"
+    return {"branch": branch, "diff": diff, "files": None, "notes": [], "source": source,
+            "rules": rules}
+
+
+def analyze(diff: str, branch: str, rules=None, files=None) -> dict:
+    """Subject and per-file tags for `diff`, or for already parsed `files`."""
+    # Cached results are only valid under the rules they were made with
+    analyzer = Analyzer(render=False, rules=rules) if rules else _analyzer
+    result = analyzer.analyze_files(files, branch) if files is not None else analyzer.analyze(diff, branch)
+    return {
+        "subject": result["subject"],
+        "files": [
+            {"path": r["path"], "tag": r["tag"], "summary": r["summary"]}
+            for r in result.get("_files", [])
+        ],
+    }
+
+
+def _process_repo(path: str, timeout: float, pool, include, exclude) -> dict:
+    start = time.monotonic()
+    deadline = start + timeout
+    rec = {"repo": path, "status": "ok", "branch": "", "source": "", "subject": "", "files": []}
+    try:
+        if not os.path.isdir(path):
+            raise FileNotFoundError(path)
+        got = collect(path, deadline, include, exclude)
+        rec["branch"], rec["source"] = got["branch"], got["source"]
+        if got["notes"]:
+            rec["notes"] = got["notes"]
+        if not (got["files"] if got["files"] is not None else got["diff"].strip()):
+            rec["status"] = "clean"
+        elif pool is None:
+            rec.update(analyze(got["diff"], got["branch"], got["rules"], got["files"]))
+        else:
+            future = pool.submit(analyze, got["diff"], got["branch"], got["rules"], got["files"])
+            try:
+                rec.update(future.result(timeout=max(deadline - time.monotonic(), 0)))
+            except FutureTimeout:
+                future.cancel()
+                raise RepoTimeout()
+    except RepoTimeout:
+        rec["status"] = "timeout"
+    except FileNotFoundError:
+        rec["status"] = "error"
+        rec["error"] = "path does not exist"
+    except subprocess.CalledProcessError as e:
+        rec["status"] = "error"
+        rec["error"] = (e.stderr or b"").decode("utf-8", errors="replace").strip() or str(e)
+    except Exception as e:
+        # One repository's failure (permissions, undecodable input, a bug
+        # in analysis) must not abort the rest of the batch
+        rec["status"] = "error"
+        rec["error"] = f"{type(e).__name__}: {e}"
+    rec["seconds"] = round(time.monotonic() - start, 3)
+    return rec
+
+
+def run_batch(repos: list, threads: int = DEFAULT_THREADS, jobs: int = 0,
+              timeout: float = DEFAULT_TIMEOUT, include=(), exclude=()):
+    """Yield one record per repository as soon as it is done."""
+    pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, threads)) as io_pool:
+            futures = [
+                io_pool.submit(_process_repo, repo, timeout, pool, include, exclude)
+                for repo in repos
+            ]
+            for future in as_completed(futures):
+                yield future.result()
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+
+def print_record(rec: dict):
+    status = rec["status"]
+    if status == "ok":
+        changed = len(rec["files"])
+        print(f"  {rec['repo']}  {rec['subject']}  ({changed} file{'s' if changed != 1 else ''}, {rec['source']})")
+    elif status == "clean":
+        print(f"  {rec['repo']}  clean")
+    elif status == "timeout":
+        print(f"  {rec['repo']}  timed out after {rec['seconds']}s")
+    else:
+        print(f"  {rec['repo']}  error: {rec.get('error', '')}")
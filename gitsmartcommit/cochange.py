@@ -0,0 +1,263 @@
+"""
+Commit-splitting suggestions from a file co-change graph.
+
+Files that keep changing together in history belong in the same commit.
+The graph is built from `git log --name-only` and stored in a sqlite
+database in the git dir; each update walks only the commits new since the
+last indexed tip (a rewritten history is rebuilt from scratch).  Tip
+tracking is shared with the history index (tipdb.TipDB).
+
+Paths are interned as integers and every edge is stored in both
+directions in a WITHOUT ROWID table, so a file's neighbours are one range
+scan of its primary key.  Each file keeps only its TOP_K strongest
+neighbours, which bounds the graph on repositories with 100k commits, and
+commits touching more than MAX_COMMIT_FILES files (mass renames,
+reformatting) are counted but add no edges.
+
+    with CoChangeGraph(repo) as graph:
+        graph.update()
+        groups = suggest_groups(file_diffs, results, graph)   # [[0, 3], [1, 2], ...]
+
+Staged files are linked when they share a directory, or when their
+co-change score (shared commits over the rarer file's commits), plus a
+bonus for carrying the same tag, reaches LINK.
+"""
+
+import os
+from collections import defaultdict
+
+from .tipdb import TipDB, db_path as _db_path
+
+
+DB_NAME = "smartcommit-cochange.db"
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS paths (
+    id      INTEGER PRIMARY KEY,
+    path    TEXT UNIQUE NOT NULL,
+    commits INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS edges (
+    a      INTEGER NOT NULL,
+    b      INTEGER NOT NULL,
+    weight INTEGER NOT NULL,
+    PRIMARY KEY (a, b)
+) WITHOUT ROWID;
+"""
+
+# Neighbours kept per file
+TOP_K = 32
+# Commits touching more files than this add no edges
+MAX_COMMIT_FILES = 40
+# Pending edges are written (and pruned) every this many commits
+FLUSH_COMMITS = 5000
+# Parameters per IN (...) query; old sqlite builds allow 999
+QUERY_CHUNK = 500
+
+# Two staged files are linked when score + tag bonus reaches LINK
+LINK = 0.5
+TAG_BONUS = 0.25
+
+SENTINEL = "\x1e"
+
+
+def db_path(repo_path: str) -> str:
+    return _db_path(repo_path, DB_NAME)
+
+
+def log_command(path: str, rev_range: str) -> list:
+    return ["git", "-C", path, "-c", "core.quotePath=false", "log", "--name-only",
+            "--no-renames", "--format=" + SENTINEL + "%H", rev_range, "--"]
+
+
+def split_name_log(lines):
+    """Group `git log --name-only` output into one path list per commit."""
+    files = None
+    for line in lines:
+        if line.startswith(SENTINEL):
+            if files is not None:
+                yield files
+            files = []
+        elif line and files is not None:
+            files.append(line)
+    if files is not None:
+        yield files
+
+
+def _chunks(items: list, size: int = QUERY_CHUNK):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class CoChangeGraph(TipDB):
+    DB_NAME = DB_NAME
+    SCHEMA = SCHEMA
+    SCHEMA_VERSION = SCHEMA_VERSION
+    TABLES = ("edges", "paths")
+
+    def __init__(self, repo_path: str, db_file: str = None, top_k: int = TOP_K):
+        self.top_k = top_k
+        self._ids = None
+        self._pending_edges = defaultdict(int)
+        self._pending_commits = defaultdict(int)
+        super().__init__(repo_path, db_file)
+
+    def clear(self):
+        super().clear()
+        self._ids = None
+
+    # ── incremental update ───────────────────────────────────────────────
+
+    def update(self) -> int:
+        """
+        Add the commits new since the last update; returns how many.  Raises
+        CalledProcessError, keeping the previous tip, when git log fails.
+        """
+        head = self.head()
+        tip = self.tip
+        if not head or head == tip:
+            return 0  # no commits yet, or nothing new
+        if tip and not self._is_ancestor(tip, head):
+            self.clear()  # weights of rewritten commits can't be taken back once pruned
+            tip = ""
+
+        def consume(lines) -> int:
+            count = 0
+            for files in split_name_log(lines):
+                self._add_commit(files)
+                count += 1
+                if count % FLUSH_COMMITS == 0:
+                    self._flush()
+            self._flush()
+            return count
+
+        try:
+            return self._walk(log_command(self.repo_path, f"{tip}..{head}" if tip else head), head, consume)
+        except BaseException:
+            self._ids = None  # rolled back with the paths they named
+            self._pending_edges.clear()
+            self._pending_commits.clear()
+            raise
+
+    def _id(self, path: str) -> int:
+        if self._ids is None:
+            self._ids = dict(self.db.execute("SELECT path, id FROM paths"))
+        pid = self._ids.get(path)
+        if pid is None:
+            pid = self._ids[path] = self.db.execute(
+                "INSERT INTO paths (path) VALUES (?)", (path,)).lastrowid
+        return pid
+
+    def _add_commit(self, files: list):
+        ids = sorted({self._id(p) for p in files})
+        for pid in ids:
+            self._pending_commits[pid] += 1
+        if len(ids) > MAX_COMMIT_FILES:
+            return
+        for i, a in enumerate(ids):
+            for b in ids[i + 1:]:
+                self._pending_edges[(a, b)] += 1
+
+    def _flush(self):
+        edges, self._pending_edges = self._pending_edges, defaultdict(int)
+        commits, self._pending_commits = self._pending_commits, defaultdict(int)
+        self.db.executemany("UPDATE paths SET commits = commits + ? WHERE id = ?",
+                            [(n, pid) for pid, n in commits.items()])
+        rows = [(a, b, w) for (a, b), w in edges.items()] + [(b, a, w) for (a, b), w in edges.items()]
+        # Two statements rather than an upsert, which needs SQLite 3.24
+        self.db.executemany("INSERT OR IGNORE INTO edges (a, b, weight) VALUES (?, ?, 0)",
+                            [(a, b) for a, b, _ in rows])
+        self.db.executemany("UPDATE edges SET weight = weight + ? WHERE a = ? AND b = ?",
+                            [(w, a, b) for a, b, w in rows])
+        # Keep the TOP_K strongest neighbours of every file that gained edges
+        touched = {a for a, _, _ in rows}
+        self.db.executemany(
+            "DELETE FROM edges WHERE a = ? AND b IN "
+            "(SELECT b FROM edges WHERE a = ? ORDER BY weight DESC, b LIMIT -1 OFFSET ?)",
+            [(a, a, self.top_k) for a in touched])
+
+    # ── queries ──────────────────────────────────────────────────────────
+
+    def degree(self, path: str) -> int:
+        row = self.db.execute(
+            "SELECT COUNT(*) FROM edges JOIN paths ON paths.id = edges.a WHERE paths.path = ?",
+            (path,)).fetchone()
+        return row[0]
+
+    def coupling(self, paths: list) -> dict:
+        """{(path, other): score} for every linked pair within `paths`, each pair once."""
+        info = {}
+        for chunk in _chunks(list(paths)):
+            marks = ",".join("?" * len(chunk))
+            for pid, path, commits in self.db.execute(
+                    f"SELECT id, path, commits FROM paths WHERE path IN ({marks})", chunk):
+                info[pid] = (path, commits)
+        scores = {}
+        for chunk in _chunks(list(info)):
+            marks = ",".join("?" * len(chunk))
+            for a, b, weight in self.db.execute(
+                    f"SELECT a, b, weight FROM edges WHERE a IN ({marks})", chunk):
+                if b not in info:
+                    continue
+                (pa, ca), (pb, cb) = info[a], info[b]
+                key = (pa, pb) if pa < pb else (pb, pa)
+                scores[key] = max(scores.get(key, 0.0), weight / max(min(ca, cb), 1))
+        return scores
+
+
+def suggest_groups(file_diffs: list, results: list, graph=None) -> list:
+    """
+    Split a change set into groups of file indices, largest first.  A file
+    linked to nothing joins a group under the same top-level directory with
+    the same tag, or else the other loose files of its top-level directory.
+    """
+    n = len(file_diffs)
+    parent = list(range(n))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i, j):
+        ri, rj = find(i), find(j)
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+
+    # Same directory
+    first_in_dir = {}
+    for i, fd in enumerate(file_diffs):
+        d = os.path.dirname(fd["path"])
+        union(first_in_dir.setdefault(d, i), i)
+
+    # History: files that changed together, helped by a shared tag
+    if graph is not None:
+        index = {fd["path"]: i for i, fd in enumerate(file_diffs)}
+        for (p, q), score in graph.coupling(list(index)).items():
+            i, j = index[p], index[q]
+            if score + (TAG_BONUS if results[i]["tag"] == results[j]["tag"] else 0) >= LINK:
+                union(i, j)
+
+    clusters = defaultdict(list)
+    for i in range(n):
+        clusters[find(i)].append(i)
+    groups = sorted(clusters.values(), key=lambda g: (-len(g), g[0]))
+
+    def top(i):
+        return file_diffs[i]["path"].split("/", 1)[0]
+
+    merged, loose = [g for g in groups if len(g) > 1], defaultdict(list)
+    for g in groups:
+        if len(g) > 1:
+            continue
+        i = g[0]
+        home = next((m for m in merged if top(m[0]) == top(i)
+                     and results[m[0]]["tag"] == results[i]["tag"]), None)
+        if home is not None:
+            home.append(i)
+        else:
+            loose[top(i)].append(i)
+    merged += loose.values()
+    return sorted((sorted(g) for g in merged), key=lambda g: (-len(g), g[0]))
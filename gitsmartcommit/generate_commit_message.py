@@ -7,10 +7,15 @@ Supports: Python, JS, TS, React, Vue, Svelte, Java, Go, Rust,
           JSON, YAML, TOML, Markdown, Docker, CI/CD configs and more.
 """
 
+import io
 import re
 import subprocess
 import sys
-from collections import defaultdict
+from collections import defaultdict, namedtuple
+from functools import lru_cache
+
+from .languages import analyzer_for
+from .tokendiff import micro_change
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -275,66 +280,98 @@ PURE_CONFIG_NAMES = {
 # PATH HELPERS
 # ─────────────────────────────────────────────────────────────────────────────
 
+# Category bits of PathInfo.flags
+PATH_TEST = 1
+PATH_DOC = 2
+PATH_CONFIG = 4
+PATH_STYLE = 8
+PATH_MARKUP = 16
+PATH_SQL = 32
+PATH_DEPS = 64   # dependency manifest (DEP_FILES)
+
+DOC_EXTS = {".md", ".mdx", ".rst", ".txt", ".adoc"}
+CONFIG_EXTS = {".ini", ".cfg", ".conf", ".env"}
+STYLE_EXTS = {".css", ".scss", ".sass", ".less", ".styl"}
+MARKUP_EXTS = {".html", ".htm", ".xhtml", ".xml", ".xsl", ".xslt", ".svg"}
+SQL_EXTS = {".sql", ".ddl", ".dml"}
+
+PATH_CACHE_SIZE = 65536
+
+PathInfo = namedtuple("PathInfo", "name ext module lang icon flags")
+
+
+@lru_cache(maxsize=PATH_CACHE_SIZE)
+def classify_path(path: str) -> PathInfo:
+    """Everything the analyzer needs to know about a path, worked out once."""
+    name = path.rsplit("/", 1)[-1]
+    lower = name.lower()
+    stem, dot, suffix = name.rpartition(".")
+    ext = "." + suffix.lower() if dot else ""
+    lang = SPECIAL_FILES.get(lower) or EXT_LANG.get(ext, "")
+
+    flags = 0
+    if TEST_PATH_RE.search(path):
+        flags |= PATH_TEST
+    if ext in DOC_EXTS:
+        flags |= PATH_DOC
+    if (lower in SPECIAL_FILES or lower in PURE_CONFIG_NAMES or ext in CONFIG_EXTS
+            or "config" in lower or "settings" in lower
+            or lower.startswith((".eslint", ".prettier", ".babel"))):
+        flags |= PATH_CONFIG
+    if ext in STYLE_EXTS:
+        flags |= PATH_STYLE
+    if ext in MARKUP_EXTS:
+        flags |= PATH_MARKUP
+    if ext in SQL_EXTS:
+        flags |= PATH_SQL
+    if lower in DEP_FILES:
+        flags |= PATH_DEPS
+
+    return PathInfo(name, ext, stem if dot else name, lang, LANG_ICON.get(lang, ""), flags)
+
+
 def file_ext(path: str) -> str:
-    name = path.rsplit("/", 1)[-1].lower()
-    if "." in name:
-        return "." + name.rsplit(".", 1)[-1]
-    return ""
+    return classify_path(path).ext
 
 
 def file_name(path: str) -> str:
-    return path.rsplit("/", 1)[-1]
+    return classify_path(path).name
 
 
 def module(path: str) -> str:
-    name = file_name(path)
-    return name.rsplit(".", 1)[0] if "." in name else name
+    return classify_path(path).module
 
 
 def language(path: str) -> str:
-    name = file_name(path).lower()
-    if name in SPECIAL_FILES:
-        return SPECIAL_FILES[name]
-    return EXT_LANG.get(file_ext(path), "")
+    return classify_path(path).lang
 
 
 def lang_icon(path: str) -> str:
-    return LANG_ICON.get(language(path), "")
+    return classify_path(path).icon
 
 
 def is_test(path: str) -> bool:
-    return bool(TEST_PATH_RE.search(path))
+    return bool(classify_path(path).flags & PATH_TEST)
 
 
 def is_doc(path: str) -> bool:
-    return file_ext(path) in (".md", ".mdx", ".rst", ".txt", ".adoc")
+    return bool(classify_path(path).flags & PATH_DOC)
 
 
 def is_config(path: str) -> bool:
-    name = file_name(path).lower()
-    ext = file_ext(path)
-    return (
-            name in SPECIAL_FILES
-            or name in PURE_CONFIG_NAMES
-            or ext in (".ini", ".cfg", ".conf", ".env")
-            or "config" in name
-            or "settings" in name
-            or name.startswith(".eslint")
-            or name.startswith(".prettier")
-            or name.startswith(".babel")
-    )
+    return bool(classify_path(path).flags & PATH_CONFIG)
 
 
 def is_style(path: str) -> bool:
-    return file_ext(path) in (".css", ".scss", ".sass", ".less", ".styl")
+    return bool(classify_path(path).flags & PATH_STYLE)
 
 
 def is_markup(path: str) -> bool:
-    return file_ext(path) in (".html", ".htm", ".xhtml", ".xml", ".xsl", ".xslt", ".svg")
+    return bool(classify_path(path).flags & PATH_MARKUP)
 
 
 def is_sql(path: str) -> bool:
-    return file_ext(path) in (".sql", ".ddl", ".dml")
+    return bool(classify_path(path).flags & PATH_SQL)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -342,37 +379,83 @@ def is_sql(path: str) -> bool:
 # ─────────────────────────────────────────────────────────────────────────────
 
 FILE_HEADER_RE = re.compile(r"^diff --git a/(.+?) b/(.+?)$")
+# Merge commits: `git log --cc` / `-c` write one combined diff per file
+COMBINED_HEADER_RE = re.compile(r"^diff --(?:cc|combined) (.+)$")
 NEW_FILE_RE = re.compile(r"^new file mode")
 DELETED_RE = re.compile(r"^deleted file mode")
 RENAME_TO_RE = re.compile(r"^rename to (.+)")
 BINARY_RE = re.compile(r"^Binary files")
-HUNK_RE = re.compile(r"^@@ [^@]+ @@\s*(.*)")
+INDEX_RE = re.compile(r"^index ([0-9a-f]+)\.\.([0-9a-f]+)")
+HUNK_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@\s*(.*)")
+COMBINED_INDEX_RE = re.compile(r"^index ([0-9a-f]+(?:,[0-9a-f]+)+)\.\.([0-9a-f]+)")
+# @@@ -a,b -c,d +e,f @@@ — one more '@' than there are parents
+COMBINED_HUNK_RE = re.compile(r"^(@@@+) ((?:-\d+(?:,\d+)? )+)\+(\d+)(?:,(\d+))? \1\s*(.*)")
+NULL_OID_RE = re.compile(r"^0+$")
 
 
-def parse_diff(diff_text: str) -> list:
-    files = []
-    cur = None
+class DiffParser:
+    """
+    Incremental diff parser: feed() lines as they arrive (from a pipe, a
+    memory-mapped file, ...) and close() to get the per-file dicts.
+
+    Combined diffs of merge commits (`diff --cc`) keep only the lines the
+    merge itself introduced or dropped: '+' (or '-') in every parent's
+    column.  Lines taken from one side are that side's change, not the
+    merge's, and are skipped, as are files left with nothing else to show.
+    The remaining ones get "combined": True and the
+    pre-image blob of each parent in "parents"; "old_oid" and the hunk
+    ranges refer to the first parent.
+    """
 
-    for line in diff_text.splitlines():
+    def __init__(self):
+        self.files = []
+        self.cur = None
+        self.width = 0  # parent columns in the current combined hunk
+
+    def _flush(self):
+        cur = self.cur
+        if cur and not (cur.get("combined") and not (cur["added"] or cur["removed"] or cur["is_binary"])):
+            self.files.append(cur)
+        self.cur = None
+
+    def _start(self, path: str, old_path: str) -> dict:
+        self._flush()
+        self.width = 0
+        self.cur = {
+            "path": path,
+            "old_path": old_path,
+            "added": [],
+            "removed": [],
+            "hunk_ctx": [],
+            "is_new": False,
+            "is_deleted": False,
+            "is_rename": False,
+            "is_binary": False,
+            "old_oid": "",
+            "new_oid": "",
+            "hunks": [],
+        }
+        return self.cur
+
+    def feed(self, line: str):
+        cur = self.cur
         m = FILE_HEADER_RE.match(line)
         if m:
-            if cur:
-                files.append(cur)
-            cur = {
-                "path": m.group(2),
-                "old_path": m.group(1),
-                "added": [],
-                "removed": [],
-                "hunk_ctx": [],
-                "is_new": False,
-                "is_deleted": False,
-                "is_rename": False,
-                "is_binary": False,
-            }
-            continue
+            self._start(m.group(2), m.group(1))
+            return
+        m = COMBINED_HEADER_RE.match(line)
+        if m:
+            cur = self._start(m.group(1), m.group(1))
+            cur["combined"] = True
+            cur["parents"] = []
+            return
 
         if cur is None:
-            continue
+            return
+
+        if self.width:
+            self._feed_combined(cur, line)
+            return
 
         if NEW_FILE_RE.match(line):
             cur["is_new"] = True
@@ -383,8 +466,25 @@ def parse_diff(diff_text: str) -> list:
             cur["path"] = RENAME_TO_RE.match(line).group(1)
         elif BINARY_RE.match(line):
             cur["is_binary"] = True
+        elif COMBINED_INDEX_RE.match(line):
+            m = COMBINED_INDEX_RE.match(line)
+            cur["parents"] = ["" if NULL_OID_RE.match(o) else o for o in m.group(1).split(",")]
+            cur["old_oid"] = cur["parents"][0]
+            cur["new_oid"] = "" if NULL_OID_RE.match(m.group(2)) else m.group(2)
+        elif COMBINED_HUNK_RE.match(line):
+            self._combined_hunk(cur, COMBINED_HUNK_RE.match(line))
+        elif INDEX_RE.match(line):
+            m = INDEX_RE.match(line)
+            cur["old_oid"] = "" if NULL_OID_RE.match(m.group(1)) else m.group(1)
+            cur["new_oid"] = "" if NULL_OID_RE.match(m.group(2)) else m.group(2)
         elif HUNK_RE.match(line):
-            ctx = HUNK_RE.match(line).group(1).strip()
+            m = HUNK_RE.match(line)
+            # (old_start, old_count, new_start, new_count)
+            cur["hunks"].append((
+                int(m.group(1)), int(m.group(2) or 1),
+                int(m.group(3)), int(m.group(4) or 1),
+            ))
+            ctx = m.group(5).strip()
             if ctx:
                 cur["hunk_ctx"].append(ctx)
         elif line.startswith("+") and not line.startswith("+++"):
@@ -392,10 +492,56 @@ def parse_diff(diff_text: str) -> list:
         elif line.startswith("-") and not line.startswith("---"):
             cur["removed"].append(line[1:])
 
-    if cur:
-        files.append(cur)
+    def _combined_hunk(self, cur: dict, m):
+        self.width = len(m.group(1)) - 1
+        old_start, _, old_count = m.group(2).split()[0][1:].partition(",")
+        cur["hunks"].append((
+            int(old_start), int(old_count or 1),
+            int(m.group(3)), int(m.group(4) or 1),
+        ))
+        ctx = m.group(5).strip()
+        if ctx:
+            cur["hunk_ctx"].append(ctx)
+
+    def _feed_combined(self, cur: dict, line: str):
+        if line.startswith("@@@"):
+            m = COMBINED_HUNK_RE.match(line)
+            if m:
+                self._combined_hunk(cur, m)
+                return
+        cols = line[:self.width]
+        if cols == "+" * self.width:
+            cur["added"].append(line[self.width:])
+        elif cols == "-" * self.width:
+            cur["removed"].append(line[self.width:])
+
+    def close(self) -> list:
+        self._flush()
+        return self.files
+
+
+def parse_diff_lines(lines) -> list:
+    """Parse any iterable of diff lines (without line terminators)."""
+    parser = DiffParser()
+    for line in lines:
+        parser.feed(line)
+    return parser.close()
+
+
+def iter_file_diffs(lines):
+    """Like parse_diff_lines(), but yield each file as soon as its diff ends."""
+    parser = DiffParser()
+    done = 0
+    for line in lines:
+        parser.feed(line)
+        while done < len(parser.files):
+            yield parser.files[done]
+            done += 1
+    yield from parser.close()[done:]
 
-    return files
+
+def parse_diff(diff_text: str) -> list:
+    return parse_diff_lines(diff_text.splitlines())
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -452,11 +598,11 @@ SKIP_NAMES = {
 }
 
 
-def find_defined_names(lines: list, added_only: bool = False) -> list:
+def find_defined_names(lines: list, added_only: bool = False, patterns=DEF_PATTERNS) -> list:
     """Extract function/class/method names defined in these lines."""
     names = []
     for line in lines:
-        for pat in DEF_PATTERNS:
+        for pat in patterns:
             m = pat.match(line)
             if m:
                 name = m.group(1)
@@ -466,11 +612,76 @@ def find_defined_names(lines: list, added_only: bool = False) -> list:
     return list(dict.fromkeys(names))  # deduplicated, order preserved
 
 
-def detect_scope(fd: dict) -> str:
+def def_patterns(path: str, base=DEF_PATTERNS) -> list:
+    """`base`, preceded by the DEF_PATTERNS of the path's language analyzer if it has any."""
+    extra = getattr(analyzer_for(classify_path(path).ext), "DEF_PATTERNS", None)
+    return list(extra) + list(base) if extra else base
+
+
+def _match_def(line: str, patterns=DEF_PATTERNS) -> str:
+    for pat in patterns:
+        m = pat.match(line)
+        if m:
+            name = m.group(1)
+            if name and name.lower() not in SKIP_NAMES:
+                return name
+    return ""
+
+
+def load_image(fd: dict, side: str, store) -> list:
+    """
+    Lines of the pre ("old") or post ("new") image of a file, read from the
+    object store.  Returns [] when there is no store or the blob is missing
+    (e.g. unstaged changes whose post-image only exists in the worktree).
+    """
+    oid = fd.get(side + "_oid")
+    if store is None or not oid:
+        return []
+    try:
+        return store.read_text(oid).splitlines()
+    except (KeyError, ValueError, OSError):
+        return []
+
+
+def _scope_from_images(fd: dict, store):
+    """
+    Resolve each hunk's first line to its enclosing Class.method using the
+    cached outline of the file's blob.  Returns None when no blob could be
+    read, so the caller falls back to guessing from the hunk text.
+    """
+    from .outline import outline_for
+
+    hunks = fd.get("hunks") or []
+    if store is None or not hunks:
+        return None
+    resolved = False
+    patterns = def_patterns(fd["path"])
+    for old_start, old_count, new_start, new_count in hunks:
+        # Pure deletions have no post-image lines — look at the pre-image
+        side, line = ("old", old_start) if new_count == 0 else ("new", new_start)
+        oid = fd.get(side + "_oid")
+        if not oid:
+            continue
+        outline = outline_for(oid, lambda: load_image(fd, side, store), patterns)
+        if outline.lines:
+            resolved = True
+        name = outline.enclosing(line)
+        if name:
+            return name
+    return "" if resolved else None
+
+
+def detect_scope(fd: dict, store=None) -> str:
     """Best guess at which function/class is being changed."""
+    # Enclosing definition from the actual file contents, when available
+    name = _scope_from_images(fd, store)
+    if name is not None:
+        return name
+
     # Hunk context (@@ lines often include surrounding function name)
+    patterns = def_patterns(fd["path"])
     for ctx in fd["hunk_ctx"]:
-        for pat in DEF_PATTERNS:
+        for pat in patterns:
             m = pat.search(ctx)
             if m:
                 name = m.group(1)
@@ -478,13 +689,11 @@ def detect_scope(fd: dict) -> str:
                     return name
 
     # Scan nearby added/removed lines
+    reliable = def_patterns(fd["path"], DEF_PATTERNS[:6])  # only most reliable patterns
     for line in (fd["added"] + fd["removed"])[:30]:
-        for pat in DEF_PATTERNS[:6]:  # only most reliable patterns
-            m = pat.match(line)
-            if m:
-                name = m.group(1)
-                if name and name.lower() not in SKIP_NAMES:
-                    return name
+        name = _match_def(line, reliable)
+        if name:
+            return name
     return ""
 
 
@@ -492,6 +701,14 @@ def detect_scope(fd: dict) -> str:
 # CHANGE ANALYSIS PATTERNS
 # ─────────────────────────────────────────────────────────────────────────────
 
+# Rule tags that pick classify()'s path category outright (see rules.py)
+TAG_CTYPE = {
+    "[CONFIG]": "config",
+    "[DOCS]": "docs",
+    "[TEST]": "test",
+    "[STYLE]": "style",
+}
+
 # Bug fix keywords — scored, not boolean
 FIX_KW_RE = re.compile(
     r"\b(fix|bug|patch|hotfix|correct|wrong|broken|crash|traceback"
@@ -541,23 +758,6 @@ SQL_OP_RE = re.compile(
     re.IGNORECASE,
 )
 
-SQL_TABLE_RE = re.compile(
-    r"(?:FROM|INTO|UPDATE|JOIN|TABLE)\s+[`\"]?(\w+)[`\"]?",
-    re.IGNORECASE,
-)
-
-# CSS / SCSS selectors
-CSS_SEL_RE = re.compile(r"^\s*([.#][\w-]+(?:[\s,>+~:[\]]*[\w.#-]+)*)\s*\{")
-
-# CSS properties
-CSS_PROP_RE = re.compile(r"^\s*([\w-]+)\s*:\s*[^/]")
-
-# XML / Odoo field tags
-XML_FIELD_RE = re.compile(r'<field\s+name=["\'](\w+)["\']', re.IGNORECASE)
-
-# XML / Odoo widget / attribute changes
-XML_ATTR_RE = re.compile(r'\b(widget|invisible|readonly|required|domain|attrs|decoration-\w+)\s*=', re.IGNORECASE)
-
 # Return value change
 RETURN_RE = re.compile(r"^\s*return\b")
 
@@ -585,26 +785,31 @@ ASSIGN_RE = re.compile(r"^\s*(?:self|this)\.(\w+)\s*=")
 # CHANGE TYPE CLASSIFIER
 # ─────────────────────────────────────────────────────────────────────────────
 
-def classify(fd: dict) -> str:
+def classify(fd: dict, rules=None) -> str:
     """
     Returns one of:
       new_file | deleted | rename | binary |
       test | docs | config | style | markup | sql |
       fix | feat | refactor | update
-    """
-    path = fd["path"]
 
+    `rules` (rules.Rules) can pick the path category and add fix keywords.
+    """
     if fd["is_deleted"]: return "deleted"
     if fd["is_new"]:     return "new_file"
     if fd["is_rename"]:  return "rename"
     if fd["is_binary"]:  return "binary"
 
-    if is_test(path):   return "test"
-    if is_config(path): return "config"
-    if is_doc(path):    return "docs"
-    if is_style(path):  return "style"
-    if is_markup(path): return "markup"
-    if is_sql(path):    return "sql"
+    rule = rules.match(fd["path"]) if rules else None
+    if rule and rule["tag"] in TAG_CTYPE:
+        return TAG_CTYPE[rule["tag"]]
+
+    flags = classify_path(fd["path"]).flags
+    if flags & PATH_TEST:   return "test"
+    if flags & PATH_CONFIG: return "config"
+    if flags & PATH_DOC:    return "docs"
+    if flags & PATH_STYLE:  return "style"
+    if flags & PATH_MARKUP: return "markup"
+    if flags & PATH_SQL:    return "sql"
 
     added = fd["added"]
     removed = fd["removed"]
@@ -625,7 +830,8 @@ def classify(fd: dict) -> str:
 
     # Medium signal: fix-related keywords in comments or variable names
     # (only in added lines — not just anywhere in the diff)
-    if FIX_KW_RE.search("\n".join(added)):
+    added_text = "\n".join(added)
+    if FIX_KW_RE.search(added_text) or (rules and rules.fix_kw_re and rules.fix_kw_re.search(added_text)):
         fix_score += 1
 
     # Weak signal: small targeted change
@@ -636,8 +842,9 @@ def classify(fd: dict) -> str:
         return "fix"
 
     # ── new definitions added ────────────────────────────────────────────
-    new_names = find_defined_names(added)
-    old_names = find_defined_names(removed)
+    patterns = def_patterns(fd["path"])
+    new_names = find_defined_names(added, patterns=patterns)
+    old_names = find_defined_names(removed, patterns=patterns)
     genuinely_new = [n for n in new_names if n not in old_names]
     if genuinely_new and n_add > n_rem * 0.5:
         return "feat"
@@ -653,7 +860,7 @@ def classify(fd: dict) -> str:
 # DETAIL EXTRACTORS  (what specifically changed?)
 # ─────────────────────────────────────────────────────────────────────────────
 
-def extract_details(fd: dict, ctype: str) -> list:
+def extract_details(fd: dict, ctype: str, store=None) -> list:
     """
     Return a list of short detail strings describing what specifically changed.
     Max 4 items — keep it readable.
@@ -667,10 +874,17 @@ def extract_details(fd: dict, ctype: str) -> list:
     if ctype in ("new_file", "deleted", "rename", "binary", "docs"):
         return []
 
+    # ── language analyzers (languages/) ─────────────────────────────────
+    analyzer = analyzer_for(classify_path(path).ext) or analyzer_for(ctype)
+    extract = getattr(analyzer, "extract_details", None)
+    if extract is not None:
+        found = extract(fd, ctype, store) if getattr(analyzer, "READS_BLOBS", False) else extract(fd, ctype)
+        if found is not None:
+            return found[:4]
+
     # ── CONFIG ───────────────────────────────────────────────────────────
     if ctype == "config":
-        name = file_name(path).lower()
-        if name in DEP_FILES or name == "package.json":
+        if classify_path(path).flags & PATH_DEPS:
             new_deps = _extract_dep_names(added)
             rem_deps = _extract_dep_names(removed)
             if new_deps:
@@ -682,61 +896,6 @@ def extract_details(fd: dict, ctype: str) -> list:
             details.append(f"version → {ver}")
         return details[:4]
 
-    # ── SQL ──────────────────────────────────────────────────────────────
-    if ctype == "sql":
-        ops = []
-        tables = set()
-        for l in added + removed:
-            m = SQL_OP_RE.match(l)
-            if m:
-                ops.append(m.group(1).upper().split()[0])
-            for tm in SQL_TABLE_RE.findall(l):
-                if tm.lower() not in ("from", "into", "join", "table", "update", "where"):
-                    tables.add(tm)
-        if ops:
-            details.append("ops: " + ", ".join(list(dict.fromkeys(ops))[:3]))
-        if tables:
-            details.append("tables: " + ", ".join(list(sorted(tables))[:4]))
-        return details[:4]
-
-    # ── STYLE ────────────────────────────────────────────────────────────
-    if ctype == "style":
-        sels = []
-        props = []
-        for l in added + removed:
-            ms = CSS_SEL_RE.match(l)
-            if ms:
-                sels.append(ms.group(1).strip())
-            mp = CSS_PROP_RE.match(l)
-            if mp and mp.group(1).lower() not in ("http", "https", "src"):
-                props.append(mp.group(1).lower())
-        if sels:
-            details.append("selectors: " + ", ".join(list(dict.fromkeys(sels))[:3]))
-        if props:
-            details.append("properties: " + ", ".join(list(dict.fromkeys(props))[:4]))
-        return details[:4]
-
-    # ── MARKUP / XML ─────────────────────────────────────────────────────
-    if ctype == "markup":
-        at = "\n".join(added)
-        rt = "\n".join(removed)
-        new_f = set(XML_FIELD_RE.findall(at))
-        gone_f = set(XML_FIELD_RE.findall(rt))
-        only_n = sorted(new_f - gone_f)
-        only_g = sorted(gone_f - new_f)
-        mod_f = sorted(new_f & gone_f)
-        if only_n:
-            details.append("+ fields: " + ", ".join(only_n[:4]))
-        if only_g:
-            details.append("- fields: " + ", ".join(only_g[:4]))
-        if mod_f:
-            attrs = list(dict.fromkeys(XML_ATTR_RE.findall(at)))
-            if attrs:
-                details.append(f"modified {', '.join(mod_f[:2])}: {', '.join(attrs[:3])}")
-            else:
-                details.append("updated: " + ", ".join(mod_f[:3]))
-        return details[:4]
-
     # ── TEST ─────────────────────────────────────────────────────────────
     if ctype == "test":
         test_names = [
@@ -754,8 +913,9 @@ def extract_details(fd: dict, ctype: str) -> list:
     # ── CODE (fix / feat / refactor / update) ───────────────────────────
 
     # New functions/classes added
-    new_names = find_defined_names(added)
-    old_names = find_defined_names(removed)
+    patterns = def_patterns(path)
+    new_names = find_defined_names(added, patterns=patterns)
+    old_names = find_defined_names(removed, patterns=patterns)
     added_defs = [n for n in new_names if n not in old_names]
     removed_defs = [n for n in old_names if n not in new_names]
 
@@ -825,17 +985,49 @@ def _extract_version_bump(lines: list) -> str:
 # PER-FILE DESCRIPTOR  (tag + summary + details)
 # ─────────────────────────────────────────────────────────────────────────────
 
-def describe_file(fd: dict) -> dict:
-    """Returns {tag, summary, details, lang, path}."""
+# Descriptive labels for well-known new files
+SPECIAL_DESC = {
+    ".gitignore": "for exclusions",
+    "license": "file",
+    "readme.md": "for project overview",
+    "pyproject.toml": "for build config",
+    "setup.py": "for packaging",
+    "__init__.py": "to initialize package",
+    "generate_commit_message.py": "for message generation",
+    "git.py": "for git services",
+}
+
+def describe_file(fd: dict, store=None, rules=None) -> dict:
+    """
+    Returns {tag, summary, details, lang, path, scope}.
+    A matching repository rule (rules.Rules) is applied first: generated
+    files skip analysis, and a rule's tag / scope override the heuristics'.
+    """
+    rule = rules.match(fd["path"]) if rules else None
+    if rule and rule["generated"]:
+        info = _r(rule["tag"] or "[CHORE]", f"Regenerate {classify_path(fd['path']).name}", [], fd["path"])
+        info["scope"] = ""
+    else:
+        scope = detect_scope(fd, store)
+        info = _describe(fd, scope, rules, store)
+        info["scope"] = scope
+        if rule and rule["tag"]:
+            info["tag"] = rule["tag"]
+    if rule and rule["scope"]:
+        info["rule_scope"] = rule["scope"]
+    return info
+
+
+def _describe(fd: dict, scope: str, rules=None, store=None) -> dict:
     path = fd["path"]
     added = fd["added"]
     removed = fd["removed"]
     n_add = len(added)
     n_rem = len(removed)
-    mod = module(path)
-    lang = language(path)
-    ctype = classify(fd)
-    scope = detect_scope(fd)
+    info = classify_path(path)
+    mod = info.module
+    lang = info.lang
+    ctype = classify(fd, rules)
 
     scope_s = f" in {scope}()" if scope else ""
     lang_s = f" [{lang}]" if lang else ""
@@ -845,25 +1037,16 @@ def describe_file(fd: dict) -> dict:
         return _r("[REMOVE]", f"Remove {mod}{lang_s}", [], path)
 
     if ctype == "new_file":
-        if is_test(path):
+        if info.flags & PATH_TEST:
             return _r("[TEST]", f"Add tests for {mod}", [], path)
-        purpose = _guess_purpose(added, path)
+        guess = getattr(analyzer_for(info.ext), "guess_purpose", None)
+        purpose = (guess(added, path) if guess else "") or _guess_purpose(added, path)
         # Special descriptive labels
-        name_lower = file_name(path).lower()
-        special_desc = {
-            ".gitignore": "for exclusions",
-            "license": "file",
-            "readme.md": "for project overview",
-            "pyproject.toml": "for build config",
-            "setup.py": "for packaging",
-            "__init__.py": "to initialize package",
-            "generate_commit_message.py": "for message generation",
-            "git.py": "for git services",
-        }.get(name_lower, "")
+        special_desc = SPECIAL_DESC.get(info.name.lower(), "")
         if special_desc:
-            label = f"{file_name(path)} {special_desc}"
+            label = f"{info.name} {special_desc}"
         else:
-            label = purpose or file_name(path)
+            label = purpose or info.name
             if lang and not purpose:
                 label += f" ({lang})"
         return _r("[ADD]", f"Add {label}", [], path)
@@ -873,10 +1056,10 @@ def describe_file(fd: dict) -> dict:
         return _r("[RENAME]", f"Rename {old_mod} → {mod}", [], path)
 
     if ctype == "binary":
-        return _r("[UPDATE]", f"Update binary asset {file_name(path)}", [], path)
+        return _r("[UPDATE]", f"Update binary asset {info.name}", [], path)
 
     # ── specialized ──────────────────────────────────────────────────────
-    details = extract_details(fd, ctype)
+    details = extract_details(fd, ctype, store)
 
     if ctype == "test":
         verb = "Add" if n_add > n_rem * 1.5 else "Update"
@@ -886,14 +1069,17 @@ def describe_file(fd: dict) -> dict:
         return _r("[DOCS]", f"Update {mod} documentation", details, path)
 
     if ctype == "config":
-        name = file_name(path).lower()
-        if name in DEP_FILES or name == "package.json":
+        if info.flags & PATH_DEPS:
             ver = _extract_version_bump(added)
             if ver:
                 return _r("[CONFIG]", f"Bump {mod} version to {ver}", details, path)
             has_new = any(l.startswith("+") for d in details for l in [d])
             verb = "Update" if details else "Update"
             return _r("[CONFIG]", f"Update {lang or mod} dependencies", details, path)
+        key_detail = next((d for d in details if d.startswith("keys: ")), "")
+        if key_detail:
+            keys = key_detail.replace("keys: ", "")
+            return _r("[CONFIG]", f"Update {keys} in {mod}", details, path)
         return _r("[CONFIG]", f"Update {lang or mod} configuration", details, path)
 
     if ctype == "style":
@@ -916,13 +1102,23 @@ def describe_file(fd: dict) -> dict:
         tbl = tbl_detail.replace("tables: ", "").split(",")[0].strip() if tbl_detail else mod
         return _r("[UPDATE]", f"{op} SQL query on {tbl}", details, path)
 
+    # ── data files (JSON / YAML / TOML): name the changed keys ────────────
+    key_detail = next((d for d in details if d.startswith("keys: ")), "")
+    if key_detail:
+        keys = key_detail.replace("keys: ", "")
+        if ctype == "feat":
+            return _r("[ADD]", f"Add {keys} to {info.name}", details, path)
+        tag = {"fix": "[FIX]", "refactor": "[REFACTOR]"}.get(ctype, "[UPDATE]")
+        return _r(tag, f"Update {keys} in {info.name}", details, path)
+
     # ── code changes ─────────────────────────────────────────────────────
     if ctype == "fix":
         return _r("[FIX]", _describe_fix(added, removed, scope, mod), details, path)
 
     if ctype == "feat":
-        new_names = find_defined_names(added)
-        old_names_ = find_defined_names(removed)
+        patterns = def_patterns(path)
+        new_names = find_defined_names(added, patterns=patterns)
+        old_names_ = find_defined_names(removed, patterns=patterns)
         new_only = [n for n in new_names if n not in old_names_]
         if new_only:
             joined = ", ".join(new_only[:3])
@@ -942,6 +1138,11 @@ def describe_file(fd: dict) -> dict:
         if route:
             return _r("[UPDATE]", f"Update route '{route}' in {mod}", details, path)
 
+    # Single-token edit (constant, operator, name, default argument)?
+    micro = micro_change(fd)
+    if micro:
+        return _r("[UPDATE]", f"{micro}{scope_s} in {mod}", details, path)
+
     # Return value change?
     if any(RETURN_RE.match(l.strip()) for l in added) and any(RETURN_RE.match(l.strip()) for l in removed):
         return _r("[UPDATE]", f"Update return value{scope_s} in {mod}", details, path)
@@ -961,7 +1162,7 @@ def describe_file(fd: dict) -> dict:
 
 def _r(tag, summary, details, path):
     return {"tag": tag, "summary": summary, "details": details,
-            "lang": language(path), "path": path}
+            "lang": classify_path(path).lang, "path": path, "verb": summary.split(" ", 1)[0]}
 
 
 def _guess_purpose(lines: list, path: str) -> str:
@@ -1026,17 +1227,21 @@ TAG_PRIORITY = [
 ]
 
 
-def _pick_tag(counts: dict) -> str:
+def _pick_tag(counts: dict, priority=TAG_PRIORITY) -> str:
     total = sum(counts.values())
-    for tag in TAG_PRIORITY:
+    for tag in priority:
         if counts.get(tag, 0) / total >= 0.5:
             return tag
-    for tag in TAG_PRIORITY:
+    for tag in priority:
         if tag in counts:
             return tag
     return "[UPDATE]"
 
 
+# From this many files the subject may name a directory instead (tree.py)
+AGGREGATE_MIN = 10
+
+
 def _trim(text: str, limit: int = 70) -> str:
     if len(text) <= limit:
         return text
@@ -1044,43 +1249,87 @@ def _trim(text: str, limit: int = 70) -> str:
     return (text[:cut] if cut > int(limit * 0.6) else text[:limit - 3]) + "..."
 
 
-def create_commit_message(git_diff: str, branch: str = "") -> dict:
+def create_commit_message(git_diff: str, branch: str = "", store=None, render: bool = True,
+                          rules=None) -> dict:
     """
     Returns a dict with:
       subject  — one-line commit summary (plain text, for git commit -m)
-      display  — full colored terminal output
+      display  — full colored terminal output ("" when render=False; use
+                 render.render_result to stream it instead)
+
+    `store` is an optional objects.ObjectStore used to read pre/post images
+    for scope detection; `rules` are the repository's rules.Rules.
     """
     if not git_diff or not git_diff.strip():
         return {"subject": "[UPDATE] Minor changes", "display": ""}
 
-    file_diffs = parse_diff(git_diff)
+    return commit_message_for_files(parse_diff(git_diff), branch, store, render, rules)
+
+
+def commit_message_for_files(file_diffs: list, branch: str = "", store=None,
+                             render: bool = True, rules=None) -> dict:
+    """create_commit_message() for diffs that were already parsed."""
     if not file_diffs:
         return {"subject": "[UPDATE] Minor changes", "display": ""}
 
-    results = []
+    results = [describe_file(fd, store, rules) for fd in file_diffs]
+    return compose_message(file_diffs, results, branch, render=render)
+
+
+def compose_message(file_diffs: list, results: list, branch: str = "",
+                    priority=TAG_PRIORITY, render: bool = True) -> dict:
+    """Build the subject (and, if `render`, the display) from per-file results."""
+    # One symbol renamed across most files (renames.py) names the commit,
+    # and files changed by nothing but that rename say so
+    rename = None
+    if len(results) > 1:
+        from .renames import dominant_rename
+        rename = dominant_rename(file_diffs)
+        if rename:
+            summary = f"Rename {rename['old']} → {rename['new']}"
+            results = list(results)
+            for i in rename["explained"]:
+                results[i] = dict(results[i], tag="[REFACTOR]", summary=summary,
+                                  verb="Rename", details=[])
+
     tag_counts = defaultdict(int)
     total_add = 0
     total_rem = 0
 
-    for fd in file_diffs:
-        info = describe_file(fd)
-        results.append(info)
+    for fd, info in zip(file_diffs, results):
         tag_counts[info["tag"]] += 1
         total_add += len(fd["added"])
         total_rem += len(fd["removed"])
 
-    primary_tag = _pick_tag(tag_counts)
+    primary_tag = _pick_tag(tag_counts, priority)
     branch_part = f"[{branch}]" if branch else ""
 
     # ── build plain subject (tag must match the lead message) ──────────────
+    lead, extra = 0, 0
     if len(results) == 1:
         lead_tag = results[0]["tag"]
         subject_body = results[0]["summary"]
+    elif rename:
+        lead_tag = "[REFACTOR]"
+        subject_body = (f"Rename {rename['old']} → {rename['new']} across "
+                        f"{len(rename['files'])} file{'s' if len(rename['files']) != 1 else ''}")
+        lead = None
     else:
-        lead_result = next(
-            (r for tag in TAG_PRIORITY for r in results if r["tag"] == tag),
-            results[0],
-        )
+        lead_tag = None
+        if len(results) >= AGGREGATE_MIN:
+            # Big change sets: name the directory most of the change lives in
+            from .tree import aggregate_subject, build_tree, focus
+            root = build_tree(file_diffs, results, names=False)
+            node = focus(root)
+            if node is not root:
+                lead_tag, subject_body = aggregate_subject(node, root.files, priority)
+                lead = None
+
+    if lead_tag is None:
+        # First result carrying the highest-priority tag present
+        rank = {tag: i for i, tag in enumerate(priority)}
+        lead = min(range(len(results)), key=lambda i: (rank.get(results[i]["tag"], len(rank)), i))
+        lead_result = results[lead]
         lead_tag = lead_result["tag"]
         extra = len(results) - 1
         subject_body = f"{lead_result['summary']} (+{extra} more)"
@@ -1089,112 +1338,38 @@ def create_commit_message(git_diff: str, branch: str = "") -> dict:
 
     # ── build colored display ─────────────────────────────────────────────
     display = _render(plain_subject, lead_tag, branch, results,
-                      total_add, total_rem, tag_counts)
+                      total_add, total_rem, tag_counts) if render else ""
 
-    return {"subject": plain_subject, "display": display, '_files': results}
+    # `_lead` is what the subject was built from, for messages.compose_formats:
+    # the lead result's index (None for a directory roll-up or a rename), its tag, the
+    # subject text without tag/branch/count, and how many files it stands for.
+    return {"subject": plain_subject, "display": display, '_files': results,
+            '_totals': (total_add, total_rem),
+            '_lead': {"index": lead, "tag": lead_tag, "more": extra,
+                      "text": subject_body if lead is None else results[lead]["summary"]}}
 
 
 def _render(subject, primary_tag, branch, results, total_add, total_rem, tag_counts) -> str:
-    W = 66  # inner width
-    bar = C.dim("─" * W)
-
-    lines = []
-    lines.append("")
-    lines.append(C.dim("╭" + "─" * W + "╮"))
-
-    # ── Header ───────────────────────────────────────────────────────────
-    header_label = f"  {C.bold(C.cyan('git commit message'))}"
-    if branch:
-        header_label += C.dim(f"  •  branch: ") + C.yellow(branch)
-    lines.append(C.dim("│") + header_label)
-    lines.append(C.dim("├") + bar[len(C.dim("")):])  # separator
-
-    # ── Subject line ─────────────────────────────────────────────────────
-    icon = TAG_ICON.get(primary_tag, "●")
-    colored = C.tag(primary_tag)
-    plain_s = subject[len(primary_tag):]  # strip tag for separate coloring
-    branch_display = ""
-    if branch and f"[{branch}]" in plain_s:
-        plain_s = plain_s.replace(f"[{branch}]", "").strip()
-        branch_display = C.dim(f"[{branch}]") + " "
-    lines.append(C.dim("│") + f"  {colored} {branch_display}{C.bold(plain_s.strip())}")
-    lines.append(C.dim("│"))
-
-    # ── Per-file breakdown ────────────────────────────────────────────────
-    lines.append(C.dim(
-        "│") + f"  {C.bold(C.white('Changes'))}  {C.dim(str(len(results)) + ' file' + ('s' if len(results) != 1 else ''))}")
-    lines.append(C.dim("│") + f"  {bar}")
-
-    for r in results:
-        tag = r["tag"]
-        icon_c = C.tag(tag)
-        icon_s = TAG_ICON.get(tag, "●")
-        li = LANG_ICON.get(r["lang"], "")
-        path_disp = r["path"]
-
-        # Truncate long paths nicely
-        if len(path_disp) > 42:
-            parts = path_disp.split("/")
-            if len(parts) > 2:
-                path_disp = "…/" + "/".join(parts[-2:])
-
-        lang_badge = f" {C.dim(li + ' ' + r['lang'])}" if r["lang"] else ""
-
-        lines.append(
-            C.dim("│") +
-            f"  {icon_c} {C.white(r['summary'])}{lang_badge}"
-        )
-        lines.append(
-            C.dim("│") +
-            f"     {C.dim('↳ ' + path_disp)}"
-        )
-
-        # Detail sub-bullets
-        for d in r["details"]:
-            # Color + / - prefixes
-            if d.startswith("+"):
-                lines.append(C.dim("│") + f"       {C.green('+')} {C.dim(d[2:])}")
-            elif d.startswith("-"):
-                lines.append(C.dim("│") + f"       {C.red('-')} {C.dim(d[2:])}")
-            else:
-                lines.append(C.dim("│") + f"       {C.dim('· ' + d)}")
-
-        lines.append(C.dim("│"))
-
-    # ── Stats footer ─────────────────────────────────────────────────────
-    lines.append(C.dim("├") + bar[len(C.dim("")):])
-    files_s = C.bold(str(len(results)))
-    add_s = C.green(f"+{total_add}")
-    rem_s = C.red(f"-{total_rem}")
-    net = total_add - total_rem
-    net_s = (C.green(f"net +{net}") if net > 0 else C.red(f"net {net}") if net < 0 else C.dim("net 0"))
-
-    # Tag summary
-    tag_summary = "  ".join(
-        f"{C.tag(t)} {C.dim('×' + str(c))}"
-        for t, c in sorted(tag_counts.items(), key=lambda x: -x[1])
-    )
-
-    lines.append(C.dim("│") + f"  {C.dim('Files')} {files_s}  {add_s}  {rem_s}  {net_s}")
-    if len(tag_counts) > 1:
-        lines.append(C.dim("│") + f"  {tag_summary}")
-    lines.append(C.dim("╰") + "─" * W + "╯")
-
-    # ── Plain text block (for copying to git) ────────────────────────────
-    return "\n".join(lines)
+    """The preview as one colored string, at the classic fixed width."""
+    from .render import render
+
+    buf = io.StringIO()
+    render(buf, subject, primary_tag, branch, results, total_add, total_rem, tag_counts,
+           color=True, width=66)
+    return buf.getvalue().rstrip("\n")
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # CLI
 # ─────────────────────────────────────────────────────────────────────────────
 
-def generate_commit_message(diff, branch):
+def generate_commit_message(diff, branch, store=None, render=True, rules=None):
     if not diff.strip():
         print("\n  No diff found.")
         print("  → Stage changes with: git add <files>")
         print("  → Or use:  --source=unstaged  for unstaged changes\n")
         sys.exit(0)
 
-    result = create_commit_message(diff, branch)
+    result = create_commit_message(diff, branch, store, render, rules)
 
     return result
\ No newline at end of file
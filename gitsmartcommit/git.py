@@ -1,9 +1,40 @@
+import json
 import os
 import sys
-import re
+import shlex
 import subprocess
 import argparse
-from .generate_commit_message import generate_commit_message, _pick_tag
+from .generate_commit_message import (commit_message_for_files, compose_message, describe_file,
+                                      iter_file_diffs, parse_diff)
+from .messages import STYLES, compose_formats
+from .objects import ObjectStore
+from .partial import is_partial_clone, partial_note, safe_file_diffs
+from .patchfile import open_diff_lines, read_patches
+from .render import render_result
+from .rules import RULES_FILE, Rules, RulesError
+from .workspace import PackageIndex
+
+
+# parse_diff never looks at context lines, so ask git for none of them, and
+# pin every option user config could otherwise change (color.ui, diff.external,
+# textconv drivers, diff.noprefix).  Hunk headers still carry the function
+# context that ends up in hunk_ctx.
+DIFF_PROFILE = [
+    '-U0', '--no-color', '--no-ext-diff', '--no-textconv', '--full-index',
+    '--src-prefix=a/', '--dst-prefix=b/',
+]
+
+
+def _anywhere(pattern: str) -> str:
+    # Like .gitignore: a glob without a slash matches at any depth
+    return pattern if '/' in pattern else '**/' + pattern
+
+
+def pathspecs(include=(), exclude=()) -> list:
+    """Turn --include/--exclude globs into git pathspec arguments."""
+    specs = [f':(glob){_anywhere(p)}' for p in include or ()]
+    specs += [f':(glob,exclude){_anywhere(p)}' for p in exclude or ()]
+    return ['--'] + specs if specs else []
 
 
 def check_git_repo(path: str) -> bool:
@@ -32,15 +63,17 @@ def git_branch(path: str) -> str:
         return ""
 
 
-def git_diff(path: str) -> str:
+def git_diff(path: str, include=(), exclude=()) -> str:
     """
     Get the diff to analyze.
     Priority: staged changes first, fall back to unstaged if nothing is staged.
+    Excluded paths are filtered by git itself and never generated.
     """
+    specs = pathspecs(include, exclude)
     try:
         # Staged changes (git add has been run)
         staged = subprocess.check_output(
-            ['git', '-C', path, 'diff', '--cached'],
+            ['git', '-C', path, 'diff', '--cached'] + DIFF_PROFILE + specs,
             stderr=subprocess.STDOUT
         ).decode('utf-8', errors='replace')
 
@@ -49,7 +82,7 @@ def git_diff(path: str) -> str:
 
         # Nothing staged — try unstaged
         unstaged = subprocess.check_output(
-            ['git', '-C', path, 'diff'],
+            ['git', '-C', path, 'diff'] + DIFF_PROFILE + specs,
             stderr=subprocess.STDOUT
         ).decode('utf-8', errors='replace')
 
@@ -65,7 +98,274 @@ def git_diff(path: str) -> str:
         sys.exit(1)
 
 
+def git_diff_source(path: str, include=(), exclude=()) -> str:
+    """
+    Which diff git_diff() would pick — "staged", "unstaged" or "" — asked
+    with --quiet so git only reports whether there is a difference.
+    """
+    specs = pathspecs(include, exclude)
+    for source, extra in (("staged", ['--cached']), ("unstaged", [])):
+        code = subprocess.call(
+            ['git', '-C', path, 'diff', '--quiet'] + extra + specs,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        if code == 1:
+            return source
+    return ""
+
+
+def stream_diff_lines(path: str, args: list, env=None):
+    """Yield `git diff` output line by line while git is still writing it."""
+    cmd = ['git', '-C', path, 'diff'] + args
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, env=env)
+    try:
+        for raw in proc.stdout:
+            yield raw.decode('utf-8', errors='replace').rstrip('\r\n')
+    finally:
+        proc.stdout.close()
+        if proc.wait() not in (0, -13):  # -13: we stopped reading (SIGPIPE)
+            raise subprocess.CalledProcessError(proc.returncode, cmd)
+
+
+def diff_files(path: str, args: list, store=None, include=(), exclude=(), partial=None) -> tuple:
+    """
+    (file diffs parsed while git writes them, notes) for `git diff <args>`.
+    In a partial clone no blob is fetched: files whose blobs are not local
+    are described from name-status only, and a note says so (partial.py).
+    `partial` is is_partial_clone(path) when the caller already knows it.
+    """
+    specs = pathspecs(include, exclude)
+    if partial is None:
+        partial = is_partial_clone(path)
+    if not partial:
+        return iter_file_diffs(stream_diff_lines(path, args + DIFF_PROFILE + specs)), []
+    files, status_only = safe_file_diffs(path, args, specs, store, DIFF_PROFILE)
+    return files, [partial_note(status_only)]
+
+
+def working_tree_diff(path: str, include=(), exclude=(), store=None, partial=None) -> tuple:
+    """(file diffs, source, notes) of the staged changes, else the unstaged ones."""
+    source = git_diff_source(path, include, exclude)
+    if not source:
+        return [], "", []
+    files, notes = diff_files(path, ['--cached'] if source == "staged" else [], store, include, exclude,
+                              partial)
+    return files, source, notes
+
+
+def working_tree_files(path: str, include=(), exclude=(), store=None, partial=None) -> list:
+    """git_diff()'s staged-or-unstaged changes, parsed; partial-clone safe."""
+    if partial is None:
+        partial = is_partial_clone(path)
+    if not partial:
+        diff = git_diff(path, include, exclude)
+        return parse_diff(diff) if diff.strip() else []
+    files, _, notes = working_tree_diff(path, include, exclude, store, partial)
+    try:
+        files = list(files)
+    except subprocess.CalledProcessError as e:
+        print(f"Error: Could not read git diff — {e}")
+        sys.exit(1)
+    for note in notes:
+        print(f"Note: {note}")
+    return files
+
+
+def run_machine(path: str, branch: str, fmt: str, include=(), exclude=()):
+    """--format json/ndjson for the working tree; nothing is rendered."""
+    from .analyzer import Analyzer
+    from .output import write_json, write_ndjson
+
+    source = git_diff_source(path, include, exclude)
+    partial = is_partial_clone(path)
+    store = open_store(path, partial)
+    try:
+        files, notes = ([], [])
+        if source:
+            files, notes = diff_files(path, ['--cached'] if source == "staged" else [], store,
+                                      include, exclude, partial)
+        analyzer = Analyzer(store=store, render=False, rules=load_rules(path))
+        packages = PackageIndex.load(path)
+        if fmt == "ndjson":
+            write_ndjson(files, branch, source, analyzer, packages=packages, notes=notes)
+        else:
+            write_json(files, branch, source, analyzer, packages=packages, notes=notes)
+    except subprocess.CalledProcessError as e:
+        print(f"Error: Could not read git diff — {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if store is not None:
+            store.close()
+
+
+def print_message(result: dict, current_branch: str, packages=None, style: str = "conventional"):
+    """
+    Print the preview and the `git commit` command for one result.
+    `packages` is an optional workspace.PackageIndex: the owning package
+    becomes the scope and the body is split by package.  `style` picks the
+    message format (messages.STYLES).
+    """
+    display = result.get("display", "")
+
+    # Show preview UI
+    if display:
+        print(display)
+    else:
+        render_result(sys.stdout, result, current_branch)
+
+    formats = compose_formats(result, current_branch, packages)
+
+    if style == "changelog":
+        print("\n" + formats["changelog"] + "\n")
+        return
+
+    subject = formats["bracket"] if style == "bracket" else formats["conventional"]
+    body = formats["body"]
+
+    # -------- FINAL COMMAND --------
+    if subject:
+        print("\n  To commit, run:")
+
+        if body:
+            print(
+                f'  git commit -m {shlex.quote(subject)} -m {shlex.quote(body)}\n'
+            )
+        else:
+            print(
+                f'  git commit -m {shlex.quote(subject)}\n'
+            )
+
+
+def run_split(path: str, branch: str, include=(), exclude=(), style: str = "conventional"):
+    """--split: suggest how to break the change into several commits, each with its message."""
+    from .cochange import CoChangeGraph, suggest_groups
+
+    partial = is_partial_clone(path)
+    store = open_store(path, partial)
+    rules = load_rules(path)
+    try:
+        file_diffs = working_tree_files(path, include, exclude, store, partial)
+        if not file_diffs:
+            print("Nothing to commit — no staged or unstaged changes found.")
+            sys.exit(0)
+        results = [describe_file(fd, store, rules) for fd in file_diffs]
+    finally:
+        if store is not None:
+            store.close()
+
+    with CoChangeGraph(path) as graph:
+        try:
+            graph.update()
+        except subprocess.CalledProcessError as e:
+            print(f"Warning: Could not read history, grouping by directory only — {e.stderr or e}")
+            graph = None
+        groups = suggest_groups(file_diffs, results, graph)
+
+    packages = PackageIndex.load(path)
+    if len(groups) == 1:
+        print("\n  These changes belong together — one commit is fine.")
+    else:
+        print(f"\n  Suggested split: {len(groups)} commits")
+        if git_diff_source(path, include, exclude) == "staged":
+            print("  Unstage first with 'git reset -q', then stage and commit each group in turn.")
+    for n, group in enumerate(groups, 1):
+        fds = [file_diffs[i] for i in group]
+        result = compose_message(fds, [results[i] for i in group], branch, render=False)
+        if len(groups) > 1:
+            paths = " ".join(shlex.quote(fd["path"]) for fd in fds)
+            print(f"\n  Commit {n}/{len(groups)}:  git add -- {paths}")
+        print_message(result, branch, packages, style)
+
+
+def load_rules(path: str):
+    """The repository's .smartcommit.toml rules (empty when there is none)."""
+    try:
+        return Rules.load(path)
+    except RulesError as e:
+        print(f"Error: Invalid {RULES_FILE} — {e}")
+        sys.exit(1)
+
+
+def open_store(path: str, partial=None):
+    """
+    Object store for reading pre/post images, or None outside a repo.  In a
+    partial clone it never falls back to `git cat-file`, which would fetch.
+    """
+    if partial is None:
+        partial = is_partial_clone(path)
+    try:
+        return ObjectStore.open(path, fallback=not partial)
+    except (subprocess.CalledProcessError, OSError):
+        return None
+
+
+def write_patches(patches: list, branch: str, fmt: str, store=None, packages=None, rules=None):
+    """
+    --format output for --diff-file.  A single diff looks exactly like the
+    working-tree output; each patch of a series is tagged with its commit.
+    """
+    from .analyzer import Analyzer
+    from .output import json_document, write_json, write_ndjson
+
+    analyzer = Analyzer(store=store, render=False, rules=rules)
+    if len(patches) <= 1:
+        files = patches[0]["files"] if patches else []
+        if fmt == "ndjson":
+            write_ndjson(files, branch, "diff-file", analyzer, packages=packages)
+        else:
+            write_json(files, branch, "diff-file", analyzer, packages=packages)
+        return
+
+    docs = []
+    for patch in patches:
+        extra = {"commit": patch["commit"]}
+        if fmt == "ndjson":
+            write_ndjson(patch["files"], branch, "diff-file", analyzer, extra=extra, packages=packages)
+        else:
+            docs.append(json_document(patch["files"], branch, "diff-file", analyzer, extra=extra,
+                                      packages=packages))
+    if docs:
+        print(json.dumps(docs, ensure_ascii=False, indent=2))
+
+
+def run_diff_file(diff_file: str, path: str, branch: str, fmt: str = "text",
+                  style: str = "conventional"):
+    """Analyze a precomputed diff / patch series (CI pipelines)."""
+    try:
+        patches = read_patches(open_diff_lines(diff_file))
+    except OSError as e:
+        print(f"Error: Could not read diff file — {e}", file=sys.stderr if fmt != "text" else sys.stdout)
+        sys.exit(1)
+
+    patches = [p for p in patches if p["files"]]
+    if not patches and fmt == "text":
+        print("Nothing to commit — the diff file contains no changes.")
+        sys.exit(0)
+
+    store = open_store(path) if os.path.isdir(path) else None
+    packages = PackageIndex.load(path) if store is not None else None
+    rules = load_rules(path) if os.path.isdir(path) else None
+    try:
+        if fmt != "text":
+            write_patches(patches, branch, fmt, store, packages, rules)
+            return
+        for n, patch in enumerate(patches, 1):
+            if len(patches) > 1:
+                label = patch["subject"] or patch["commit"][:12]
+                print(f"\n  Patch {n}/{len(patches)}: {label}")
+            result = commit_message_for_files(patch["files"], branch, store, render=False, rules=rules)
+            print_message(result, branch, packages, style)
+    finally:
+        if store is not None:
+            store.close()
+
+
 def main():
+    if sys.argv[1:2] == ['serve']:
+        from .server import main as serve_main
+        serve_main(sys.argv[2:])
+        return
+
     try:
         parser = argparse.ArgumentParser(
             description="Generate a commit message from your git diff."
@@ -80,11 +380,102 @@ def main():
             default='',
             help="Override the branch name shown in the commit message"
         )
+        parser.add_argument(
+            '--include', '-i',
+            action='append', default=[], metavar='GLOB',
+            help="Only analyze paths matching GLOB (repeatable; without a '/' it matches at any depth)"
+        )
+        parser.add_argument(
+            '--exclude', '-x',
+            action='append', default=[], metavar='GLOB',
+            help="Skip paths matching GLOB (repeatable; without a '/' it matches at any depth)"
+        )
+        parser.add_argument(
+            '--diff-file', '-f',
+            default='', metavar='PATH',
+            help="Analyze a diff or format-patch series from PATH ('-' for stdin) instead of the repository"
+        )
+        parser.add_argument(
+            '--range', '-r',
+            default='', metavar='A..B',
+            help="Analyze every commit in a revision range and print NDJSON, one record per commit"
+        )
+        parser.add_argument(
+            '--jobs', '-j',
+            type=int, default=0,
+            help="Worker processes for --range/--index analysis (default: analyze in-process)"
+        )
+        parser.add_argument(
+            '--index',
+            action='store_true',
+            help="Update the history analysis database in .git/ with commits new since the last run"
+        )
+        parser.add_argument(
+            '--stats',
+            action='store_true',
+            help="Update the history database and print tag / hot-file statistics from it"
+        )
+        parser.add_argument(
+            '--repos-from',
+            default='', metavar='FILE|GLOB',
+            help="Analyze many repositories: a file listing paths, or a directory glob like '~/work/*'"
+        )
+        parser.add_argument(
+            '--threads',
+            type=int, default=16,
+            help="Concurrent git calls in --repos-from mode (default: 16)"
+        )
+        parser.add_argument(
+            '--timeout',
+            type=float, default=60.0,
+            help="Per-repository timeout in seconds for --repos-from (default: 60)"
+        )
+        parser.add_argument(
+            '--format',
+            choices=('text', 'json', 'ndjson'), default='text',
+            help="Output format: colored text (default), one JSON document, or NDJSON "
+                 "(a record per file as it is analyzed, then a summary)"
+        )
+        parser.add_argument(
+            '--base',
+            default='', metavar='REF',
+            help="Describe the branch's changes since its merge-base with REF (git diff REF...HEAD)"
+        )
+        parser.add_argument(
+            '--pr',
+            action='store_true',
+            help="Like --base, against the remote's default branch (origin/HEAD)"
+        )
+        parser.add_argument(
+            '--split',
+            action='store_true',
+            help="Suggest splitting the change into several commits, using files' co-change history"
+        )
+        parser.add_argument(
+            '--style',
+            choices=STYLES, default='conventional',
+            help="Commit message style: Conventional Commits (default), bracket tags, or changelog lines"
+        )
         args = parser.parse_args()
 
         path   = os.path.abspath(args.path)
         branch = args.branch
 
+        if args.diff_file:
+            run_diff_file(args.diff_file, path, branch, args.format, args.style)
+            return
+
+        if args.repos_from:
+            from .batch import repos_from, run_batch, print_record
+            repos = repos_from(args.repos_from)
+            if not repos:
+                print(f"Error: No repositories found in {args.repos_from}")
+                sys.exit(1)
+            for rec in run_batch(repos, args.threads, args.jobs, args.timeout,
+                                 args.include, args.exclude):
+                print_record(rec)
+            return
+
         # Validate path
         if not os.path.isdir(path):
             print(f"Error: Path does not exist: {path}")
@@ -95,103 +486,62 @@ def main():
             print(f"Error: Not a git repository: {path}")
             sys.exit(1)
 
+        if args.range:
+            from .history import run_range
+            run_range(path, args.range, args.jobs, rules=load_rules(path),
+                      partial=is_partial_clone(path))
+            return
+
+        if args.index or args.stats:
+            from .historydb import HistoryIndex, print_stats
+            with HistoryIndex(path, rules=load_rules(path)) as index:
+                try:
+                    added = index.update(args.jobs, is_partial_clone(path))
+                except subprocess.CalledProcessError as e:
+                    print(f"Error: git log failed — {e.stderr or e}")
+                    sys.exit(1)
+                for note in index.notes:
+                    print(f"Note: {note}")
+                if args.stats:
+                    print_stats(index)
+                else:
+                    print(f"Indexed {added} new commits ({index.commit_count()} total).")
+            return
+
         # Get branch
         current_branch = branch or git_branch(path)
 
-        # Get diff
-        diff = git_diff(path)
-
-        if not diff.strip():
-            print("Nothing to commit — no staged or unstaged changes found.")
-            sys.exit(0)
-
-        # Generate the message — this prints the display and returns the subject
-        result = generate_commit_message(diff, current_branch)
+        if args.base or args.pr:
+            from .pr import run_pr
+            run_pr(path, args.base, current_branch, args.format, args.style)
+            return
+
+        if args.split:
+            run_split(path, current_branch, args.include, args.exclude, args.style)
+            return
+
+        if args.format != 'text':
+            run_machine(path, current_branch, args.format, args.include, args.exclude)
+            return
+
+        # Object store for reading pre/post images during scope detection
+        partial = is_partial_clone(path)
+        store = open_store(path, partial)
+
+        # Generate the message; the preview is streamed by print_message
+        try:
+            file_diffs = working_tree_files(path, args.include, args.exclude, store, partial)
+            if not file_diffs:
+                print("Nothing to commit — no staged or unstaged changes found.")
+                sys.exit(0)
+            result = commit_message_for_files(file_diffs, current_branch, store, render=False,
+                                              rules=load_rules(path))
+        finally:
+            if store is not None:
+                store.close()
 
         if result:
-            subject = result.get("subject", "").strip()
-            display = result.get("display", "")
-            files = result.get("_files", [])
-
-            # Show preview UI
-            print(display)
-
-            # -------- INDUSTRY STYLE BODY --------
-            # Compute tag_counts to determine primary_tag
-            from collections import defaultdict
-            tag_counts = defaultdict(int)
-            for r in files:
-                tag_counts[r["tag"]] += 1
-            primary_tag = _pick_tag(tag_counts)  # Assuming _pick_tag is defined in generate_commit_message.py, import if needed
-
-            # Map to Conventional Commits type
-            tag_map = {
-                "[ADD]": "feat",
-                "[FIX]": "fix",
-                "[UPDATE]": "chore",
-                "[REFACTOR]": "refactor",
-                "[STYLE]": "style",
-                "[DOCS]": "docs",
-                "[CONFIG]": "chore",
-                "[TEST]": "test",
-                "[RENAME]": "refactor",
-                "[REMOVE]": "chore",
-                "[CHORE]": "chore",
-            }
-            conv_type = tag_map.get(primary_tag, "chore")
-
-            # Clean subject for description
-            branch_part = f"[{current_branch}]" if current_branch else ""
-            lead_summary = subject.replace(primary_tag, "").replace(branch_part, "").strip()
-            clean_desc = re.sub(r"\[\w+\]", "", lead_summary).strip()
-            verb = clean_desc.split(" ", 1)[0].lower() if clean_desc else ""
-            rest = clean_desc.split(" ", 1)[1] if " " in clean_desc else ""
-            description = f"{verb} {rest}".replace(" (+7 more)", "").strip()
-
-            # Special case for initial large add
-            verbs = set(r["summary"].split(" ", 1)[0] for r in files if " " in r["summary"])
-            if len(files) > 3 and len(verbs) == 1 and "Add" in verbs:
-                description = "initial project files and structure"
-
-            # Add scope if branch not main
-            scope = f"({current_branch})" if current_branch and current_branch != "main" else ""
-            industry_subject = f"{conv_type}{scope}: {description}"
-
-            # Build body
-            body_lines = []
-            for r in files:
-                summary = r["summary"]
-                clean_summary = re.sub(r"\[\w+\]", "", summary).strip()
-                body_lines.append("- " + clean_summary)
-
-            # Adjust for common verb
-            if len(verbs) == 1:
-                common_verb = list(verbs)[0]
-                body_lines = ["- " + r["summary"].replace(common_verb + " ", "", 1).strip() for r in files]
-                intro = common_verb + " the following:"
-            else:
-                intro = "Apply the following changes:"
-
-            # Special intro paragraph for large adds
-            body = intro + "\n" + "\n".join(body_lines)
-            if len(files) > 3 and len(verbs) == 1 and "Add" in verbs:
-                project_intro = "Introduce core components for the gitsmartcommit tool, including configuration, documentation, and Python modules for commit generation."
-                body = project_intro + "\n\n" + body
-
-            # -------- FINAL COMMAND --------
-            import shlex
-
-            if industry_subject:
-                print("\n  To commit, run:")
-
-                if body:
-                    print(
-                        f'  git commit -m {shlex.quote(industry_subject)} -m {shlex.quote(body)}\n'
-                    )
-                else:
-                    print(
-                        f'  git commit -m {shlex.quote(industry_subject)}\n'
-                    )
+            print_message(result, current_branch, PackageIndex.load(path), args.style)
 
     except Exception as e:
         print(f"\n  [ERROR] An unexpected error occurred: {e}")
@@ -0,0 +1,213 @@
+"""
+Bulk history mode: analyze every commit in a range from one `git log -p`.
+
+The log is read as a stream and split into per-commit diffs on the fly, so
+memory stays bounded by the commits in flight rather than the whole range.
+Commits are analyzed in-process or on a process pool and written out as
+NDJSON, one record per commit, in log order.
+
+Merges come as dense combined diffs (`--cc`), which leave out every file
+the merge took unchanged from one side.  A merge with nothing of its own
+left after parsing is recorded from its log line alone.
+
+In a partial clone the log is `git log --raw`, which reads no blob, and
+each commit's files are diffed only where their blobs are local; the rest
+are described from their status (partial.py).  Such a record counts them
+under "status_only".
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .analyzer import Analyzer
+from .generate_commit_message import find_defined_names, parse_diff_lines
+from .partial import EMPTY_TREE, describe_changes, no_lazy_fetch_env, partial_note, raw_log_changes
+from .patchfile import iter_stream_lines
+
+
+# Record separator + unit separators: can't appear in a diff line's first byte
+SENTINEL = "\x1e"
+LOG_FORMAT = "--format=" + SENTINEL + "%H%x1f%an <%ae>%x1f%aI%x1f%s%x1f%P"
+
+# One per process (pool workers get their own); records never use the display
+_analyzer = Analyzer(render=False)
+
+
+def use_rules(rules=None):
+    """Analyze with the repository's rules.Rules (also a pool initializer)."""
+    global _analyzer
+    if _analyzer.rules is not rules:
+        _analyzer = Analyzer(render=False, rules=rules)
+
+
+def log_command(path: str, rev_range: str, partial: bool = False) -> list:
+    """`git log` for split_commits(); with `partial` a --raw log for partial_commits()."""
+    from .git import DIFF_PROFILE
+    if partial:
+        return ["git", "-C", path, "-c", "core.quotePath=false", "log", "--raw", "--no-renames",
+                "--no-abbrev", LOG_FORMAT, rev_range, "--"]
+    return ["git", "-C", path, "log", "-p", "--cc", LOG_FORMAT] + DIFF_PROFILE + [rev_range, "--"]
+
+
+def split_commits(lines):
+    """
+    Group a `git log -p` line stream into commits as it is read.
+    Yields {commit, author, date, subject, parents, lines}.
+    """
+    cur = None
+    for line in lines:
+        if line.startswith(SENTINEL):
+            if cur:
+                yield cur
+            oid, author, date, subject, parents = (line[1:].split("\x1f") + ["", "", "", ""])[:5]
+            cur = {"commit": oid, "author": author, "date": date,
+                   "subject": subject, "parents": parents.split(), "lines": []}
+        elif cur is not None:
+            cur["lines"].append(line)
+    if cur:
+        yield cur
+
+
+def partial_commits(path: str, commits, store):
+    """
+    split_commits() of a partial log_command() with each commit's "files"
+    attached by partial.describe_changes(): nothing is fetched.  Merges
+    list no changes in a --raw log and come out as merge_record()s.
+    """
+    from .git import DIFF_PROFILE
+    for c in commits:
+        parent = c["parents"][0] if c["parents"] else EMPTY_TREE
+        files, _ = describe_changes(path, [parent, c["commit"]], raw_log_changes(c["lines"]),
+                                    store, DIFF_PROFILE)
+        c["files"], c["lines"] = list(files), []
+        yield c
+
+
+def _new_names(fd: dict) -> list:
+    old = set(find_defined_names(fd["removed"]))
+    return [n for n in find_defined_names(fd["added"]) if n not in old]
+
+
+def merge_record(commit: dict) -> dict:
+    """Record for a merge that resolved nothing itself: no content analysis."""
+    return {
+        "commit": commit["commit"],
+        "author": commit["author"],
+        "date": commit["date"],
+        "original": commit["subject"],
+        "subject": "[CHORE] " + (commit["subject"] or "Merge"),
+        "merge": True,
+        "files": [],
+        "added": 0,
+        "removed": 0,
+    }
+
+
+def analyze_commit(commit: dict) -> dict:
+    """One NDJSON record for a commit from split_commits()."""
+    files = commit["files"] if "files" in commit else parse_diff_lines(commit["lines"])
+    merge = len(commit.get("parents", ())) > 1
+    if merge and not files:
+        return merge_record(commit)
+    result = _analyzer.analyze_files(files)
+    record = {
+        "commit": commit["commit"],
+        "author": commit["author"],
+        "date": commit["date"],
+        "original": commit["subject"],
+        "subject": result["subject"],
+        "merge": merge,
+        "files": [
+            {"path": r["path"], "tag": r["tag"], "summary": r["summary"],
+             "details": r["details"], "lang": r["lang"], "scope": r["scope"],
+             "names": _new_names(fd), "added": len(fd["added"]), "removed": len(fd["removed"])}
+            for fd, r in zip(files, result.get("_files", []))
+        ],
+        "added": sum(len(fd["added"]) for fd in files),
+        "removed": sum(len(fd["removed"]) for fd in files),
+    }
+    status_only = sum(1 for fd in files if fd.get("status_only"))
+    if status_only:
+        record["status_only"] = status_only
+    return record
+
+
+def analyze_stream(commits, jobs: int = 0, rules=None):
+    """
+    Yield analyze_commit() records in input order.  With jobs > 1 commits are
+    analyzed on a process pool, keeping a bounded window of work in flight.
+    `rules` (rules.Rules) apply in every worker.
+    """
+    if jobs <= 1:
+        use_rules(rules)
+        for c in commits:
+            yield analyze_commit(c)
+        return
+
+    window = jobs * 4
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=jobs, initializer=use_rules, initargs=(rules,)) as pool:
+        for c in commits:
+            pending.append(pool.submit(analyze_commit, c))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def run_range(path: str, rev_range: str, jobs: int = 0, out=None, rules=None,
+              partial: bool = False) -> int:
+    """
+    Write one NDJSON record per commit in `rev_range`; returns the count.
+    In a partial clone (`partial`) nothing is fetched: files whose blobs
+    are not local are described from their status, and a note says so.
+    """
+    from .git import open_store
+
+    out = out or sys.stdout
+    start = time.perf_counter()
+    store = open_store(path, True) if partial else None
+    # A file, not a pipe: git must never block on stderr while we read stdout
+    errors = tempfile.TemporaryFile()
+    proc = subprocess.Popen(log_command(path, rev_range, partial), stdout=subprocess.PIPE,
+                            stderr=errors, env=no_lazy_fetch_env() if partial else None)
+    count = status_only = 0
+    try:
+        commits = split_commits(iter_stream_lines(proc.stdout))
+        if partial:
+            commits = partial_commits(path, commits, store)
+        for record in analyze_stream(commits, jobs, rules):
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+            status_only += record.get("status_only", 0)
+        out.flush()
+    except BrokenPipeError:
+        # Reader went away (e.g. `| head`) — stop git and exit quietly
+        proc.kill()
+        sys.stdout = open(os.devnull, "w")
+        return count
+    finally:
+        proc.stdout.close()
+        proc.wait()
+        errors.seek(0)
+        err = errors.read().decode("utf-8", errors="replace").strip()
+        errors.close()
+        if store is not None:
+            store.close()
+
+    if proc.returncode:
+        print(f"Error: git log failed — {err}", file=sys.stderr)
+        sys.exit(1)
+
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed if elapsed > 0 else 0.0
+    print(f"Analyzed {count} commits in {elapsed:.2f}s ({rate:.1f} commits/s)", file=sys.stderr)
+    if partial:
+        print(f"Note: {partial_note(status_only)}", file=sys.stderr)
+    return count
@@ -0,0 +1,193 @@
+"""
+Persistent per-commit, per-file analysis of a repository's history.
+
+Results (tags, scopes, newly defined names, line counts) are kept in a
+sqlite database inside the git directory.  Each update walks only the
+commits that are new since the last indexed tip; if history was rewritten
+the stale commits are dropped back to the merge-base and re-walked from
+there.  Stats, split suggestions and release notes query this instead of
+re-running describe_file over history.
+"""
+
+import json
+import subprocess
+
+from . import __version__
+from .history import analyze_stream, log_command, partial_commits, split_commits
+from .partial import no_lazy_fetch_env, partial_note
+from .tipdb import TipDB, git_output, db_path as _db_path
+
+
+DB_NAME = "smartcommit.db"
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS commits (
+    oid      TEXT PRIMARY KEY,
+    author   TEXT,
+    date     TEXT,
+    original TEXT,
+    subject  TEXT,
+    added    INTEGER,
+    removed  INTEGER
+);
+CREATE TABLE IF NOT EXISTS files (
+    commit_oid TEXT NOT NULL REFERENCES commits(oid) ON DELETE CASCADE,
+    path       TEXT NOT NULL,
+    tag        TEXT,
+    scope      TEXT,
+    names      TEXT,
+    lang       TEXT,
+    added      INTEGER,
+    removed    INTEGER
+);
+CREATE INDEX IF NOT EXISTS files_commit ON files(commit_oid);
+CREATE INDEX IF NOT EXISTS files_path ON files(path);
+"""
+
+
+def db_path(repo_path: str) -> str:
+    """Location of the database: `smartcommit.db` in the (common) git dir."""
+    return _db_path(repo_path, DB_NAME)
+
+
+class HistoryIndex(TipDB):
+    DB_NAME = DB_NAME
+    SCHEMA = SCHEMA
+    SCHEMA_VERSION = SCHEMA_VERSION
+    TABLES = ("files", "commits")
+
+    def __init__(self, repo_path: str, db_file: str = None, rules=None):
+        self.rules = rules
+        self.notes = []  # from the last update(), e.g. partial-clone fallbacks
+        super().__init__(repo_path, db_file)
+
+    def _version(self) -> str:
+        # Analysis output changes between releases and with the repository's
+        # rules — re-index after either changes
+        fingerprint = self.rules.fingerprint() if self.rules else ""
+        return f"{super()._version()}:{__version__}:{fingerprint}"
+
+    # ── incremental update ───────────────────────────────────────────────
+
+    def _plan(self, head: str) -> str:
+        """Decide which range to walk, dropping commits a rewrite orphaned."""
+        tip = self.tip
+        if not tip:
+            return head
+        if self._is_ancestor(tip, head):
+            return f"{tip}..{head}"
+        try:
+            base = git_output(self.repo_path, "merge-base", tip, head)
+            stale = git_output(self.repo_path, "rev-list", f"{base}..{tip}").split()
+        except subprocess.CalledProcessError:
+            # Old tip is gone or unrelated — start over
+            self.clear()
+            return head
+        with self.db:
+            self.db.executemany("DELETE FROM commits WHERE oid = ?", [(o,) for o in stale])
+        return f"{base}..{head}"
+
+    def update(self, jobs: int = 0, partial: bool = False) -> int:
+        """
+        Index commits up to HEAD; returns how many were added.  Raises
+        CalledProcessError, keeping the previous tip, when git log fails.
+        In a partial clone (`partial`) nothing is fetched: files whose blobs
+        are not local are indexed from their status, and `notes` says so.
+        """
+        from .git import open_store
+
+        self.notes = []
+        head = self.head()
+        if not head or head == self.tip:
+            return 0  # no commits yet, or nothing new
+
+        status_only = 0
+
+        def consume(lines) -> int:
+            nonlocal status_only
+            count = 0
+            commits = split_commits(lines)
+            if partial:
+                commits = partial_commits(self.repo_path, commits, store)
+            for record in analyze_stream(commits, jobs, self.rules):
+                self._insert(record)
+                count += 1
+                status_only += record.get("status_only", 0)
+            return count
+
+        store = open_store(self.repo_path, True) if partial else None
+        try:
+            count = self._walk(log_command(self.repo_path, self._plan(head), partial), head, consume,
+                               no_lazy_fetch_env() if partial else None)
+        finally:
+            if store is not None:
+                store.close()
+        if partial:
+            self.notes = [partial_note(status_only)]
+        return count
+
+    def _insert(self, rec: dict):
+        self.db.execute(
+            "INSERT OR REPLACE INTO commits VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (rec["commit"], rec["author"], rec["date"], rec["original"],
+             rec["subject"], rec["added"], rec["removed"]),
+        )
+        self.db.execute("DELETE FROM files WHERE commit_oid = ?", (rec["commit"],))
+        self.db.executemany(
+            "INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(rec["commit"], f["path"], f["tag"], f["scope"], json.dumps(f["names"]),
+              f["lang"], f["added"], f["removed"]) for f in rec["files"]],
+        )
+
+    # ── queries ──────────────────────────────────────────────────────────
+
+    def commit_count(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM commits").fetchone()[0]
+
+    def tag_counts(self) -> dict:
+        rows = self.db.execute("SELECT tag, COUNT(*) FROM files GROUP BY tag ORDER BY 2 DESC")
+        return dict(rows.fetchall())
+
+    def hot_files(self, limit: int = 10) -> list:
+        """[(path, commits, added, removed)] for the most frequently changed files."""
+        return self.db.execute(
+            "SELECT path, COUNT(DISTINCT commit_oid), SUM(added), SUM(removed) "
+            "FROM files GROUP BY path ORDER BY 2 DESC, 1 LIMIT ?", (limit,)
+        ).fetchall()
+
+    def hot_scopes(self, limit: int = 10) -> list:
+        """[(path, scope, commits)] for the most frequently changed definitions."""
+        return self.db.execute(
+            "SELECT path, scope, COUNT(*) FROM files WHERE scope != '' "
+            "GROUP BY path, scope ORDER BY 3 DESC, 1, 2 LIMIT ?", (limit,)
+        ).fetchall()
+
+    def file_history(self, path: str) -> list:
+        """[{commit, date, tag, scope, names, added, removed}] newest first."""
+        rows = self.db.execute(
+            "SELECT f.commit_oid, c.date, f.tag, f.scope, f.names, f.added, f.removed "
+            "FROM files f JOIN commits c ON c.oid = f.commit_oid "
+            "WHERE f.path = ? ORDER BY c.date DESC", (path,)
+        )
+        return [
+            {"commit": r[0], "date": r[1], "tag": r[2], "scope": r[3],
+             "names": json.loads(r[4] or "[]"), "added": r[5], "removed": r[6]}
+            for r in rows
+        ]
+
+
+def print_stats(index: HistoryIndex, limit: int = 10):
+    print(f"\n  {index.commit_count()} commits indexed (tip {index.tip[:12]})\n")
+    print("  Tags")
+    for tag, n in index.tag_counts().items():
+        print(f"    {tag:<12} {n}")
+    print("\n  Most changed files")
+    for path, commits, added, removed in index.hot_files(limit):
+        print(f"    {commits:>5}  +{added:<7} -{removed:<7} {path}")
+    scopes = index.hot_scopes(limit)
+    if scopes:
+        print("\n  Most changed definitions")
+        for path, scope, n in scopes:
+            print(f"    {n:>5}  {scope}  ({path})")
+    print()
@@ -0,0 +1,127 @@
+"""
+Language analyzers, imported only for the file types present in a diff.
+
+An analyzer is a module (or any object) providing some of
+
+    DEF_PATTERNS                  regexes whose group 1 is a defined name;
+                                  tried before the built-in DEF_PATTERNS
+                                  wherever definitions are looked for: new
+                                  names, scope from hunk text and the
+                                  per-blob outline (outline.py)
+    extract_details(fd, ctype)    detail lines, or None to fall back to the
+                                  built-in extractor; called with a third
+                                  argument, the objects.ObjectStore (or
+                                  None), when READS_BLOBS is true
+    guess_purpose(lines, path)    label for a new file, or "" to fall back
+
+Analyzers are registered as entry points in the "gitsmartcommit.languages"
+group.  The entry point's name is the key it serves: a file extension
+(".sql") or one of classify()'s categories ("style").  Only the names are
+read up front; an analyzer module is imported the first time a file with
+its key is described, so a Python-only diff never imports the SQL analyzer.
+
+    [project.entry-points."gitsmartcommit.languages"]
+    ".proto" = "my_package.proto_analyzer"
+
+BUILTIN mirrors this package's own entry points so a source checkout works
+without installed metadata.
+
+Only SQL, CSS, markup and JSON / YAML / TOML live behind the registry so
+far.  The general-purpose languages (Python, JavaScript, Go, ...) keep
+their definition patterns in generate_commit_message.DEF_PATTERNS, their
+names in EXT_LANG and their details in the built-in extractor, all loaded
+with the core module; an analyzer registered for one of their extensions
+is consulted first and falls back to those.
+"""
+
+import importlib
+import warnings
+
+GROUP = "gitsmartcommit.languages"
+
+BUILTIN = {
+    ".sql": "gitsmartcommit.languages.sql",
+    ".ddl": "gitsmartcommit.languages.sql",
+    ".dml": "gitsmartcommit.languages.sql",
+    "sql": "gitsmartcommit.languages.sql",
+    ".css": "gitsmartcommit.languages.css",
+    ".scss": "gitsmartcommit.languages.css",
+    ".sass": "gitsmartcommit.languages.css",
+    ".less": "gitsmartcommit.languages.css",
+    ".styl": "gitsmartcommit.languages.css",
+    "style": "gitsmartcommit.languages.css",
+    ".html": "gitsmartcommit.languages.markup",
+    ".htm": "gitsmartcommit.languages.markup",
+    ".xhtml": "gitsmartcommit.languages.markup",
+    ".xml": "gitsmartcommit.languages.markup",
+    ".xsl": "gitsmartcommit.languages.markup",
+    ".xslt": "gitsmartcommit.languages.markup",
+    ".svg": "gitsmartcommit.languages.markup",
+    "markup": "gitsmartcommit.languages.markup",
+    ".json": "gitsmartcommit.languages.config",
+    ".jsonc": "gitsmartcommit.languages.config",
+    ".yaml": "gitsmartcommit.languages.config",
+    ".yml": "gitsmartcommit.languages.config",
+    ".toml": "gitsmartcommit.languages.config",
+}
+
+# key → "module[:attr]" or an analyzer object; filled on first lookup
+_targets = None
+# key → loaded analyzer, or None when there is none
+_loaded = {}
+
+
+def _entry_points() -> dict:
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:  # Python < 3.8
+        try:
+            from importlib_metadata import entry_points
+        except ImportError:
+            return {}
+    eps = entry_points()
+    group = eps.select(group=GROUP) if hasattr(eps, "select") else eps.get(GROUP, ())
+    return {ep.name: ep for ep in group}
+
+
+def _discover() -> dict:
+    global _targets
+    targets = dict(BUILTIN)
+    targets.update(_entry_points())  # installed analyzers may replace built-ins
+    _targets = targets
+    return targets
+
+
+def _load(key: str, target):
+    try:
+        if hasattr(target, "load"):  # importlib.metadata.EntryPoint
+            return target.load()
+        if isinstance(target, str):
+            mod, _, attr = target.partition(":")
+            obj = importlib.import_module(mod)
+            for part in attr.split(".") if attr else ():
+                obj = getattr(obj, part)
+            return obj
+        return target
+    except Exception as e:
+        warnings.warn(f"gitsmartcommit: language analyzer for {key!r} failed to load: {e}")
+        return None
+
+
+def register(key: str, target):
+    """Serve `key` (".ext" or a category) with `target`: "module[:attr]" or an object."""
+    (_targets if _targets is not None else _discover())[key] = target
+    _loaded.pop(key, None)
+
+
+def analyzer_for(key: str):
+    """The analyzer registered for `key`, imported on first use; None if there is none."""
+    try:
+        return _loaded[key]
+    except KeyError:
+        pass
+    targets = _targets if _targets is not None else _discover()
+    target = targets.get(key) if key else None
+    analyzer = _load(key, target) if target is not None else None
+    _loaded[key] = analyzer
+    return analyzer
@@ -0,0 +1,211 @@
+"""
+JSON / YAML / TOML: dotted key paths of the changed lines.
+
+No document is parsed.  Each hunk's removed and added lines are walked
+once with a stack of (indent, path) for JSON and YAML, or the current
+[section] for TOML, so a line's key path is rebuilt from the lines above
+it:
+
+    spec:                       spec
+      replicas: 3               spec.replicas
+    [tool.pytest.ini_options]   tool.pytest.ini_options
+    addopts = "-q"              tool.pytest.ini_options.addopts
+
+Parents above the hunk come from the pre-image (or the post-image when
+there is none) in the object store: from the hunk's position the walk
+goes up only through lines indented less than the last one kept, until
+an unindented key or a [section] header, and at most MAX_LOOKBACK lines.
+Without a blob a hunk's `@@` context stands in for the image: git puts the
+nearest unindented line above the hunk there, so a YAML path starts at its
+top-level key, though any levels in between are left out.  With no context
+either, paths start at the first key the hunk shows.  Paths are
+counted per changed line and, when there are more than MAX_KEYS, the
+deepest are folded into their parents until they fit.
+"""
+
+import re
+
+from ..generate_commit_message import DEP_FILES, classify_path, load_image
+
+# Key paths named in the details line
+MAX_KEYS = 3
+# Image lines looked at above a hunk for its parent keys / section
+MAX_LOOKBACK = 2000
+# extract_details() also gets the object store (languages/__init__.py)
+READS_BLOBS = True
+
+FORMATS = {".json": "json", ".jsonc": "json", ".yaml": "yaml", ".yml": "yaml", ".toml": "toml"}
+
+JSON_KEY_RE = re.compile(r'^(\s*)"((?:[^"\\]|\\.)*)"\s*:')
+JSON_CLOSE_RE = re.compile(r"^\s*[}\]]")
+YAML_KEY_RE = re.compile(r"""^([ \t]*(?:-[ \t]+)*)(["']?)([^\s#'"{\[][^#:]*?)\2[ \t]*:(?:[ \t]|$)""")
+YAML_SKIP_RE = re.compile(r"^\s*(?:#|$)|^(?:---|\.\.\.)\s*$")
+TOML_DOTTED = r"""(?:"[^"]*"|'[^']*'|[\w-]+)(?:\s*\.\s*(?:"[^"]*"|'[^']*'|[\w-]+))*"""
+TOML_HEADER_RE = re.compile(r"^\s*\[\[?\s*(" + TOML_DOTTED + r")\s*\]\]?\s*(?:#.*)?$")
+TOML_KEY_RE = re.compile(r"^\s*(" + TOML_DOTTED + r")\s*=")
+TOML_PART_RE = re.compile(r""""([^"]*)"|'([^']*)'|([\w-]+)""")
+
+
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip(" \t"))
+
+
+def _toml_parts(dotted: str) -> tuple:
+    return tuple(a or b or c for a, b, c in TOML_PART_RE.findall(dotted))
+
+
+def _key(m, fmt: str) -> str:
+    return m.group(2) if fmt == "json" else m.group(3).strip()
+
+
+def _hunk_chunks(fd: dict, store=None):
+    """(removed lines, added lines, lines above the hunk, end) per hunk, or the whole diff as one chunk."""
+    hunks = fd.get("hunks") or []
+    added, removed = fd["added"], fd["removed"]
+    if (not hunks or sum(h[1] for h in hunks) != len(removed)
+            or sum(h[3] for h in hunks) != len(added)):
+        yield removed, added, [], 0
+        return
+    # The text above a hunk is the same in both images; the pre-image is
+    # there even for unstaged changes
+    side = "old" if fd.get("old_oid") else "new"
+    image = load_image(fd, side, store)
+    # hunk_ctx leaves out hunks without a context, so it only lines up when all have one
+    contexts = fd["hunk_ctx"] if not image and len(fd["hunk_ctx"]) == len(hunks) else ()
+    r = a = 0
+    for i, (old_start, old_count, new_start, new_count) in enumerate(hunks):
+        start, count = (old_start, old_count) if side == "old" else (new_start, new_count)
+        if contexts:
+            above, end = [contexts[i]], 1
+        else:
+            # A hunk with no lines on this side sits after line `start`
+            above, end = image, start - 1 if count else start
+        yield removed[r:r + old_count], added[a:a + new_count], above, end
+        r += old_count
+        a += new_count
+
+
+def _indented_context(image: list, end: int, fmt: str) -> list:
+    """Seed stack for a hunk: the parents of image line `end` + 1, walking up at most MAX_LOOKBACK lines."""
+    key_re = JSON_KEY_RE if fmt == "json" else YAML_KEY_RE
+    chain = []  # (indent, key or None), nearest first
+    limit = None
+    for i in range(min(end, len(image)) - 1, max(-1, end - 1 - MAX_LOOKBACK), -1):
+        line = image[i]
+        if not line.strip() or (fmt == "yaml" and YAML_SKIP_RE.match(line)):
+            continue
+        m = key_re.match(line)
+        indent = len(m.group(1)) if m else _indent(line)
+        if limit is not None and indent >= limit:
+            continue
+        chain.append((indent, _key(m, fmt) if m else None))
+        limit = indent
+        if indent == 0:
+            break
+    stack, path = [], ()
+    for indent, key in reversed(chain):
+        if key is not None:
+            path = path + (key,)
+            stack.append((indent, path))
+    return stack
+
+
+def _toml_context(image: list, end: int) -> tuple:
+    """Section of image line `end` + 1: the nearest header above it."""
+    for i in range(min(end, len(image)) - 1, max(-1, end - 1 - MAX_LOOKBACK), -1):
+        m = TOML_HEADER_RE.match(image[i])
+        if m:
+            return _toml_parts(m.group(1))
+    return ()
+
+
+def _indented_paths(lines: list, fmt: str, stack: list):
+    """Key path of each JSON / YAML line, from indentation within the chunk."""
+    key_re = JSON_KEY_RE if fmt == "json" else YAML_KEY_RE
+    stack = list(stack)  # (indent, path) of the open parents
+    for line in lines:
+        if fmt == "yaml" and YAML_SKIP_RE.match(line):
+            continue
+        if fmt == "json" and JSON_CLOSE_RE.match(line):
+            indent = _indent(line)
+            while stack and stack[-1][0] >= indent:
+                stack.pop()
+            continue
+        m = key_re.match(line)
+        indent = len(m.group(1)) if m else _indent(line)
+        while stack and stack[-1][0] >= indent:
+            stack.pop()
+        parent = stack[-1][1] if stack else ()
+        if not m:
+            if parent:
+                yield parent
+            continue
+        path = parent + (_key(m, fmt),)
+        stack.append((indent, path))
+        yield path
+
+
+def _toml_paths(lines: list, section: tuple):
+    last = None  # key of a multi-line value still open
+    for line in lines:
+        m = TOML_HEADER_RE.match(line)
+        if m:
+            section = _toml_parts(m.group(1))
+            last = None
+            yield section
+            continue
+        m = TOML_KEY_RE.match(line)
+        if m:
+            last = section + _toml_parts(m.group(1))
+            yield last
+        elif line.strip() and not line.lstrip().startswith("#"):
+            if last or section:
+                yield last or section
+
+
+def key_paths(fd: dict, store=None) -> dict:
+    """{path tuple: changed lines} in first-seen order; one pass over the changed lines."""
+    fmt = FORMATS.get(classify_path(fd["path"]).ext)
+    counts = {}
+    if fmt is None:
+        return counts
+    for removed, added, image, end in _hunk_chunks(fd, store):
+        if fmt == "toml":
+            section = _toml_context(image, end)
+        else:
+            stack = _indented_context(image, end, fmt)
+        for lines in (removed, added):
+            paths = _toml_paths(lines, section) if fmt == "toml" else _indented_paths(lines, fmt, stack)
+            for path in paths:
+                counts[path] = counts.get(path, 0) + 1
+    return counts
+
+
+def top_key_paths(fd: dict, store=None, limit: int = MAX_KEYS) -> tuple:
+    """([dotted path, ...] most changed first, how many more there were)."""
+    counts = key_paths(fd, store)
+    # Parents that also have changed children are named by the children
+    parents = {p[:i] for p in counts for i in range(1, len(p))}
+    counts = {p: n for p, n in counts.items() if p not in parents}
+    while len(counts) > limit:
+        depth = max(len(p) for p in counts)
+        if depth == 1:
+            break
+        folded = {}
+        for p, n in counts.items():
+            p = p[:-1] if len(p) == depth else p
+            folded[p] = folded.get(p, 0) + n
+        parents = {p[:i] for p in folded for i in range(1, len(p))}
+        counts = {p: n for p, n in folded.items() if p not in parents}
+    ranked = sorted(counts, key=counts.get, reverse=True)
+    return [".".join(p) for p in ranked[:limit]], max(0, len(ranked) - limit)
+
+
+def extract_details(fd: dict, ctype: str, store=None):
+    info = classify_path(fd["path"])
+    if ctype == "test" or info.name.lower() in DEP_FILES:
+        return None  # test names / dependency lists say more
+    keys, more = top_key_paths(fd, store)
+    if not keys:
+        return None
+    return ["keys: " + ", ".join(keys) + (f" +{more} more" if more else "")]
@@ -0,0 +1,29 @@
+"""CSS / SCSS / Less: changed selectors and properties."""
+
+import re
+
+# CSS / SCSS selectors
+CSS_SEL_RE = re.compile(r"^\s*([.#][\w-]+(?:[\s,>+~:[\]]*[\w.#-]+)*)\s*\{")
+
+# CSS properties
+CSS_PROP_RE = re.compile(r"^\s*([\w-]+)\s*:\s*[^/]")
+
+
+def extract_details(fd: dict, ctype: str):
+    if ctype != "style":
+        return None
+    details = []
+    sels = []
+    props = []
+    for l in fd["added"] + fd["removed"]:
+        ms = CSS_SEL_RE.match(l)
+        if ms:
+            sels.append(ms.group(1).strip())
+        mp = CSS_PROP_RE.match(l)
+        if mp and mp.group(1).lower() not in ("http", "https", "src"):
+            props.append(mp.group(1).lower())
+    if sels:
+        details.append("selectors: " + ", ".join(list(dict.fromkeys(sels))[:3]))
+    if props:
+        details.append("properties: " + ", ".join(list(dict.fromkeys(props))[:4]))
+    return details
@@ -0,0 +1,33 @@
+"""HTML / XML templates: fields added, removed and modified (Odoo-style views)."""
+
+import re
+
+# XML / Odoo field tags
+XML_FIELD_RE = re.compile(r'<field\s+name=["\'](\w+)["\']', re.IGNORECASE)
+
+# XML / Odoo widget / attribute changes
+XML_ATTR_RE = re.compile(r'\b(widget|invisible|readonly|required|domain|attrs|decoration-\w+)\s*=', re.IGNORECASE)
+
+
+def extract_details(fd: dict, ctype: str):
+    if ctype != "markup":
+        return None
+    details = []
+    at = "\n".join(fd["added"])
+    rt = "\n".join(fd["removed"])
+    new_f = set(XML_FIELD_RE.findall(at))
+    gone_f = set(XML_FIELD_RE.findall(rt))
+    only_n = sorted(new_f - gone_f)
+    only_g = sorted(gone_f - new_f)
+    mod_f = sorted(new_f & gone_f)
+    if only_n:
+        details.append("+ fields: " + ", ".join(only_n[:4]))
+    if only_g:
+        details.append("- fields: " + ", ".join(only_g[:4]))
+    if mod_f:
+        attrs = list(dict.fromkeys(XML_ATTR_RE.findall(at)))
+        if attrs:
+            details.append(f"modified {', '.join(mod_f[:2])}: {', '.join(attrs[:3])}")
+        else:
+            details.append("updated: " + ", ".join(mod_f[:3]))
+    return details
@@ -0,0 +1,32 @@
+"""SQL: statement kinds and the tables they touch."""
+
+import re
+
+from ..generate_commit_message import SQL_OP_RE
+
+SQL_TABLE_RE = re.compile(
+    r"(?:FROM|INTO|UPDATE|JOIN|TABLE)\s+[`\"]?(\w+)[`\"]?",
+    re.IGNORECASE,
+)
+
+KEYWORDS = ("from", "into", "join", "table", "update", "where")
+
+
+def extract_details(fd: dict, ctype: str):
+    if ctype != "sql":
+        return None
+    details = []
+    ops = []
+    tables = set()
+    for l in fd["added"] + fd["removed"]:
+        m = SQL_OP_RE.match(l)
+        if m:
+            ops.append(m.group(1).upper().split()[0])
+        for tm in SQL_TABLE_RE.findall(l):
+            if tm.lower() not in KEYWORDS:
+                tables.add(tm)
+    if ops:
+        details.append("ops: " + ", ".join(list(dict.fromkeys(ops))[:3]))
+    if tables:
+        details.append("tables: " + ", ".join(list(sorted(tables))[:4]))
+    return details
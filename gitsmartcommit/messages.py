@@ -0,0 +1,124 @@
+"""
+Every commit-message format, composed from one analysis result.
+
+compose_message() records what the subject was built from (`_lead`) next
+to the per-file results (`_files`); compose_formats() turns that into
+
+    bracket       [FIX][dev] Fix null/None handling in charge() (+2 more)
+    conventional  fix(billing-api): fix null/None handling in charge()
+    body          "Apply the following changes:\\n- ...", split by package
+    changelog     "### Fixed\\n- Fix null/None handling in charge()\\n..."
+
+without re-parsing any of those strings.
+"""
+
+STYLES = ("conventional", "bracket", "changelog")
+
+CONVENTIONAL_TYPE = {
+    "[ADD]": "feat",
+    "[FIX]": "fix",
+    "[UPDATE]": "chore",
+    "[REFACTOR]": "refactor",
+    "[STYLE]": "style",
+    "[DOCS]": "docs",
+    "[CONFIG]": "chore",
+    "[TEST]": "test",
+    "[RENAME]": "refactor",
+    "[REMOVE]": "chore",
+    "[CHORE]": "chore",
+}
+
+# Keep a Changelog sections, in the order they are printed
+CHANGELOG_SECTION = {
+    "[ADD]": "Added",
+    "[FIX]": "Fixed",
+    "[REMOVE]": "Removed",
+}
+CHANGELOG_ORDER = ("Added", "Changed", "Fixed", "Removed")
+
+
+def plain_summary(r: dict) -> str:
+    """A result's summary without its " [Language]" badge."""
+    badge = f" [{r['lang']}]" if r.get("lang") else ""
+    return r["summary"].replace(badge, "") if badge else r["summary"]
+
+
+def _verb(r: dict) -> str:
+    return r.get("verb") or r["summary"].split(" ", 1)[0]
+
+
+def _lower_first(text: str) -> str:
+    return text[:1].lower() + text[1:]
+
+
+def message_scope(results: list, branch: str = "", packages=None) -> tuple:
+    """
+    (scope, owners): the single owner of every file, else the branch unless
+    it is main.  `owners` lists each file's owner: the scope of a matching
+    repository rule, else its workspace package.
+    """
+    owners = [r.get("rule_scope") or (packages.package_of(r["path"]) if packages else "")
+              for r in results]
+    if not any(owners):
+        owners = []
+    if owners and owners[0] and len(set(owners)) == 1:
+        return owners[0], owners
+    return (branch if branch and branch != "main" else ""), owners
+
+
+def body_text(results: list, owners: list = ()) -> str:
+    verbs = {_verb(r) for r in results}
+    if len(verbs) == 1:
+        common = verbs.pop()
+        intro = f"{common} the following:"
+        lines = [plain_summary(r)[len(common):].strip() or plain_summary(r) for r in results]
+    else:
+        intro = "Apply the following changes:"
+        lines = [plain_summary(r) for r in results]
+    bullets = ["- " + line for line in lines]
+
+    # Split the bullets by package when the change spans several
+    if len(set(owners)) > 1:
+        by_package = {}
+        for owner, bullet in zip(owners, bullets):
+            by_package.setdefault(owner or "(root)", []).append(bullet)
+        bullets = []
+        for owner, group in by_package.items():
+            bullets += ([""] if bullets else []) + [f"{owner}:"] + group
+    return intro + "\n" + "\n".join(bullets)
+
+
+def changelog_text(results: list, owners: list = ()) -> str:
+    sections = {}
+    for i, r in enumerate(results):
+        entry = "- " + plain_summary(r)
+        if owners and owners[i]:
+            entry += f" ({owners[i]})"
+        sections.setdefault(CHANGELOG_SECTION.get(r["tag"], "Changed"), []).append(entry)
+    out = []
+    for name in CHANGELOG_ORDER:
+        if name in sections:
+            out += ([""] if out else []) + [f"### {name}"] + sections[name]
+    return "\n".join(out)
+
+
+def compose_formats(result: dict, branch: str = "", packages=None) -> dict:
+    """All message formats for a compose_message() result."""
+    results = result.get("_files", [])
+    lead = result.get("_lead")
+    if not results or not lead:
+        return {"bracket": result.get("subject", ""), "conventional": "", "body": "", "changelog": ""}
+
+    scope, owners = message_scope(results, branch, packages)
+    if lead["index"] is None:
+        description = lead["text"]          # directory roll-up
+    else:
+        description = plain_summary(results[lead["index"]])
+    conventional = (f"{CONVENTIONAL_TYPE.get(lead['tag'], 'chore')}"
+                    f"{f'({scope})' if scope else ''}: {_lower_first(description)}")
+    return {
+        "bracket": result["subject"],
+        "conventional": conventional,
+        "body": body_text(results, owners),
+        "changelog": changelog_text(results, owners),
+    }
@@ -0,0 +1,391 @@
+"""
+In-process reader for the git object store.
+
+Reads loose objects (zlib) and packfiles (v2 .idx, mmap'd) directly so the
+analyzer can fetch pre/post images of changed files without spawning a
+`git cat-file` per blob.  Anything the reader does not understand (SHA-256
+repositories, v1 indexes, abbreviated ids, objects only reachable through
+alternates) is handed to a persistent `git cat-file --batch` pipe.
+
+A store may be shared by threads: the pack list, the delta-base cache and
+the cat-file pipe are each guarded by a lock.
+"""
+
+import mmap
+import os
+import struct
+import subprocess
+import threading
+import zlib
+from collections import OrderedDict
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# CONSTANTS
+# ─────────────────────────────────────────────────────────────────────────────
+
+OBJ_TYPES = {1: "commit", 2: "tree", 3: "blob", 4: "tag"}
+OBJ_OFS_DELTA = 6
+OBJ_REF_DELTA = 7
+
+IDX_MAGIC = b"\377tOc"
+SHA1_HEX_LEN = 40
+SHA1_LEN = 20
+
+# Number of resolved pack objects (delta bases) kept in memory per store
+BASE_CACHE_SIZE = 64
+
+
+class ObjectNotFound(KeyError):
+    pass
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# DELTA DECODING
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _varint(buf, pos: int) -> tuple:
+    """Little-endian base-128 size used in delta headers."""
+    value = shift = 0
+    while True:
+        c = buf[pos]
+        pos += 1
+        value |= (c & 0x7F) << shift
+        shift += 7
+        if not c & 0x80:
+            return value, pos
+
+
+def apply_delta(base: bytes, delta: bytes) -> bytes:
+    """Apply a git delta (copy/insert instruction stream) to `base`."""
+    src_size, pos = _varint(delta, 0)
+    dst_size, pos = _varint(delta, pos)
+    if src_size != len(base):
+        raise ValueError("delta base size mismatch")
+
+    out = bytearray()
+    end = len(delta)
+    while pos < end:
+        op = delta[pos]
+        pos += 1
+        if op & 0x80:
+            offset = size = 0
+            for i in range(4):
+                if op & (1 << i):
+                    offset |= delta[pos] << (8 * i)
+                    pos += 1
+            for i in range(3):
+                if op & (1 << (4 + i)):
+                    size |= delta[pos] << (8 * i)
+                    pos += 1
+            out += base[offset:offset + (size or 0x10000)]
+        elif op:
+            out += delta[pos:pos + op]
+            pos += op
+        else:
+            raise ValueError("invalid delta opcode 0")
+
+    if len(out) != dst_size:
+        raise ValueError("delta result size mismatch")
+    return bytes(out)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# PACKFILES
+# ─────────────────────────────────────────────────────────────────────────────
+
+class PackIndex:
+    """mmap'd v2 pack index: fanout table + binary search over sorted ids."""
+
+    def __init__(self, idx_path: str):
+        self.path = idx_path
+        with open(idx_path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:4] != IDX_MAGIC or struct.unpack(">I", self._mm[4:8])[0] != 2:
+            self._mm.close()
+            raise ValueError(f"unsupported pack index format: {idx_path}")
+        self._fanout = struct.unpack(">256I", self._mm[8:8 + 1024])
+        self.count = self._fanout[255]
+        self._names = 8 + 1024
+        self._offsets = self._names + self.count * (SHA1_LEN + 4)
+        self._large = self._offsets + self.count * 4
+
+    def _name(self, i: int) -> bytes:
+        start = self._names + i * SHA1_LEN
+        return self._mm[start:start + SHA1_LEN]
+
+    def find(self, sha: bytes):
+        """Return the pack offset of `sha` (20 raw bytes) or None."""
+        first = sha[0]
+        lo = self._fanout[first - 1] if first else 0
+        hi = self._fanout[first]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            name = self._name(mid)
+            if name < sha:
+                lo = mid + 1
+            elif name > sha:
+                hi = mid
+            else:
+                return self._offset(mid)
+        return None
+
+    def _offset(self, i: int) -> int:
+        start = self._offsets + i * 4
+        off = struct.unpack(">I", self._mm[start:start + 4])[0]
+        if off & 0x80000000:
+            start = self._large + (off & 0x7FFFFFFF) * 8
+            off = struct.unpack(">Q", self._mm[start:start + 8])[0]
+        return off
+
+    def close(self):
+        self._mm.close()
+
+
+class Pack:
+    def __init__(self, pack_path: str):
+        self.path = pack_path
+        self.index = PackIndex(pack_path[:-5] + ".idx")
+        with open(pack_path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:4] != b"PACK":
+            self.close()
+            raise ValueError(f"not a packfile: {pack_path}")
+
+    def header(self, offset: int) -> tuple:
+        """Return (type_num, size, data_offset) for the entry at `offset`."""
+        mm = self._mm
+        c = mm[offset]
+        offset += 1
+        type_num = (c >> 4) & 7
+        size = c & 0x0F
+        shift = 4
+        while c & 0x80:
+            c = mm[offset]
+            offset += 1
+            size |= (c & 0x7F) << shift
+            shift += 7
+        return type_num, size, offset
+
+    def ofs_delta_base(self, offset: int) -> tuple:
+        """Decode the negative base offset that follows an OFS_DELTA header."""
+        mm = self._mm
+        c = mm[offset]
+        offset += 1
+        rel = c & 0x7F
+        while c & 0x80:
+            c = mm[offset]
+            offset += 1
+            rel = ((rel + 1) << 7) | (c & 0x7F)
+        return rel, offset
+
+    def inflate(self, offset: int, size: int) -> bytes:
+        d = zlib.decompressobj()
+        out = []
+        step = size + 64
+        while not d.eof:
+            chunk = self._mm[offset:offset + step]
+            if not chunk:
+                raise ValueError(f"truncated pack entry in {self.path}")
+            offset += len(chunk)
+            out.append(d.decompress(chunk))
+            step = 8192
+        return b"".join(out)
+
+    def close(self):
+        self.index.close()
+        self._mm.close()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# CAT-FILE FALLBACK
+# ─────────────────────────────────────────────────────────────────────────────
+
+class CatFileBatch:
+    """A single long-lived `git cat-file --batch` process."""
+
+    def __init__(self, repo_path: str):
+        self.repo_path = repo_path
+        self._proc = None
+        # One request/response at a time on the pipe
+        self._lock = threading.Lock()
+
+    def _ensure(self):
+        if self._proc is None or self._proc.poll() is not None:
+            self._proc = subprocess.Popen(
+                ["git", "-C", self.repo_path, "cat-file", "--batch"],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        return self._proc
+
+    def read(self, oid: str) -> tuple:
+        with self._lock:
+            proc = self._ensure()
+            proc.stdin.write(oid.encode("ascii") + b"\n")
+            proc.stdin.flush()
+            header = proc.stdout.readline().rstrip(b"\n").split(b" ")
+            if len(header) != 3:
+                raise ObjectNotFound(oid)
+            size = int(header[2])
+            data = proc.stdout.read(size)
+            proc.stdout.read(1)  # trailing LF
+        return header[1].decode("ascii"), data
+
+    def close(self):
+        with self._lock:
+            if self._proc is not None:
+                self._proc.stdin.close()
+                self._proc.wait()
+                self._proc.stdout.close()
+                self._proc = None
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# OBJECT STORE
+# ─────────────────────────────────────────────────────────────────────────────
+
+class ObjectStore:
+    """
+    Read git objects by id.
+
+        store = ObjectStore.open("/path/to/repo")
+        kind, data = store.read("e69de29bb2d1d6434b8b29ae775ad8c2e48c5391")
+    """
+
+    def __init__(self, objects_dir: str, repo_path: str = None, fallback: bool = True):
+        self.objects_dir = objects_dir
+        self._packs = None
+        self._bases = OrderedDict()
+        self._lock = threading.Lock()  # _packs and _bases
+        self._fallback = CatFileBatch(repo_path) if fallback and repo_path else None
+
+    @classmethod
+    def open(cls, repo_path: str, fallback: bool = True):
+        out = subprocess.check_output(
+            ["git", "-C", repo_path, "rev-parse", "--git-path", "objects"],
+            stderr=subprocess.DEVNULL,
+        ).decode("utf-8", errors="replace").strip()
+        return cls(os.path.join(repo_path, out), repo_path, fallback)
+
+    # ── public API ───────────────────────────────────────────────────────
+
+    def read(self, oid: str) -> tuple:
+        """Return (type, data) for the object `oid`."""
+        if len(oid) == SHA1_HEX_LEN:
+            found = self._read_loose(oid) or self._read_packed(bytes.fromhex(oid))
+            if found:
+                return found
+        if self._fallback is not None:
+            return self._fallback.read(oid)
+        raise ObjectNotFound(oid)
+
+    def has(self, oid: str) -> bool:
+        """
+        Whether `oid` is in the local object store.  Never asks git, so in a
+        partial clone it cannot trigger a fetch from the promisor remote.
+        """
+        if len(oid) != SHA1_HEX_LEN:
+            return False
+        if os.path.exists(os.path.join(self.objects_dir, oid[:2], oid[2:])):
+            return True
+        sha = bytes.fromhex(oid)
+        return any(pack.index.find(sha) is not None for pack in self._load_packs())
+
+    def read_blob(self, oid: str) -> bytes:
+        kind, data = self.read(oid)
+        if kind != "blob":
+            raise ObjectNotFound(oid)
+        return data
+
+    def read_text(self, oid: str) -> str:
+        """Blob contents decoded the same way `git_diff` decodes diffs."""
+        return self.read_blob(oid).decode("utf-8", errors="replace")
+
+    def close(self):
+        with self._lock:
+            for pack in self._packs or []:
+                pack.close()
+            self._packs = None
+            self._bases.clear()
+        if self._fallback is not None:
+            self._fallback.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ── loose objects ────────────────────────────────────────────────────
+
+    def _read_loose(self, oid: str):
+        path = os.path.join(self.objects_dir, oid[:2], oid[2:])
+        try:
+            with open(path, "rb") as f:
+                raw = zlib.decompress(f.read())
+        except FileNotFoundError:
+            return None
+        header, _, data = raw.partition(b"\0")
+        kind = header.split(b" ", 1)[0].decode("ascii")
+        return kind, data
+
+    # ── packed objects ───────────────────────────────────────────────────
+
+    def _load_packs(self) -> list:
+        with self._lock:
+            if self._packs is None:
+                packs = []
+                pack_dir = os.path.join(self.objects_dir, "pack")
+                try:
+                    names = sorted(os.listdir(pack_dir))
+                except FileNotFoundError:
+                    names = []
+                for name in names:
+                    if name.endswith(".pack"):
+                        try:
+                            packs.append(Pack(os.path.join(pack_dir, name)))
+                        except (OSError, ValueError):
+                            continue  # left to the cat-file fallback
+                self._packs = packs
+            return self._packs
+
+    def _read_packed(self, sha: bytes):
+        for pack in self._load_packs():
+            offset = pack.index.find(sha)
+            if offset is not None:
+                return self._unpack(pack, offset)
+        return None
+
+    def _unpack(self, pack: Pack, offset: int) -> tuple:
+        key = (pack.path, offset)
+        with self._lock:
+            cached = self._bases.get(key)
+            if cached is not None:
+                self._bases.move_to_end(key)
+                return cached
+
+        type_num, size, data_off = pack.header(offset)
+        if type_num in OBJ_TYPES:
+            result = (OBJ_TYPES[type_num], pack.inflate(data_off, size))
+        elif type_num == OBJ_OFS_DELTA:
+            rel, data_off = pack.ofs_delta_base(data_off)
+            base_kind, base = self._unpack(pack, offset - rel)
+            result = (base_kind, apply_delta(base, pack.inflate(data_off, size)))
+        elif type_num == OBJ_REF_DELTA:
+            base_sha = bytes(pack._mm[data_off:data_off + SHA1_LEN])
+            found = self._read_packed(base_sha) or self._read_loose(base_sha.hex())
+            if not found:
+                raise ObjectNotFound(base_sha.hex())
+            base_kind, base = found
+            delta = pack.inflate(data_off + SHA1_LEN, size)
+            result = (base_kind, apply_delta(base, delta))
+        else:
+            raise ValueError(f"unknown pack object type {type_num}")
+
+        # Delta chains share bases, so keep recently resolved objects around
+        with self._lock:
+            self._bases[key] = result
+            if len(self._bases) > BASE_CACHE_SIZE:
+                self._bases.popitem(last=False)
+        return result
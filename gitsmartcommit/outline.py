@@ -0,0 +1,162 @@
+"""
+Per-blob outline of classes and functions.
+
+An outline is the sorted list of (start_line, end_line, qualified_name)
+entries for every definition in a file.  It is built once per blob id and
+cached, after which the enclosing definition of any line is found by a
+bisect over the start lines plus a walk up the (short) parent chain.
+Definitions are recognised by the patterns the caller passes, normally
+def_patterns(path): a language analyzer's DEF_PATTERNS, then the built-in
+ones.
+"""
+
+import re
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+
+from .generate_commit_message import DEF_PATTERNS, SKIP_NAMES
+
+
+# Outlines kept in memory, keyed by blob id
+OUTLINE_CACHE_SIZE = 256
+
+# Statements that DEF_PATTERNS' looser C/Java patterns mistake for definitions
+STMT_RE = re.compile(
+    r"^\s*(?:return|await|yield|throw|raise|new|else|if|while|for|switch|case"
+    r"|print|assert|delete|not|and|or|in|is)\b"
+)
+
+# Lines at a definition's own indent that still belong to it: Allman-style
+# opening braces, and closing braces/brackets or Ruby/Lua `end`
+OPENER_RE = re.compile(r"^\s*\{\s*$")
+CLOSER_RE = re.compile(r"^\s*(?:[}\])]|end\b)")
+# ...unless the closer ends a multi-line signature, e.g. `):` or `) {`
+HEADER_END_RE = re.compile(r"[:{]\s*$")
+
+
+class Outline:
+    __slots__ = ("lines", "starts", "ends", "names", "parents")
+
+    def __init__(self, lines: int = 0):
+        self.lines = lines  # length of the blob in lines
+        self.starts = []
+        self.ends = []
+        self.names = []
+        self.parents = []
+
+    def entries(self) -> list:
+        """[(start_line, end_line, qualified_name), ...] sorted by start line."""
+        return list(zip(self.starts, self.ends, self.names))
+
+    def enclosing(self, line: int) -> str:
+        """Qualified name of the innermost definition containing `line` (1-based)."""
+        i = bisect_right(self.starts, line) - 1
+        # Definitions are properly nested, so anything that starts before
+        # entry i and still contains `line` must be one of its ancestors.
+        while i >= 0:
+            if self.ends[i] >= line:
+                return self.names[i]
+            i = self.parents[i]
+        return ""
+
+    def __len__(self):
+        return len(self.starts)
+
+
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip())
+
+
+def _def_name(line: str, patterns=DEF_PATTERNS) -> str:
+    if STMT_RE.match(line):
+        return ""
+    for pat in patterns:
+        m = pat.match(line)
+        if m:
+            name = m.group(1)
+            if name and name.lower() not in SKIP_NAMES and len(name) > 1:
+                return name
+            return ""
+    return ""
+
+
+def build_outline(lines: list, patterns=DEF_PATTERNS) -> Outline:
+    """
+    One pass over the file.  A definition's block ends at the last non-blank
+    line before the next line indented at or left of the definition itself;
+    a closing brace/`end` at the definition's indent is included in it.
+    """
+    out = Outline(len(lines))
+    indents = []  # indent of each definition line
+    bodied = []   # whether a deeper-indented line has been seen yet
+    stack = []    # indices into `out`, innermost last
+    last = 0      # last non-blank line number seen
+
+    for n, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        ind = _indent(line)
+        consumed = False
+        while stack:
+            top = stack[-1]
+            if ind > indents[top]:
+                bodied[top] = True
+                break
+            if ind == indents[top]:
+                if OPENER_RE.match(line) or (CLOSER_RE.match(line) and
+                                             (not bodied[top] or HEADER_END_RE.search(line))):
+                    break  # still part of the definition's header
+                if CLOSER_RE.match(line):
+                    out.ends[top] = n
+                    stack.pop()
+                    consumed = True
+                    break
+            out.ends[top] = last
+            stack.pop()
+        last = n
+        if consumed:
+            continue
+
+        name = _def_name(line, patterns)
+        if name:
+            parent = stack[-1] if stack else -1
+            out.starts.append(n)
+            out.ends.append(n)
+            out.names.append(f"{out.names[parent]}.{name}" if parent >= 0 else name)
+            out.parents.append(parent)
+            indents.append(ind)
+            bodied.append(False)
+            stack.append(len(out.starts) - 1)
+
+    for top in stack:
+        out.ends[top] = last
+    return out
+
+
+_cache = OrderedDict()
+# Shared by every thread; outlines are built outside it
+_cache_lock = threading.Lock()
+
+
+def outline_for(oid: str, load, patterns=DEF_PATTERNS) -> Outline:
+    """
+    Cached outline for blob `oid`.  `load` is called (with no arguments) to
+    fetch the blob's lines on a cache miss.  Safe to call from several threads.
+    """
+    # The same blob may be outlined with an analyzer's patterns under one path
+    key = oid if patterns is DEF_PATTERNS else (oid, tuple(patterns))
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            return cached
+    lines = load()
+    outline = build_outline(lines, patterns)
+    if not lines:
+        return outline  # unreadable blob — don't pin an empty outline
+    with _cache_lock:
+        _cache[key] = outline
+        if len(_cache) > OUTLINE_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return outline
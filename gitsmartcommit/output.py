@@ -0,0 +1,159 @@
+"""
+Machine-readable output for scripted use: --format json / ndjson.
+
+Neither format goes anywhere near the ANSI renderer.  Every record carries
+`schema` (SCHEMA_VERSION); fields are only ever added within a version, so
+consumers can rely on the ones documented here.
+
+ndjson streams one record per file as soon as it is described, then a
+summary record:
+
+    {"schema": 1, "type": "file", "path": ..., "old_path": ..., "status": ...,
+     "tag": ..., "summary": ..., "details": [...], "lang": ..., "scope": ...,
+     "package": ..., "added": 3, "removed": 1}
+    {"schema": 1, "type": "summary", "subject": ..., "branch": ..., "source": ...,
+     "counts": {"files": 1, "added": 3, "removed": 1, "tags": {"[ADD]": 1}},
+     "messages": {"conventional": ..., "body": ..., "changelog": ...}}
+
+A rename running through most files (renames.py) is only known once every
+file is in, and re-tags the files it explains.  The summary's counts use
+the final tags, and it lists those files under "retagged" as {"path",
+"tag", "summary", "details"}, so a reader can correct the records it has
+already seen.
+
+json prints a single document: the summary record (type "commit") with the
+file records, minus their `schema`/`type`, under "files"; there the
+records already carry the final tags.
+"""
+
+import json
+import sys
+
+from .analyzer import Analyzer
+from .generate_commit_message import compose_message
+from .messages import compose_formats
+
+
+SCHEMA_VERSION = 1
+FORMATS = ("text", "json", "ndjson")
+
+
+def file_status(fd: dict) -> str:
+    if fd["is_new"]:
+        return "added"
+    if fd["is_deleted"]:
+        return "deleted"
+    if fd["is_rename"]:
+        return "renamed"
+    return "modified"
+
+
+def file_record(fd: dict, info: dict, package: str = "") -> dict:
+    return {
+        "schema": SCHEMA_VERSION,
+        "type": "file",
+        "path": fd["path"],
+        "old_path": fd["old_path"],
+        "status": file_status(fd),
+        "binary": fd["is_binary"],
+        "tag": info["tag"],
+        "summary": info["summary"],
+        "details": info["details"],
+        "lang": info["lang"],
+        "scope": info.get("scope", ""),
+        "package": package,
+        "added": len(fd["added"]),
+        "removed": len(fd["removed"]),
+    }
+
+
+def summary_record(records: list, subject: str, branch: str = "", source: str = "") -> dict:
+    tags = {}
+    for rec in records:
+        tags[rec["tag"]] = tags.get(rec["tag"], 0) + 1
+    return {
+        "schema": SCHEMA_VERSION,
+        "type": "summary",
+        "subject": subject,
+        "branch": branch,
+        "source": source,
+        "counts": {
+            "files": len(records),
+            "added": sum(rec["added"] for rec in records),
+            "removed": sum(rec["removed"] for rec in records),
+            "tags": tags,
+        },
+    }
+
+
+def _emit(rec: dict, out):
+    out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+    out.flush()
+
+
+def analyze_records(file_diffs, branch: str = "", source: str = "", analyzer=None,
+                    on_file=None, extra=None, packages=None, notes=()):
+    """
+    Describe each file of an iterable of file diffs (a generator is fine),
+    calling on_file(record) as each one is ready.  Returns (records, summary);
+    the returned records carry the tags compose_message settled on.
+    `packages` (a workspace.PackageIndex) fills in each file's package;
+    `notes` (e.g. partial-clone fallbacks) are listed in the summary.
+    """
+    analyzer = analyzer or Analyzer(render=False)
+    extra = extra or {}
+    done, results, records = [], [], []
+    for fd in file_diffs:
+        info = analyzer.describe(fd)
+        package = packages.package_of(fd["path"]) if packages else ""
+        rec = dict(file_record(fd, info, package), **extra)
+        done.append(fd)
+        results.append(info)
+        records.append(rec)
+        if on_file is not None:
+            on_file(rec)
+
+    subject, formats, retagged = "", compose_formats({}), []
+    if done:
+        result = compose_message(done, results, branch, analyzer.tag_priority, render=False)
+        subject, formats = result["subject"], compose_formats(result, branch, packages)
+        for rec, info in zip(records, result["_files"]):
+            final = {"tag": info["tag"], "summary": info["summary"], "details": info["details"]}
+            if any(rec[k] != v for k, v in final.items()):
+                rec.update(final)
+                retagged.append(dict(final, path=rec["path"]))
+    summary = summary_record(records, subject, branch, source)
+    summary["messages"] = {k: formats[k] for k in ("conventional", "body", "changelog")}
+    if retagged:
+        summary["retagged"] = retagged
+    if notes:
+        summary["notes"] = list(notes)
+    return records, dict(summary, **extra)
+
+
+def write_ndjson(file_diffs, branch: str = "", source: str = "", analyzer=None,
+                 out=None, extra=None, packages=None, notes=()) -> dict:
+    out = out or sys.stdout
+    _, summary = analyze_records(file_diffs, branch, source, analyzer,
+                                 on_file=lambda rec: _emit(rec, out), extra=extra,
+                                 packages=packages, notes=notes)
+    _emit(summary, out)
+    return summary
+
+
+def json_document(file_diffs, branch: str = "", source: str = "", analyzer=None, extra=None,
+                  packages=None, notes=()) -> dict:
+    records, summary = analyze_records(file_diffs, branch, source, analyzer, extra=extra,
+                                       packages=packages, notes=notes)
+    doc = dict(summary, type="commit")
+    drop = {"schema", "type"} | set(extra or ())
+    doc["files"] = [{k: v for k, v in rec.items() if k not in drop} for rec in records]
+    return doc
+
+
+def write_json(file_diffs, branch: str = "", source: str = "", analyzer=None, out=None,
+               packages=None, notes=()) -> dict:
+    out = out or sys.stdout
+    doc = json_document(file_diffs, branch, source, analyzer, packages=packages, notes=notes)
+    out.write(json.dumps(doc, ensure_ascii=False, indent=2) + "\n")
+    return doc
@@ -0,0 +1,157 @@
+"""
+Partial-clone safety.
+
+In a blobless clone (`git clone --filter=blob:none`) any git command that
+needs a blob the clone never downloaded fetches it from the promisor
+remote, one round trip at a time, or fails when offline.  `git diff -p`
+does that for every changed blob and rename detection for every candidate
+pair.
+
+In a partial clone the changed files are listed first with `git diff
+--raw`, which needs only trees.  Each blob id is then looked up in the
+local object store without asking git.  Files whose blobs are all local
+get the normal patch diff, run with rename detection off.  The others are
+described from their raw status alone: added, deleted or modified, with
+no line counts.  Every git call made here also sets GIT_NO_LAZY_FETCH
+(honoured by git 2.44+ and the 2.39.4+ maintenance releases) as a second
+line of defence.
+
+The same applies to every mode.  The working tree, --base/--pr, batch
+(--repos-from) and the asyncio API go through safe_file_diffs().  --range
+and --index read `git log --raw` instead of `git log -p`.  That log lists
+each commit's changed blobs without reading them, and describe_changes()
+handles them just like the raw diff.  The HTTP server runs no git at all.
+Callers decide is_partial_clone() once per repository and pass the answer
+down.
+"""
+
+import os
+import subprocess
+
+from .generate_commit_message import iter_file_diffs
+
+NULL_OID = "0" * 40
+EMPTY_TREE = "4b825dc642cb6eb9a060e54bf8d69288fbee4904"
+# Paths per `git diff -- <paths>` call for the files that can be diffed
+PATHS_PER_CALL = 500
+
+
+def no_lazy_fetch_env() -> dict:
+    return dict(os.environ, GIT_NO_LAZY_FETCH="1")
+
+
+def promisor_remotes(path: str) -> list:
+    """Remotes this clone may lazily fetch missing objects from."""
+    try:
+        out = subprocess.check_output(
+            ["git", "-C", path, "config", "--get-regexp", r"^remote\..*\.promisor$"],
+            stderr=subprocess.DEVNULL,
+        ).decode("utf-8", errors="replace")
+    except subprocess.CalledProcessError:
+        out = ""  # no such keys
+    remotes = [key[len("remote."):-len(".promisor")]
+               for key, _, value in (line.partition(" ") for line in out.splitlines())
+               if value.strip().lower() in ("true", "yes", "on", "1")]
+    if not remotes:
+        try:
+            name = subprocess.check_output(
+                ["git", "-C", path, "config", "--get", "extensions.partialClone"],
+                stderr=subprocess.DEVNULL,
+            ).decode("utf-8", errors="replace").strip()
+        except subprocess.CalledProcessError:
+            name = ""
+        if name:
+            remotes.append(name)
+    return remotes
+
+
+def is_partial_clone(path: str) -> bool:
+    """Spawns one or two `git config`s: ask once per repository and pass it on."""
+    return bool(promisor_remotes(path))
+
+
+def raw_changes(path: str, args: list) -> list:
+    """[{status, old_oid, new_oid, path}] from `git diff --raw`, which never reads a blob."""
+    out = subprocess.check_output(
+        ["git", "-C", path, "diff", "--raw", "-z", "--no-renames", "--no-abbrev",
+         "--no-ext-diff", "--no-textconv"] + args,
+        stderr=subprocess.DEVNULL, env=no_lazy_fetch_env(),
+    ).decode("utf-8", errors="replace")
+    fields = out.split("\0")
+    changes = []
+    for meta, name in zip(fields[0::2], fields[1::2]):
+        if not meta.startswith(":"):
+            continue
+        _, _, old_oid, new_oid, status = meta[1:].split(" ", 4)
+        changes.append({"status": status[:1], "old_oid": old_oid, "new_oid": new_oid, "path": name})
+    return changes
+
+
+def raw_log_changes(lines) -> list:
+    """raw_changes() entries from one commit's `:<modes> <oids> <status>\\t<path>` log lines."""
+    changes = []
+    for line in lines:
+        if not line.startswith(":") or "\t" not in line:
+            continue
+        meta, name = line[1:].split("\t", 1)
+        _, _, old_oid, new_oid, status = meta.split(" ", 4)
+        changes.append({"status": status[:1], "old_oid": old_oid, "new_oid": new_oid, "path": name})
+    return changes
+
+
+def status_file_diff(change: dict) -> dict:
+    """A parse_diff()-shaped record for a file known only by its raw status."""
+    null = {NULL_OID, ""}
+    return {
+        "path": change["path"],
+        "old_path": change["path"],
+        "added": [],
+        "removed": [],
+        "hunk_ctx": [],
+        "is_new": change["status"] == "A",
+        "is_deleted": change["status"] == "D",
+        "is_rename": False,
+        "is_binary": False,
+        "old_oid": "" if change["old_oid"] in null else change["old_oid"],
+        "new_oid": "" if change["new_oid"] in null else change["new_oid"],
+        "hunks": [],
+        "status_only": True,
+    }
+
+
+def safe_file_diffs(path: str, args: list, specs: list, store, profile: list) -> tuple:
+    """
+    (file diffs, number of files described from status only) for `git diff
+    <args> <specs>` without fetching any blob.  `store` (objects.ObjectStore)
+    answers which blobs are local; `profile` is the caller's usual diff options.
+    """
+    return describe_changes(path, args, raw_changes(path, args + specs), store, profile)
+
+
+def describe_changes(path: str, args: list, changes: list, store, profile: list) -> tuple:
+    """safe_file_diffs() for `changes` already read from `git diff --raw <args>` or a raw log."""
+    from .git import stream_diff_lines
+
+    local, status_only = [], []
+    for c in changes:
+        oids = [o for o in (c["old_oid"], c["new_oid"]) if o != NULL_OID]
+        (local if store is not None and all(store.has(o) for o in oids) else status_only).append(c)
+
+    def files():
+        paths = [c["path"] for c in local]
+        for i in range(0, len(paths), PATHS_PER_CALL):
+            literal = [":(literal)" + p for p in paths[i:i + PATHS_PER_CALL]]
+            yield from iter_file_diffs(stream_diff_lines(
+                path, args + profile + ["--no-renames", "--"] + literal, env=no_lazy_fetch_env()))
+        for c in status_only:
+            yield status_file_diff(c)
+
+    return files(), len(status_only)
+
+
+def partial_note(status_only: int) -> str:
+    if not status_only:
+        return "partial clone: rename detection off"
+    s = "s" if status_only != 1 else ""
+    return (f"partial clone: {status_only} file{s} described from name-status only "
+            f"(blobs not available locally, not fetched); rename detection off")
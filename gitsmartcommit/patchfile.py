@@ -0,0 +1,161 @@
+"""
+Diff input from files and stdin.
+
+Regular files are memory-mapped and split into lines straight from the
+mapping, so a large patch is never read into one Python string.  Stdin is
+consumed as a stream.  Both may be plain `git diff` output or an mbox as
+written by `git format-patch` (one or many patches); each patch in a series
+is parsed separately.
+"""
+
+import mmap
+import os
+import re
+import stat
+import sys
+
+from .generate_commit_message import DiffParser, HUNK_RE
+
+
+# "From <sha> Mon Sep 17 00:00:00 2001" — the mbox separator format-patch writes
+MBOX_FROM_RE = re.compile(r"^From ([0-9a-f]{40}) \w{3} \w{3} [ \d]\d \d\d:\d\d:\d\d \d{4}$")
+HEADER_RE = re.compile(r"^(From|Date|Subject): ?(.*)$")
+HEADER_KEYS = {"From": "author", "Date": "date", "Subject": "subject"}
+PATCH_PREFIX_RE = re.compile(r"^\[[^\]]*PATCH[^\]]*\]\s*")
+# format-patch signature line that follows the last hunk
+SIGNATURE = "-- "
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# LINE SOURCES
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _decode(raw) -> str:
+    line = bytes(raw).decode("utf-8", errors="replace")
+    return line[:-1] if line.endswith("\r") else line
+
+
+def iter_buffer_lines(buf):
+    """Yield decoded lines from a bytes-like buffer (e.g. an mmap)."""
+    pos = 0
+    end = len(buf)
+    view = memoryview(buf)
+    try:
+        while pos < end:
+            nl = buf.find(b"\n", pos)
+            if nl < 0:
+                nl = end
+            yield _decode(view[pos:nl])
+            pos = nl + 1
+    finally:
+        view.release()
+
+
+def iter_stream_lines(stream):
+    """Yield decoded lines from a binary stream (e.g. sys.stdin.buffer)."""
+    for raw in stream:
+        yield _decode(raw[:-1] if raw.endswith(b"\n") else raw)
+
+
+def open_diff_lines(path: str):
+    """
+    Lines of the diff at `path`, or of stdin when `path` is "-".
+    Regular files are memory-mapped; the mapping is released once the
+    generator is exhausted or closed.
+    """
+    if path == "-":
+        yield from iter_stream_lines(sys.stdin.buffer)
+        return
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        if not stat.S_ISREG(st.st_mode):
+            # FIFOs, process substitution, /dev/stdin — can't be mapped,
+            # and report a size of 0 whatever they will deliver
+            yield from iter_stream_lines(f)
+            return
+        if st.st_size == 0:
+            return  # mmap refuses empty files
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield from iter_buffer_lines(mm)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# PATCH SERIES
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _new_patch(commit: str = "") -> dict:
+    return {"commit": commit, "author": "", "date": "", "subject": "", "files": []}
+
+
+def read_patches(lines) -> list:
+    """
+    Split a (possibly mbox-framed) diff into patches, parsing as it goes.
+
+    Returns a list of {commit, author, date, subject, files}, where `files`
+    is the parse_diff() result for that patch.  A plain diff with no mbox
+    framing comes back as a single patch with empty metadata.
+    """
+    patches = []
+    patch = _new_patch()
+    parser = DiffParser()
+    in_headers = False
+    last_header = None
+    old_rem = new_rem = 0   # lines still expected on each side of the hunk
+    in_diff = True          # False once format-patch's signature has been seen
+
+    for line in lines:
+        m = MBOX_FROM_RE.match(line)
+        if m:
+            patch["files"] = parser.close()
+            if patch["files"] or patch["commit"]:
+                patches.append(patch)
+            patch = _new_patch(m.group(1))
+            parser = DiffParser()
+            in_headers, last_header, in_diff = True, None, True
+            old_rem = new_rem = 0
+            continue
+
+        if in_headers:
+            if not line:
+                in_headers = False
+            elif line[0] in " \t" and last_header:
+                patch[last_header] += " " + line.strip()  # folded header
+            else:
+                h = HEADER_RE.match(line)
+                last_header = HEADER_KEYS[h.group(1)] if h else None
+                if h:
+                    patch[last_header] = h.group(2).strip()
+            continue
+
+        if not in_diff:
+            continue
+
+        if old_rem > 0 or new_rem > 0:
+            # Inside a hunk: counting lines keeps a removed "- " line from
+            # being mistaken for the signature
+            if line.startswith(" "):
+                old_rem -= 1
+                new_rem -= 1
+            elif line.startswith("-"):
+                old_rem -= 1
+            elif line.startswith("+"):
+                new_rem -= 1
+            parser.feed(line)
+            continue
+
+        if patch["commit"] and line == SIGNATURE:
+            in_diff = False
+            continue
+
+        h = HUNK_RE.match(line)
+        if h:
+            old_rem = int(h.group(2) or 1)
+            new_rem = int(h.group(4) or 1)
+        parser.feed(line)
+
+    patch["files"] = parser.close()
+    if patch["files"] or patch["commit"] or not patches:
+        patches.append(patch)
+    for p in patches:
+        p["subject"] = PATCH_PREFIX_RE.sub("", p["subject"])
+    return patches
@@ -0,0 +1,168 @@
+"""
+PR mode: describe a branch against its merge-base with a base ref.
+
+    quickcommit --base origin/main      # same files as git diff origin/main...HEAD
+    quickcommit --pr                    # base = the remote's default branch
+
+The merge-base is cached in the git dir keyed by the two tip commit ids,
+so re-running on an unchanged pair costs two rev-parses.  The range diff
+is streamed through an Analyzer whose per-blob results are saved next to
+it: after a new push only the files whose blobs changed are described
+again.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+from . import __version__
+from .analyzer import Analyzer
+from .git import diff_files, load_rules, open_store, print_message
+from .partial import is_partial_clone
+from .workspace import PackageIndex
+
+
+MERGE_BASE_CACHE = "smartcommit-merge-base.json"
+RESULTS_CACHE = "smartcommit-results.json"
+# Merge-bases remembered (oldest dropped first)
+MERGE_BASE_ENTRIES = 256
+# Per-file results kept between runs
+RESULTS_CACHE_SIZE = 20000
+
+# Tried in order for --pr when the remote has no HEAD
+DEFAULT_BASES = ("origin/main", "origin/master", "main", "master")
+
+
+class BaseError(ValueError):
+    pass
+
+
+def _git(path: str, *args) -> str:
+    return subprocess.check_output(
+        ["git", "-C", path] + list(args), stderr=subprocess.DEVNULL
+    ).decode("utf-8", errors="replace").strip()
+
+
+def git_path(path: str, name: str) -> str:
+    return os.path.join(path, _git(path, "rev-parse", "--git-path", name))
+
+
+def default_base(path: str) -> str:
+    """The remote's default branch (origin/HEAD), else the first of DEFAULT_BASES that exists."""
+    try:
+        ref = _git(path, "symbolic-ref", "-q", "--short", "refs/remotes/origin/HEAD")
+        if ref:
+            return ref
+    except subprocess.CalledProcessError:
+        pass
+    for ref in DEFAULT_BASES:
+        if subprocess.call(["git", "-C", path, "rev-parse", "-q", "--verify", ref + "^{commit}"],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL) == 0:
+            return ref
+    raise BaseError("no default branch found (tried origin/HEAD, " + ", ".join(DEFAULT_BASES) + ")")
+
+
+def merge_base(path: str, base: str, head: str = "HEAD", cache_file: str = None) -> str:
+    """Merge-base of `base` and `head`, cached by their commit ids."""
+    if base.startswith("-") or head.startswith("-"):
+        raise BaseError(f"unknown revision {base!r}")
+    try:
+        base_oid, head_oid = _git(path, "rev-parse", base + "^{commit}", head + "^{commit}").split()
+    except (subprocess.CalledProcessError, ValueError):
+        raise BaseError(f"unknown revision {base!r}")
+
+    key = f"{base_oid}:{head_oid}"
+    if cache_file is None:
+        cache_file = git_path(path, MERGE_BASE_CACHE)
+    try:
+        with open(cache_file, encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        cached = {}
+    if not isinstance(cached, dict):
+        cached = {}
+    if key in cached:
+        return cached[key]
+
+    try:
+        oid = _git(path, "merge-base", base_oid, head_oid)
+    except subprocess.CalledProcessError:
+        raise BaseError(f"{base} and {head} have no common history")
+
+    cached[key] = oid
+    while len(cached) > MERGE_BASE_ENTRIES:
+        cached.pop(next(iter(cached)))
+    try:
+        with open(cache_file, "w", encoding="utf-8") as f:
+            json.dump(cached, f)
+    except OSError:
+        pass
+    return oid
+
+
+def cache_stamp(rules=None) -> str:
+    """Results are reused only under the same version and rules."""
+    return f"{__version__}:{rules.fingerprint() if rules else ''}"
+
+
+def range_files(path: str, base_oid: str, head: str = "HEAD", store=None, partial=None) -> tuple:
+    """(per-file diffs of merge-base..head, parsed while git writes them, notes)."""
+    return diff_files(path, [base_oid, head], store, partial=partial)
+
+
+def open_analyzer(path: str, store=None, rules=None) -> Analyzer:
+    analyzer = Analyzer(store=store, render=False, rules=rules, cache_size=RESULTS_CACHE_SIZE)
+    analyzer.load_cache(git_path(path, RESULTS_CACHE), cache_stamp(rules))
+    return analyzer
+
+
+def save_analyzer(path: str, analyzer: Analyzer):
+    if analyzer.misses:
+        analyzer.save_cache(git_path(path, RESULTS_CACHE), cache_stamp(analyzer.rules))
+
+
+def analyze_pr(path: str, base: str, branch: str = "", analyzer: Analyzer = None) -> dict:
+    """compose_message() result for `base`...HEAD (render=False)."""
+    analyzer = analyzer or Analyzer(render=False)
+    files, _ = range_files(path, merge_base(path, base), store=analyzer.store)
+    return analyzer.analyze_files(list(files), branch)
+
+
+def run_pr(path: str, base: str, branch: str, fmt: str = "text", style: str = "conventional"):
+    """--base / --pr: title and squash message for the branch's changes since `base`."""
+    from .output import write_json, write_ndjson
+
+    err = sys.stderr if fmt != "text" else sys.stdout
+    try:
+        base = base or default_base(path)
+        base_oid = merge_base(path, base)
+    except BaseError as e:
+        print(f"Error: {e}", file=err)
+        sys.exit(1)
+
+    partial = is_partial_clone(path)
+    store = open_store(path, partial)
+    try:
+        analyzer = open_analyzer(path, store, load_rules(path))
+        packages = PackageIndex.load(path)
+        files, notes = range_files(path, base_oid, store=store, partial=partial)
+        if fmt == "ndjson":
+            write_ndjson(files, branch, "pr", analyzer, packages=packages, notes=notes)
+        elif fmt == "json":
+            write_json(files, branch, "pr", analyzer, packages=packages, notes=notes)
+        else:
+            result = analyzer.analyze_files(list(files), branch)
+            for note in notes:
+                print(f"Note: {note}")
+            if not result.get("_files"):
+                print(f"Nothing to describe — HEAD has no changes since {base}.")
+                return
+            print_message(result, branch, packages, style)
+        save_analyzer(path, analyzer)
+    except subprocess.CalledProcessError as e:
+        print(f"Error: Could not read git diff — {e}", file=err)
+        sys.exit(1)
+    finally:
+        if store is not None:
+            store.close()
@@ -0,0 +1,95 @@
+"""
+Symbol renames that run across many files.
+
+A codemod that renames get_user to fetch_user touches every caller with a
+one-token edit.  Each removed line is bucketed by its skeleton (the line
+with every identifier blanked out); an added line with the same skeleton
+pairs with the oldest removed line in that bucket, and a pair whose
+identifiers differ in exactly one substitution votes for it in an index
+of substitution → files.  Every line is hashed once, so the pass is linear
+in the size of the diff with no pairwise line comparison.
+
+    renames = find_renames(file_diffs)
+    renames[0]    # {"old": "get_user", "new": "fetch_user", "files": [...], "explained": [...], "lines": 75}
+"""
+
+import re
+from collections import defaultdict, deque
+
+from .generate_commit_message import SKIP_NAMES
+
+IDENT_RE = re.compile(r"[A-Za-z_]\w*")
+
+# A rename names the commit when it appears in at least this many files...
+RENAME_MIN_FILES = 2
+# ...and in at least this share of the changed files
+RENAME_SHARE = 0.6
+
+
+def skeleton(line: str) -> str:
+    return IDENT_RE.sub("\0", line.strip())
+
+
+def substitution(old: str, new: str):
+    """(old_name, new_name) if the lines differ only by renaming one identifier, else None."""
+    found = None
+    for a, b in zip(IDENT_RE.findall(old), IDENT_RE.findall(new)):
+        if a != b:
+            if a.lower() in SKIP_NAMES or b.lower() in SKIP_NAMES:
+                return None
+            if found is None:
+                found = (a, b)
+            elif found != (a, b):
+                return None
+    return found
+
+
+def file_substitutions(fd: dict) -> dict:
+    """{(old, new): number of line pairs differing by just that rename} for one file."""
+    buckets = defaultdict(deque)
+    for line in fd["removed"]:
+        buckets[skeleton(line)].append(line)
+    subs = defaultdict(int)
+    for line in fd["added"]:
+        bucket = buckets.get(skeleton(line))
+        if not bucket:
+            continue
+        old = bucket.popleft()
+        sub = substitution(old, line)
+        if sub:
+            subs[sub] += 1
+    return subs
+
+
+def find_renames(file_diffs: list) -> list:
+    """
+    Consistent renames, most widespread first.  `files` lists the indices of
+    files carrying the substitution, `explained` those whose every changed
+    line is that substitution.
+    """
+    index = {}
+    for i, fd in enumerate(file_diffs):
+        if not (fd["added"] and fd["removed"]):
+            continue
+        for (old, new), count in file_substitutions(fd).items():
+            entry = index.get((old, new))
+            if entry is None:
+                entry = index[(old, new)] = {"old": old, "new": new, "files": [], "explained": [], "lines": 0}
+            entry["files"].append(i)
+            entry["lines"] += count
+            if count == len(fd["added"]) == len(fd["removed"]):
+                entry["explained"].append(i)
+    return sorted(index.values(), key=lambda e: (-len(e["files"]), -e["lines"]))
+
+
+def dominant_rename(file_diffs: list, min_files: int = RENAME_MIN_FILES, share: float = RENAME_SHARE):
+    """The rename that accounts for most of the change set, or None."""
+    if len(file_diffs) < min_files:
+        return None
+    renames = find_renames(file_diffs)
+    if not renames:
+        return None
+    top = renames[0]
+    if len(top["files"]) < max(min_files, len(file_diffs) * share):
+        return None
+    return top
@@ -0,0 +1,212 @@
+"""
+Terminal renderer for the commit preview.
+
+Writes straight to a stream as it goes instead of joining one big string,
+sizes itself to the terminal, and collapses large change sets by directory
+(top entries per directory, then "…and N more").  When the stream is not a
+TTY, or NO_COLOR is set, no escape codes are produced at all.
+"""
+
+import os
+import shutil
+from collections import defaultdict
+
+from .generate_commit_message import C, LANG_ICON, TAG_PRIORITY
+
+
+# Up to this many files every file is listed with its details
+FULL_LIMIT = 20
+# When collapsing: entries shown per directory, and directories shown
+TOP_PER_DIR = 5
+TOP_DIRS = 40
+
+MIN_WIDTH = 40
+MAX_WIDTH = 120
+
+
+class Style:
+    """C's helpers, or pass-throughs when color is off."""
+
+    def __init__(self, color: bool = True):
+        self.color = color
+
+    def tag(self, t):
+        return C.tag(t) if self.color else t
+
+    def bold(self, s):
+        return C.bold(s) if self.color else s
+
+    def dim(self, s):
+        return C.dim(s) if self.color else s
+
+    def green(self, s):
+        return C.green(s) if self.color else s
+
+    def red(self, s):
+        return C.red(s) if self.color else s
+
+    def cyan(self, s):
+        return C.cyan(s) if self.color else s
+
+    def yellow(self, s):
+        return C.yellow(s) if self.color else s
+
+    def white(self, s):
+        return C.white(s) if self.color else s
+
+
+def use_color(stream) -> bool:
+    if os.environ.get("NO_COLOR") or os.environ.get("TERM") == "dumb":
+        return False
+    isatty = getattr(stream, "isatty", None)
+    return bool(isatty and isatty())
+
+
+def terminal_width(stream=None) -> int:
+    """Inner box width for the current terminal (columns minus the border)."""
+    columns = shutil.get_terminal_size(fallback=(80, 24)).columns
+    return max(MIN_WIDTH, min(columns, MAX_WIDTH)) - 2
+
+
+def _fit(text: str, width: int) -> str:
+    return text if len(text) <= width else text[:max(width - 1, 0)] + "…"
+
+
+def _fit_left(text: str, width: int) -> str:
+    """Keep the end of a path, which is the part that identifies it."""
+    return text if len(text) <= width else "…" + text[-(width - 1):]
+
+
+def group_by_dir(results: list) -> dict:
+    """{directory: [results]} in first-seen order; one pass over the files."""
+    groups = defaultdict(list)
+    for r in results:
+        groups[os.path.dirname(r["path"])].append(r)
+    return groups
+
+
+class Renderer:
+    def __init__(self, out, color=None, width=None, priority=TAG_PRIORITY):
+        self.out = out
+        self.s = Style(use_color(out) if color is None else color)
+        self.width = width or terminal_width(out)
+        self.rank = {tag: i for i, tag in enumerate(priority)}
+        self._buf = []
+
+    # ── output ───────────────────────────────────────────────────────────
+
+    def line(self, text: str = ""):
+        self._buf.append(self.s.dim("│") + text)
+
+    def flush(self):
+        if self._buf:
+            self.out.write("\n".join(self._buf) + "\n")
+            self._buf = []
+            self.out.flush()
+
+    # ── sections ─────────────────────────────────────────────────────────
+
+    def header(self, subject: str, primary_tag: str, branch: str, count: int):
+        s, W = self.s, self.width
+        self._buf.append("")
+        self._buf.append(s.dim("╭" + "─" * W + "╮"))
+        label = f"  {s.bold(s.cyan('git commit message'))}"
+        if branch:
+            label += s.dim("  •  branch: ") + s.yellow(branch)
+        self.line(label)
+        self._buf.append(s.dim("├" + "─" * W))
+
+        plain_s = subject[len(primary_tag):]
+        branch_display = ""
+        if branch and f"[{branch}]" in plain_s:
+            plain_s = plain_s.replace(f"[{branch}]", "").strip()
+            branch_display = s.dim(f"[{branch}]") + " "
+        self.line(f"  {s.tag(primary_tag)} {branch_display}{s.bold(plain_s.strip())}")
+        self.line()
+        self.line(f"  {s.bold(s.white('Changes'))}  {s.dim(str(count) + ' file' + ('s' if count != 1 else ''))}")
+        self.line(f"  {s.dim('─' * (W - 2))}")
+        self.flush()
+
+    def file(self, r: dict, path: str, details: bool = True, indent: str = "  "):
+        s, W = self.s, self.width
+        lang = r["lang"]
+        badge = f"{LANG_ICON.get(lang, '')} {lang}" if lang else ""
+        summary = _fit(r["summary"], W - len(indent) - len(r["tag"]) - len(badge) - 3)
+        lang_badge = f" {s.dim(badge)}" if badge else ""
+        self.line(f"{indent}{s.tag(r['tag'])} {s.white(summary)}{lang_badge}")
+        self.line(f"{indent}   {s.dim('↳ ' + _fit_left(path, W - len(indent) - 5))}")
+        if details:
+            for d in r["details"]:
+                if d.startswith("+"):
+                    self.line(f"{indent}     {s.green('+')} {s.dim(_fit(d[2:], W - len(indent) - 7))}")
+                elif d.startswith("-"):
+                    self.line(f"{indent}     {s.red('-')} {s.dim(_fit(d[2:], W - len(indent) - 7))}")
+                else:
+                    self.line(f"{indent}     {s.dim('· ' + _fit(d, W - len(indent) - 7))}")
+            self.line()
+
+    def files(self, results: list):
+        if len(results) <= FULL_LIMIT:
+            for r in results:
+                self.file(r, r["path"])
+            self.flush()
+            return
+
+        s, W = self.s, self.width
+        groups = group_by_dir(results)
+        order = sorted(groups, key=lambda d: -len(groups[d]))
+        for directory in order[:TOP_DIRS]:
+            members = groups[directory]
+            name = _fit_left((directory or ".") + "/", W - 16)
+            self.line(f"  {s.bold(name)}  {s.dim(str(len(members)) + ' file' + ('s' if len(members) != 1 else ''))}")
+            shown = sorted(members, key=lambda r: self.rank.get(r["tag"], len(self.rank)))[:TOP_PER_DIR]
+            for r in shown:
+                self.file(r, os.path.basename(r["path"]), details=False, indent="    ")
+            if len(members) > len(shown):
+                self.line(f"    {s.dim(f'…and {len(members) - len(shown)} more')}")
+            self.line()
+            self.flush()
+        if len(order) > TOP_DIRS:
+            rest = order[TOP_DIRS:]
+            hidden = sum(len(groups[d]) for d in rest)
+            self.line(f"  {s.dim(f'…and {len(rest)} more directories ({hidden} files)')}")
+            self.line()
+            self.flush()
+
+    def footer(self, results: list, total_add: int, total_rem: int, tag_counts: dict):
+        s, W = self.s, self.width
+        self._buf.append(s.dim("├" + "─" * W))
+        net = total_add - total_rem
+        net_s = (s.green(f"net +{net}") if net > 0 else s.red(f"net {net}") if net < 0 else s.dim("net 0"))
+        self.line(f"  {s.dim('Files')} {s.bold(str(len(results)))}  {s.green(f'+{total_add}')}  "
+                  f"{s.red(f'-{total_rem}')}  {net_s}")
+        if len(tag_counts) > 1:
+            self.line("  " + "  ".join(
+                f"{s.tag(t)} {s.dim('×' + str(c))}"
+                for t, c in sorted(tag_counts.items(), key=lambda x: -x[1])
+            ))
+        self._buf.append(s.dim("╰" + "─" * W + "╯"))
+        self.flush()
+
+
+def render(out, subject: str, primary_tag: str, branch: str, results: list,
+           total_add: int, total_rem: int, tag_counts: dict, color=None, width=None):
+    """Write the preview to `out` section by section."""
+    r = Renderer(out, color, width)
+    r.header(subject, primary_tag, branch, len(results))
+    r.files(results)
+    r.footer(results, total_add, total_rem, tag_counts)
+
+
+def render_result(out, result: dict, branch: str = "", color=None, width=None):
+    """Render a compose_message() result (made with or without render=True)."""
+    results = result.get("_files", [])
+    if not results:
+        return
+    tag_counts = defaultdict(int)
+    for r in results:
+        tag_counts[r["tag"]] += 1
+    total_add, total_rem = result.get("_totals", (0, 0))
+    primary_tag = result["_lead"]["tag"]
+    render(out, result["subject"], primary_tag, branch, results, total_add, total_rem,
+           tag_counts, color, width)
@@ -0,0 +1,191 @@
+"""
+Repository rules: `.smartcommit.toml`, checked before the built-in heuristics.
+
+    [[rule]]
+    glob = "migrations/**"
+    tag = "[CONFIG]"
+
+    [[rule]]
+    glob = "*.pb.go"
+    generated = true            # "[CHORE] Regenerate foo.pb.go", no analysis
+
+    [[rule]]
+    regex = "^ops/"
+    tag = "[CHORE]"
+    scope = "ops"               # Conventional Commit scope for these files
+
+    [fix]
+    keywords = ["hotfix", "regression", "SEV-\\\\d+"]
+
+Globs without a "/" match the file name in any directory; "**" spans
+directories.
+
+All path rules are compiled into one regex of named alternatives, so
+matching a path is a single match().  Each alternative starts with `.*?`
+and is tried from the path's first character, so the first listed rule
+that matches wins, even when a later rule would match further left.
+
+The compiled pattern and rule actions are cached as JSON in the git dir,
+keyed by the rules file's hash, so unchanged rules skip TOML parsing and
+glob translation on startup.
+"""
+
+import hashlib
+import json
+import os
+import re
+import subprocess
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+
+RULES_FILE = ".smartcommit.toml"
+CACHE_NAME = "smartcommit-rules.json"
+CACHE_VERSION = 2
+
+RULE_KEYS = {"glob", "regex", "tag", "scope", "generated"}
+
+
+class RulesError(ValueError):
+    pass
+
+
+def glob_to_regex(glob: str) -> str:
+    """Translate a path glob into an anchored regex source."""
+    anchored = "/" in glob.rstrip("/")
+    glob = glob.lstrip("/")
+    out, i = [], 0
+    while i < len(glob):
+        c = glob[i]
+        if glob.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+            continue
+        if glob.startswith("**", i):
+            out.append(".*")
+            i += 2
+            continue
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "/" and i == len(glob) - 1:
+            out.append("/.*")  # "ops/" means everything below ops
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ("^" if anchored else "(?:^|/)") + "".join(out) + "$"
+
+
+class Rules:
+    def __init__(self, pattern: str = "", actions: list = (), fix_keywords: str = ""):
+        self.pattern = pattern
+        self.actions = list(actions)
+        self.fix_keywords = fix_keywords
+        self._matcher = re.compile(pattern) if pattern else None
+        self.fix_kw_re = re.compile(rf"\b(?:{fix_keywords})\b", re.IGNORECASE) if fix_keywords else None
+
+    def __bool__(self):
+        return bool(self.actions or self.fix_keywords)
+
+    def match(self, path: str):
+        """The action dict of the first rule matching `path`, or None."""
+        if self._matcher is None:
+            return None
+        m = self._matcher.match(path)
+        return self.actions[int(m.lastgroup[1:])] if m else None
+
+    def fingerprint(self) -> str:
+        """Hash of everything the rules decide, for keying cached results."""
+        if not self:
+            return ""
+        return hashlib.sha1(json.dumps(
+            [self.pattern, self.actions, self.fix_keywords]).encode()).hexdigest()
+
+    # ── compiling / caching ──────────────────────────────────────────────
+
+    @classmethod
+    def compile(cls, config: dict) -> "Rules":
+        alternatives, actions = [], []
+        for n, rule in enumerate(config.get("rule", [])):
+            unknown = set(rule) - RULE_KEYS
+            if unknown:
+                raise RulesError(f"rule {n + 1}: unknown key(s) {', '.join(sorted(unknown))}")
+            if ("glob" in rule) == ("regex" in rule):
+                raise RulesError(f"rule {n + 1}: needs exactly one of 'glob' or 'regex'")
+            source = glob_to_regex(rule["glob"]) if "glob" in rule else rule["regex"]
+            try:
+                re.compile(source)
+            except re.error as e:
+                raise RulesError(f"rule {n + 1}: bad regex — {e}")
+            # Alternation order only decides if every rule starts at 0
+            alternatives.append(f"(?P<r{n}>.*?(?:{source}))")
+            actions.append({
+                "tag": rule.get("tag", ""),
+                "scope": rule.get("scope", ""),
+                "generated": bool(rule.get("generated", False)),
+            })
+        keywords = "|".join(config.get("fix", {}).get("keywords", []))
+        try:
+            re.compile(keywords)
+        except re.error as e:
+            raise RulesError(f"fix keywords: bad regex — {e}")
+        return cls("|".join(alternatives), actions, keywords)
+
+    @classmethod
+    def parse(cls, text: str) -> "Rules":
+        if tomllib is None:
+            raise RulesError("reading .smartcommit.toml needs Python 3.11+ or the 'tomli' package")
+        try:
+            return cls.compile(tomllib.loads(text))
+        except tomllib.TOMLDecodeError as e:
+            raise RulesError(str(e))
+
+    @classmethod
+    def load(cls, repo_path: str, cache_file: str = None) -> "Rules":
+        """Rules for the repository, or empty Rules when it has no rules file."""
+        try:
+            with open(os.path.join(repo_path, RULES_FILE), "rb") as f:
+                raw = f.read()
+        except OSError:
+            return cls()
+
+        key = f"{CACHE_VERSION}:{hashlib.sha1(raw).hexdigest()}"
+        if cache_file is None:
+            cache_file = _cache_path(repo_path)
+        if cache_file:
+            try:
+                with open(cache_file, encoding="utf-8") as f:
+                    cached = json.load(f)
+                if cached.get("key") == key:
+                    return cls(cached["pattern"], cached["actions"], cached["fix_keywords"])
+            except (OSError, ValueError, KeyError):
+                pass
+
+        rules = cls.parse(raw.decode("utf-8", errors="replace"))
+        if cache_file:
+            try:
+                with open(cache_file, "w", encoding="utf-8") as f:
+                    json.dump({"key": key, "pattern": rules.pattern, "actions": rules.actions,
+                               "fix_keywords": rules.fix_keywords}, f)
+            except OSError:
+                pass
+        return rules
+
+
+def _cache_path(repo_path: str) -> str:
+    """CACHE_NAME in the git dir, or "" outside a repository."""
+    try:
+        git_path = subprocess.check_output(
+            ["git", "-C", repo_path, "rev-parse", "--git-path", CACHE_NAME],
+            stderr=subprocess.DEVNULL,
+        ).decode().strip()
+    except (subprocess.CalledProcessError, OSError):
+        return ""
+    return os.path.join(repo_path, git_path)
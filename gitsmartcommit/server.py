@@ -0,0 +1,322 @@
+"""
+Local HTTP service mode (stdlib only).
+
+    quickcommit serve --http --port 8765
+
+    POST /analyze[?branch=NAME]   raw diff body  → JSON analysis
+    GET  /metrics                 Prometheus text: latency histogram, counters
+    GET  /healthz                 "ok"
+
+`--rules FILE` applies a .smartcommit.toml to every request, since a posted
+diff carries no repository to read one from.
+
+Accepted connections go into a bounded queue drained by a fixed pool of
+worker threads.  When the queue is full the accept loop answers 503 on the
+spot instead of letting work pile up; requests that waited in the queue
+past their deadline get a 503 too, and bodies over the size limit get 413.
+
+The deadline bounds the time in the queue and the socket reads; a body
+that arrives after it is answered 503 without being analyzed.  Analysis
+itself is not interrupted once started.  An analysis that raises is
+answered 500 with the error, and the worker moves on.
+"""
+
+import json
+import queue
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from .analyzer import Analyzer
+from .generate_commit_message import parse_diff
+from .rules import Rules, RulesError
+
+
+DEFAULT_WORKERS = 4
+DEFAULT_QUEUE_SIZE = 64
+DEFAULT_MAX_BODY = 10 * 1024 * 1024
+DEFAULT_DEADLINE = 10.0
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# METRICS
+# ─────────────────────────────────────────────────────────────────────────────
+
+class Metrics:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._responses = {}
+        self.rejected = 0
+        self.in_flight = 0
+
+    def start(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def stop(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def observe(self, seconds: float, status: int):
+        with self._lock:
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    self._counts[i] += 1
+                    break
+            else:
+                self._counts[-1] += 1
+            self._sum += seconds
+            self._responses[status] = self._responses.get(status, 0) + 1
+
+    def reject(self, status: int):
+        with self._lock:
+            self.rejected += 1
+            self._responses[status] = self._responses.get(status, 0) + 1
+
+    def render(self, queue_depth: int) -> str:
+        with self._lock:
+            lines = [
+                "# HELP smartcommit_request_duration_seconds Time from accept to response for /analyze.",
+                "# TYPE smartcommit_request_duration_seconds histogram",
+            ]
+            cumulative = 0
+            for bound, n in zip(self.buckets, self._counts):
+                cumulative += n
+                lines.append(f'smartcommit_request_duration_seconds_bucket{{le="{bound}"}} {cumulative}')
+            cumulative += self._counts[-1]
+            lines.append(f'smartcommit_request_duration_seconds_bucket{{le="+Inf"}} {cumulative}')
+            lines.append(f"smartcommit_request_duration_seconds_sum {self._sum:.6f}")
+            lines.append(f"smartcommit_request_duration_seconds_count {cumulative}")
+            lines.append("# TYPE smartcommit_responses_total counter")
+            for status in sorted(self._responses):
+                lines.append(f'smartcommit_responses_total{{code="{status}"}} {self._responses[status]}')
+            lines.append("# TYPE smartcommit_rejected_total counter")
+            lines.append(f"smartcommit_rejected_total {self.rejected}")
+            lines.append("# TYPE smartcommit_queue_depth gauge")
+            lines.append(f"smartcommit_queue_depth {queue_depth}")
+            lines.append("# TYPE smartcommit_in_flight gauge")
+            lines.append(f"smartcommit_in_flight {self.in_flight}")
+        return "\n".join(lines) + "\n"
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# REQUEST HANDLER
+# ─────────────────────────────────────────────────────────────────────────────
+
+def analysis_payload(file_diffs: list, result: dict) -> dict:
+    files = result.get("_files", [])
+    tags = {}
+    for r in files:
+        tags[r["tag"]] = tags.get(r["tag"], 0) + 1
+    return {
+        "subject": result["subject"],
+        "files": files,
+        "counts": {
+            "files": len(files),
+            "added": sum(len(fd["added"]) for fd in file_diffs),
+            "removed": sum(len(fd["removed"]) for fd in file_diffs),
+            "tags": tags,
+        },
+    }
+
+
+class AnalysisHandler(BaseHTTPRequestHandler):
+    server_version = "smartcommit"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, obj: dict):
+        self._send(status, json.dumps(obj, ensure_ascii=False).encode("utf-8"))
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == "/metrics":
+            self._send(200, self.server.metrics.render(self.server.queue.qsize()).encode(),
+                       "text/plain; version=0.0.4")
+        elif path == "/healthz":
+            self._send(200, b"ok\n", "text/plain")
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path not in ("/analyze", "/"):
+            return self._finish(404, {"error": "not found"})
+
+        length = self.headers.get("Content-Length")
+        if length is None:
+            return self._finish(411, {"error": "Content-Length required"})
+        try:
+            length = int(length)
+        except ValueError:
+            return self._finish(400, {"error": "invalid Content-Length"})
+        if length < 0 or length > self.server.max_body:
+            self.close_connection = True
+            return self._finish(413, {"error": f"body exceeds {self.server.max_body} bytes"})
+
+        body = self.rfile.read(length)
+        if len(body) < length:
+            return self._finish(400, {"error": "truncated body"})
+
+        if time.monotonic() > self.server.local.accepted + self.server.deadline:
+            self.close_connection = True
+            return self._finish(503, {"error": "deadline exceeded"})
+
+        branch = parse_qs(url.query).get("branch", [""])[0]
+        try:
+            file_diffs = parse_diff(body.decode("utf-8", errors="replace"))
+            result = self.server.analyzer.analyze_files(file_diffs, branch)
+            payload = analysis_payload(file_diffs, result)
+        except Exception as e:
+            self.log_error("analysis failed: %s", e)
+            return self._finish(500, {"error": f"analysis failed: {type(e).__name__}: {e}"})
+        self._finish(200, payload)
+
+    def _finish(self, status: int, obj: dict):
+        # Observed before writing so the response never races its own metrics
+        self.server.metrics.observe(time.monotonic() - self.server.local.accepted, status)
+        self._send_json(status, obj)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# SERVER
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _raw_response(sock, status: int, reason: str, message: str):
+    body = json.dumps({"error": message}).encode()
+    head = (f"HTTP/1.0 {status} {reason}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\nRetry-After: 1\r\nConnection: close\r\n\r\n")
+    try:
+        sock.sendall(head.encode() + body)
+    except OSError:
+        pass
+
+
+class AnalysisServer(HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, workers: int = DEFAULT_WORKERS,
+                 queue_size: int = DEFAULT_QUEUE_SIZE, max_body: int = DEFAULT_MAX_BODY,
+                 deadline: float = DEFAULT_DEADLINE, analyzer=None, rules=None,
+                 verbose: bool = False):
+        super().__init__(address, AnalysisHandler)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.max_body = max_body
+        self.deadline = deadline
+        self.analyzer = analyzer or Analyzer(render=False, rules=rules)
+        self.metrics = Metrics()
+        self.verbose = verbose
+        self.local = threading.local()
+        self._workers = [
+            threading.Thread(target=self._work, name=f"smartcommit-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for t in self._workers:
+            t.start()
+
+    def process_request(self, request, client_address):
+        """Called by the accept loop: enqueue, or shed load when full."""
+        try:
+            self.queue.put_nowait((request, client_address, time.monotonic()))
+        except queue.Full:
+            # Counted before writing, like _finish, so clients never see it first
+            self.metrics.reject(503)
+            _raw_response(request, 503, "Service Unavailable", "server busy")
+            self.shutdown_request(request)
+
+    def _work(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            request, client_address, accepted = item
+            try:
+                remaining = accepted + self.deadline - time.monotonic()
+                if remaining <= 0:
+                    self.metrics.reject(503)
+                    _raw_response(request, 503, "Service Unavailable", "deadline exceeded in queue")
+                    continue
+                # Reading headers/body may not outlive the request's deadline
+                request.settimeout(remaining)
+                self.local.accepted = accepted
+                self.metrics.start()
+                try:
+                    self.finish_request(request, client_address)
+                finally:
+                    self.metrics.stop()
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    def handle_error(self, request, client_address):
+        if self.verbose:
+            super().handle_error(request, client_address)
+
+    def server_close(self):
+        super().server_close()
+        for _ in self._workers:
+            self.queue.put(None)
+        for t in self._workers:
+            t.join(timeout=1)
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765, **options):
+    server = AnalysisServer((host, port), **options)
+    print(f"  smartcommit serving on http://{host}:{server.server_address[1]}  (POST /analyze, GET /metrics)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv: list):
+    """`quickcommit serve --http ...`"""
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="quickcommit serve",
+                                     description="Serve commit analysis over local HTTP.")
+    parser.add_argument('--http', action='store_true', required=True,
+                        help="Serve over HTTP (the only transport)")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f"Analysis worker threads (default: {DEFAULT_WORKERS})")
+    parser.add_argument('--queue', type=int, default=DEFAULT_QUEUE_SIZE,
+                        help=f"Pending requests before answering 503 (default: {DEFAULT_QUEUE_SIZE})")
+    parser.add_argument('--max-body', type=int, default=DEFAULT_MAX_BODY,
+                        help="Largest accepted diff in bytes (default: 10 MiB)")
+    parser.add_argument('--deadline', type=float, default=DEFAULT_DEADLINE,
+                        help=f"Per-request deadline in seconds (default: {DEFAULT_DEADLINE:g})")
+    parser.add_argument('--rules', metavar='FILE',
+                        help="Apply this .smartcommit.toml to every request (diffs carry no repository)")
+    parser.add_argument('--verbose', '-v', action='store_true', help="Log every request")
+    args = parser.parse_args(argv)
+    rules = None
+    if args.rules:
+        try:
+            with open(args.rules, encoding="utf-8") as f:
+                rules = Rules.parse(f.read())
+        except (OSError, RulesError) as e:
+            print(f"Error: Invalid rules file {args.rules} — {e}")
+            sys.exit(1)
+    serve(args.host, args.port, workers=args.workers, queue_size=args.queue,
+          max_body=args.max_body, deadline=args.deadline, rules=rules, verbose=args.verbose)
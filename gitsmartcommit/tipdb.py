@@ -0,0 +1,122 @@
+"""
+sqlite databases in the git dir that cover history up to an indexed tip.
+
+HistoryIndex (historydb.py) and CoChangeGraph (cochange.py) both keep data
+derived from every commit reachable from a recorded tip and extend it with
+a `git log` of the commits since.  TipDB is what they share: the meta
+table (schema version, tip), the ancestry check, and walking a git log in
+one transaction that records the new tip only when git exited cleanly.  A
+failed, killed or truncated log rolls back, so the commits it missed are
+walked again next time.
+"""
+
+import os
+import sqlite3
+import subprocess
+import tempfile
+
+from .patchfile import iter_stream_lines
+
+
+META_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def git_output(path: str, *args) -> str:
+    return subprocess.check_output(
+        ["git", "-C", path] + list(args), stderr=subprocess.DEVNULL
+    ).decode("utf-8", errors="replace").strip()
+
+
+def db_path(repo_path: str, name: str) -> str:
+    """Location of database `name` in the (common) git dir."""
+    return os.path.join(repo_path, git_output(repo_path, "rev-parse", "--git-path", name))
+
+
+class TipDB:
+    DB_NAME = ""
+    SCHEMA = ""
+    SCHEMA_VERSION = 1
+    # Emptied by clear(), in this order
+    TABLES = ()
+
+    def __init__(self, repo_path: str, db_file: str = None):
+        self.repo_path = repo_path
+        self.db = sqlite3.connect(db_file or db_path(repo_path, self.DB_NAME))
+        self.db.execute("PRAGMA foreign_keys = ON")
+        self.db.executescript(META_SCHEMA + self.SCHEMA)
+        if self._meta("version") != self._version():
+            self.clear()
+
+    def _version(self) -> str:
+        """Stored in meta; a database written under another version is cleared."""
+        return str(self.SCHEMA_VERSION)
+
+    def _meta(self, key: str) -> str:
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else ""
+
+    def _set_meta(self, key: str, value: str):
+        self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def clear(self):
+        with self.db:
+            for table in self.TABLES:
+                self.db.execute(f"DELETE FROM {table}")
+            self.db.execute("DELETE FROM meta")
+            self._set_meta("version", self._version())
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ── incremental update ───────────────────────────────────────────────
+
+    @property
+    def tip(self) -> str:
+        return self._meta("tip")
+
+    def head(self) -> str:
+        """Commit id of HEAD, or "" in a repository without commits."""
+        try:
+            return git_output(self.repo_path, "rev-parse", "--verify", "HEAD")
+        except subprocess.CalledProcessError:
+            return ""
+
+    def _is_ancestor(self, old: str, new: str) -> bool:
+        return subprocess.call(
+            ["git", "-C", self.repo_path, "merge-base", "--is-ancestor", old, new],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        ) == 0
+
+    def _walk(self, cmd: list, head: str, consume, env=None) -> int:
+        """
+        Feed the output lines of `cmd` to `consume` (which returns a count)
+        and move the tip to `head`, all in one transaction.  If git fails
+        CalledProcessError is raised and nothing is kept.
+        """
+        # A file, not a pipe: git must never block on stderr while we read stdout
+        errors = tempfile.TemporaryFile()
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=errors, env=env)
+        try:
+            with self.db:
+                count = consume(iter_stream_lines(proc.stdout))
+                if proc.wait():
+                    errors.seek(0)
+                    err = errors.read().decode("utf-8", errors="replace").strip()
+                    raise subprocess.CalledProcessError(proc.returncode, cmd, stderr=err)
+                self._set_meta("tip", head)
+        finally:
+            proc.stdout.close()
+            proc.wait()
+            errors.close()
+        return count
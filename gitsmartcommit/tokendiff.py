@@ -0,0 +1,147 @@
+"""
+Token-level diff of small edits.
+
+classify() only sees unordered lists of added and removed lines, so a
+one-token edit reads as "Update logic in foo()".  For small file diffs
+the removed and added lines of each hunk are paired in order and compared
+token by token; when every pair differs by the same single token
+substitution the edit is named precisely:
+
+    Change TIMEOUT 30 → 60              constant with an assignment target
+    Change operator < → <=              operator
+    Rename total → subtotal             name, at two or more places
+    Change total → subtotal             name, at a single place
+    Change default retries 3 → 5        default argument
+
+Keywords (`return` → `yield`) and call targets (`foo(` → `bar(`) are not
+renames, and a literal with nothing to name it by (`echo "old"`) is left
+to the generic summary.  Only diffs of up to MAX_LINES removed and added
+lines are paired, so large diffs cost one length check.  Results are
+cached per line pair.
+"""
+
+import re
+from functools import lru_cache
+
+# Pair at most this many removed/added lines per file
+MAX_LINES = 6
+# Lines longer than this are not tokenized
+MAX_LINE_LEN = 200
+TOKEN_CACHE_SIZE = 4096
+# Constants are quoted at most this long in a summary
+SHOW_LEN = 24
+
+TOKEN_RE = re.compile(
+    r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|`[^`]*`'
+    r"|\d[\w.]*"
+    r"|[A-Za-z_]\w*"
+    r"|===|!==|==|!=|<=|>=|&&|\|\||\*\*|//|<<|>>|->|=>|\+=|-=|\*=|/=|[^\s\w]"
+)
+
+DEF_LINE_RE = re.compile(r"^\s*(?:(?:export|public|private|static|async)\s+)*(?:def|function|fn|func|fun)\b")
+ASSIGN_TARGET_RE = re.compile(r"^\s*(?:(?:const|let|var|final|static)\s+)*([\w.]+)\s*(?::[^=]+)?=(?!=)")
+
+# Reserved words of the common languages: swapping one is not a rename
+KEYWORDS = frozenset("""
+    and as assert async await break case catch class const continue def default defer
+    del delete do elif else enum except export extends final finally fn for from func
+    function go if impl import in instanceof interface is lambda let loop match mod mut
+    new not or package pass pub raise return static struct switch throw throws try type
+    typeof use var void while with yield
+""".split())
+
+
+def token_kind(token: str) -> str:
+    if token[0] in "\"'`" or token[0].isdigit() or token in ("True", "False", "None", "true", "false", "null", "nil"):
+        return "constant"
+    if token[0].isalpha() or token[0] == "_":
+        return "name"
+    return "operator"
+
+
+@lru_cache(maxsize=TOKEN_CACHE_SIZE)
+def token_change(old: str, new: str):
+    """
+    (kind, before, after, subject) when the lines differ by one token
+    substitution (possibly repeated), else None.  `subject` is the parameter
+    for a changed default argument or the assignment target for a constant.
+    """
+    if len(old) > MAX_LINE_LEN or len(new) > MAX_LINE_LEN:
+        return None
+    a, b = TOKEN_RE.findall(old), TOKEN_RE.findall(new)
+    if len(a) != len(b):
+        return None
+    found, first = None, -1
+    for i, (x, y) in enumerate(zip(a, b)):
+        if x != y:
+            if found is None:
+                found, first = (x, y), i
+            elif found != (x, y):
+                return None
+    if found is None:
+        return None
+    kind = token_kind(found[0])
+    if kind != token_kind(found[1]):
+        return None
+    if kind == "name" and (found[0] in KEYWORDS or found[1] in KEYWORDS):
+        return None
+    # A called name is a different function, not a renamed one
+    if kind == "name" and first + 1 < len(b) and b[first + 1] == "(" and not DEF_LINE_RE.match(new):
+        return None
+    subject = ""
+    if kind == "constant" and first >= 2 and b[first - 1] == "=" and DEF_LINE_RE.match(new):
+        kind, subject = "default", b[first - 2]
+    elif kind == "constant":
+        m = ASSIGN_TARGET_RE.match(new)
+        subject = m.group(1) if m else ""
+    return kind, found[0], found[1], subject
+
+
+def _show(token: str) -> str:
+    return token if len(token) <= SHOW_LEN else token[:SHOW_LEN - 1] + "…"
+
+
+def _pairs(fd: dict):
+    """(removed, added) line pairs within each hunk, or None when a hunk's sides differ in length."""
+    added, removed = fd["added"], fd["removed"]
+    hunks = fd.get("hunks") or []
+    if (not hunks or sum(h[1] for h in hunks) != len(removed)
+            or sum(h[3] for h in hunks) != len(added)):
+        hunks = [(0, len(removed), 0, len(added))]  # no hunk counts: one hunk
+    pairs, r, a = [], 0, 0
+    for _, old_count, _, new_count in hunks:
+        if old_count != new_count:
+            return None
+        pairs.extend(zip(removed[r:r + old_count], added[a:a + new_count]))
+        r += old_count
+        a += new_count
+    return pairs
+
+
+def micro_change(fd: dict, max_lines: int = MAX_LINES) -> str:
+    """Summary of a single-token edit ("Change operator < → <="), or ""."""
+    added, removed = fd["added"], fd["removed"]
+    if not added or len(added) != len(removed) or len(added) > max_lines:
+        return ""
+    change = None
+    for old, new in _pairs(fd) or ():
+        c = token_change(old, new)
+        if c is None or (change is not None and c[:3] != change[:3]):
+            return ""
+        change = change or c
+    if change is None:
+        return ""
+    kind, before, after, subject = change
+    pair = f"{_show(before)} → {_show(after)}"
+    if kind == "default":
+        return f"Change default {subject} {pair}"
+    if kind == "constant":
+        return f"Change {subject} {pair}" if subject else ""
+    if kind == "operator":
+        return f"Change operator {pair}"
+    # One changed reference may just point somewhere else; a rename shows
+    # up wherever the name is used
+    places = sum(x == before and y == after
+                 for old, new in _pairs(fd)
+                 for x, y in zip(TOKEN_RE.findall(old), TOKEN_RE.findall(new)))
+    return f"Rename {pair}" if places >= 2 else f"Change {pair}"
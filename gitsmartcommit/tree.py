@@ -0,0 +1,108 @@
+"""
+Directory roll-ups for large change sets.
+
+Per-file results go into a path trie; every directory node accumulates the
+file count, tag counts, line counts and (a capped sample of) the names
+defined beneath it.  Each file touches only the nodes on its own path, so
+building the tree is linear in the number of files.
+
+    root = build_tree(file_diffs, results)
+    node = focus(root)          # deepest directory holding most of the change
+    aggregate_subject(node, root.files)   # "Refactor services/billing (214 files)"
+"""
+
+from .generate_commit_message import TAG_PRIORITY, find_defined_names
+
+
+# A directory is the focus when it holds at least this share of the files
+FOCUS_SHARE = 0.6
+# Defined names kept per directory node
+NAMES_PER_NODE = 8
+
+TAG_VERB = {
+    "[ADD]": "Add",
+    "[FIX]": "Fix",
+    "[UPDATE]": "Update",
+    "[REFACTOR]": "Refactor",
+    "[STYLE]": "Restyle",
+    "[DOCS]": "Document",
+    "[CONFIG]": "Configure",
+    "[TEST]": "Test",
+    "[RENAME]": "Move files in",
+    "[REMOVE]": "Remove from",
+    "[CHORE]": "Update",
+}
+
+
+class PathNode:
+    __slots__ = ("path", "children", "files", "added", "removed", "tags", "names")
+
+    def __init__(self, path: str = ""):
+        self.path = path
+        self.children = {}
+        self.files = 0
+        self.added = 0
+        self.removed = 0
+        self.tags = {}
+        self.names = []
+
+    def add(self, tag: str, added: int, removed: int, names: list):
+        self.files += 1
+        self.added += added
+        self.removed += removed
+        self.tags[tag] = self.tags.get(tag, 0) + 1
+        room = NAMES_PER_NODE - len(self.names)
+        if room > 0 and names:
+            self.names.extend(names[:room])
+
+    def dominant_tag(self, priority=TAG_PRIORITY) -> str:
+        """Most common tag underneath; ties go to the higher-priority tag."""
+        rank = {tag: i for i, tag in enumerate(priority)}
+        return min(self.tags, key=lambda t: (-self.tags[t], rank.get(t, len(rank))))
+
+    def walk(self):
+        """This node and every directory below it, parents first."""
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(node.children.values())
+
+
+def build_tree(file_diffs: list, results: list, names: bool = True) -> PathNode:
+    root = PathNode()
+    for fd, info in zip(file_diffs, results):
+        defined = find_defined_names(fd["added"]) if names else []
+        added, removed = len(fd["added"]), len(fd["removed"])
+        node = root
+        node.add(info["tag"], added, removed, defined)
+        parts = fd["path"].split("/")[:-1]
+        for i, part in enumerate(parts):
+            child = node.children.get(part)
+            if child is None:
+                child = node.children[part] = PathNode("/".join(parts[:i + 1]))
+            child.add(info["tag"], added, removed, defined)
+            node = child
+    return root
+
+
+def focus(root: PathNode, share: float = FOCUS_SHARE) -> PathNode:
+    """
+    Descend from the root while a single subdirectory still holds at least
+    `share` of all changed files.  Returns the root when nothing dominates.
+    """
+    need = root.files * share
+    node = root
+    while node.children:
+        child = max(node.children.values(), key=lambda c: c.files)
+        if child.files < need:
+            break
+        node = child
+    return node
+
+
+def aggregate_subject(node: PathNode, total: int, priority=TAG_PRIORITY) -> tuple:
+    """(tag, subject body) for a focus directory, e.g. "Refactor services/billing (214 files)"."""
+    tag = node.dominant_tag(priority)
+    count = f"{node.files} files" if node.files == total else f"{node.files} of {total} files"
+    return tag, f"{TAG_VERB.get(tag, 'Update')} {node.path} ({count})"
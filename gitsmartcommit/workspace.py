@@ -0,0 +1,183 @@
+"""
+Workspace package boundaries for monorepos.
+
+A package is a directory holding one of MANIFESTS; every path belongs to
+the package of its nearest enclosing manifest.  The index is built from
+`git ls-files` limited to manifest names, so git never lists the rest of
+the tree, and is cached in the git dir keyed by the manifests' blob ids:
+as long as no manifest is added, removed or edited the names are reused
+without reading a single manifest.  Names are read from those same index
+blobs, not the working tree, so an unstaged manifest edit cannot end up
+cached under the staged version's key.  In a partial clone a manifest
+blob that is not local is never fetched: its package is named after its
+directory and the index is not cached, so the name is read once it is.
+
+    index = PackageIndex.load(repo)
+    index.package_of("services/billing/api/charge.py")   # "billing-api"
+
+The repository root's own manifest does not count as a package: in a
+workspace it is the workspace, and in a single-package repository there is
+nothing to split, so callers fall back to their old behaviour.
+"""
+
+import hashlib
+import json
+import os
+import re
+import subprocess
+
+from .objects import ObjectNotFound, ObjectStore
+from .partial import is_partial_clone
+
+
+MANIFESTS = ("package.json", "pyproject.toml", "go.mod", "Cargo.toml")
+CACHE_NAME = "smartcommit-packages.json"
+
+TOML_SECTION_RE = re.compile(r"^\s*\[([^\]]+)\]\s*$")
+TOML_NAME_RE = re.compile(r"""^\s*name\s*=\s*["']([^"']+)["']""")
+GO_MODULE_RE = re.compile(r"^\s*module\s+(\S+)")
+
+# Sections whose `name` is the package name
+TOML_NAME_SECTIONS = {"project", "package", "tool.poetry"}
+
+# Per-process cache: repo path → (key, PackageIndex)
+_loaded = {}
+
+
+def _git(path: str, *args) -> bytes:
+    return subprocess.check_output(["git", "-C", path] + list(args), stderr=subprocess.DEVNULL)
+
+
+def manifest_name(filename: str, text: str) -> str:
+    """Package name declared by a manifest's text, or "" if there is none."""
+    if filename == "package.json":
+        try:
+            name = json.loads(text).get("name", "")
+        except (ValueError, AttributeError):
+            return ""
+        # "@org/billing-api" → "billing-api"
+        return name.rsplit("/", 1)[-1] if isinstance(name, str) else ""
+    if filename == "go.mod":
+        for line in text.splitlines():
+            m = GO_MODULE_RE.match(line)
+            if m:
+                return m.group(1).rstrip("/").rsplit("/", 1)[-1]
+        return ""
+    section = ""
+    for line in text.splitlines():
+        m = TOML_SECTION_RE.match(line)
+        if m:
+            section = m.group(1).strip()
+            continue
+        if section in TOML_NAME_SECTIONS:
+            m = TOML_NAME_RE.match(line)
+            if m:
+                return m.group(1)
+    return ""
+
+
+class PackageIndex:
+    def __init__(self, packages: dict = None):
+        # directory ("a/b", never "") → package name
+        self.packages = packages or {}
+        # Manifests whose blobs could not be read: their names are unknown
+        self.missing = []
+
+    def __len__(self):
+        return len(self.packages)
+
+    def package_dir(self, path: str) -> str:
+        """Directory of the package owning `path`, or "" for none; one probe per level."""
+        d = path
+        while True:
+            i = d.rfind("/")
+            if i < 0:
+                return ""
+            d = d[:i]
+            if d in self.packages:
+                return d
+
+    def package_of(self, path: str) -> str:
+        d = self.package_dir(path)
+        return self.packages[d] if d else ""
+
+    # ── building / caching ───────────────────────────────────────────────
+
+    @staticmethod
+    def manifest_entries(repo_path: str) -> list:
+        """[(blob id, path)] for every tracked manifest below the root."""
+        specs = [f":(glob)**/{name}" for name in MANIFESTS]
+        out = _git(repo_path, "ls-files", "-s", "-z", "--", *specs).decode("utf-8", errors="replace")
+        entries = []
+        for rec in out.split("\0"):
+            if not rec:
+                continue
+            meta, path = rec.split("\t", 1)
+            if "/" in path:
+                entries.append((meta.split()[1], path))
+        return entries
+
+    @classmethod
+    def build(cls, repo_path: str, entries: list, partial: bool = None) -> "PackageIndex":
+        """Index of `entries`; in a partial clone (`partial`) `git cat-file` is never asked."""
+        if partial is None:
+            partial = is_partial_clone(repo_path)
+        packages, missing = {}, []
+        with ObjectStore.open(repo_path, fallback=not partial) as store:
+            for oid, path in entries:
+                directory, filename = path.rsplit("/", 1)
+                try:
+                    name = manifest_name(filename, store.read_text(oid))
+                except (ObjectNotFound, OSError):
+                    name = ""
+                    missing.append(path)
+                # Several manifests in one directory: the first with a name wins
+                if not packages.get(directory):
+                    packages[directory] = name
+        for directory, name in packages.items():
+            if not name:
+                packages[directory] = directory.rsplit("/", 1)[-1]
+        index = cls(packages)
+        index.missing = missing
+        return index
+
+    @classmethod
+    def load(cls, repo_path: str, cache_file: str = None) -> "PackageIndex":
+        """Index for the repository, rebuilt only when its manifests changed."""
+        try:
+            entries = cls.manifest_entries(repo_path)
+            if cache_file is None:
+                git_path = _git(repo_path, "rev-parse", "--git-path", CACHE_NAME).decode().strip()
+                cache_file = os.path.join(repo_path, git_path)
+        except (subprocess.CalledProcessError, OSError):
+            return cls()
+
+        key = hashlib.sha1("\n".join(f"{oid} {p}" for oid, p in entries).encode()).hexdigest()
+        hit = _loaded.get(repo_path)
+        if hit and hit[0] == key:
+            return hit[1]
+
+        index = None
+        try:
+            with open(cache_file, encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached.get("key") == key:
+                index = cls(cached["packages"])
+        except (OSError, ValueError, KeyError):
+            pass
+
+        if index is None:
+            try:
+                index = cls.build(repo_path, entries)
+            except (subprocess.CalledProcessError, OSError):
+                return cls()
+            if index.missing:
+                return index  # not cached: the names are read once the blobs are local
+            try:
+                with open(cache_file, "w", encoding="utf-8") as f:
+                    json.dump({"key": key, "packages": index.packages}, f)
+            except OSError:
+                pass
+
+        _loaded[repo_path] = (key, index)
+        return index
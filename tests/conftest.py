@@ -0,0 +1,31 @@
+import subprocess
+import pytest
+
+
+def _git(repo, *args):
+    return subprocess.check_output(["git", "-C", str(repo)] + list(args)).decode().strip()
+
+
+@pytest.fixture
+def git():
+    return _git
+
+
+@pytest.fixture
+def repo(tmp_path):
+    _git(tmp_path, "init", "-q", "-b", "main")
+    _git(tmp_path, "config", "user.email", "t@example.com")
+    _git(tmp_path, "config", "user.name", "t")
+    return tmp_path
+
+
+@pytest.fixture
+def commit_file(git):
+    def commit(repo, name, text, msg="c"):
+        path = repo / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+        git(repo, "add", name)
+        git(repo, "commit", "-qm", msg)
+        return git(repo, "rev-parse", "HEAD")
+    return commit
@@ -0,0 +1,43 @@
+import asyncio
+import pytest
+from gitsmartcommit.aio import AsyncAnalyzer, GitError, analyze_repo
+
+
+def test_analyze_repo_staged(repo, git, commit_file):
+    commit_file(repo, "app.py", "def run():\n    return 1\n")
+    (repo / "app.py").write_text("def run():\n    return 1\n\ndef stop():\n    pass\n")
+    git(repo, "add", "app.py")
+    result = asyncio.run(analyze_repo(str(repo)))
+    assert result["source"] == "staged"
+    assert "[ADD][main] Add stop" in result["subject"]
+
+
+def test_analyze_repo_falls_back_to_unstaged(repo, commit_file):
+    commit_file(repo, "notes.md", "# Notes\n")
+    (repo / "notes.md").write_text("# Notes\nmore\n")
+    result = asyncio.run(analyze_repo(str(repo), branch="feature"))
+    assert result["source"] == "unstaged"
+    assert result["subject"] == "[DOCS][feature] Update notes documentation"
+
+
+def test_not_a_repository(tmp_path):
+    with pytest.raises(GitError):
+        asyncio.run(analyze_repo(str(tmp_path)))
+
+
+def test_limiter_and_cancellation(repo, git, commit_file):
+    commit_file(repo, "a.py", "x = 1\n")
+    (repo / "a.py").write_text("x = 2\n")
+
+    async def main():
+        analyzer = AsyncAnalyzer(max_concurrency=2)
+        results = await asyncio.gather(*(analyzer.analyze(str(repo)) for _ in range(5)))
+        assert len({r["subject"] for r in results}) == 1
+
+        task = asyncio.ensure_future(analyzer.analyze(str(repo)))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
@@ -0,0 +1,59 @@
+import threading
+from gitsmartcommit.analyzer import Analyzer
+from gitsmartcommit.generate_commit_message import create_commit_message
+
+
+def history_diffs(repo, git, commit_file):
+    commit_file(repo, "app.py", "def run():\n    return 1\n")
+    commit_file(repo, "app.py", "def run():\n    return 2\n\ndef stop():\n    pass\n")
+    commit_file(repo, "README.md", "# Title\n")
+    commit_file(repo, "style.css", ".a { color: red; }\n")
+    commit_file(repo, "style.css", ".a { color: blue; }\n.b { margin: 0; }\n")
+    shas = git(repo, "rev-list", "--reverse", "HEAD").split()
+    return [git(repo, "show", "--format=", "--full-index", "-U0", sha) for sha in shas]
+
+
+def test_matches_module_functions(repo, git, commit_file):
+    diffs = history_diffs(repo, git, commit_file)
+    analyzer = Analyzer()
+    for diff, result in zip(diffs, analyzer.analyze_many(diffs, "main")):
+        expected = create_commit_message(diff, "main")
+        assert result["subject"] == expected["subject"]
+        assert result["display"] == expected["display"]
+        assert result["_files"] == expected["_files"]
+
+
+def test_cache_reused_across_calls(repo, git, commit_file):
+    diffs = history_diffs(repo, git, commit_file)
+    analyzer = Analyzer(render=False)
+    first = analyzer.analyze_many(diffs)
+    assert analyzer.hits == 0
+    second = analyzer.analyze_many(diffs)
+    assert analyzer.hits == len(diffs)
+    assert [r["subject"] for r in first] == [r["subject"] for r in second]
+    assert first[0]["display"] == ""
+    # cached entries are copies — callers may mutate their results
+    second[0]["_files"][0]["summary"] = "changed"
+    assert analyzer.analyze(diffs[0])["_files"][0]["summary"] != "changed"
+    details = analyzer.analyze(diffs[1])["_files"][0]["details"]
+    details.append("mutated")
+    assert "mutated" not in analyzer.analyze(diffs[1])["_files"][0]["details"]
+
+
+def test_shared_across_threads(repo, git, commit_file):
+    diffs = history_diffs(repo, git, commit_file)
+    analyzer = Analyzer(render=False, cache_size=2)
+    expected = [r["subject"] for r in analyzer.analyze_many(diffs)]
+    errors = []
+
+    def work():
+        for _ in range(20):
+            if [r["subject"] for r in analyzer.analyze_many(diffs)] != expected:
+                errors.append(1)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
@@ -0,0 +1,66 @@
+import subprocess
+from gitsmartcommit.batch import repos_from, run_batch
+
+
+def make_repo(path, staged=None):
+    path.mkdir()
+    subprocess.check_call(["git", "-C", str(path), "init", "-q"])
+    if staged:
+        (path / staged).write_text("def hello():\n    pass\n")
+        subprocess.check_call(["git", "-C", str(path), "add", staged])
+    return path
+
+
+def test_repos_from_file_and_glob(tmp_path):
+    make_repo(tmp_path / "one")
+    make_repo(tmp_path / "two")
+    (tmp_path / "not-a-repo").mkdir()
+    listing = tmp_path / "repos.txt"
+    listing.write_text("# services\none\n\ntwo\n")
+    assert repos_from(str(listing)) == [str(tmp_path / "one"), str(tmp_path / "two")]
+    assert repos_from(str(tmp_path / "*")) == [str(tmp_path / "one"), str(tmp_path / "two")]
+
+
+def test_run_batch_statuses(tmp_path):
+    dirty = make_repo(tmp_path / "dirty", staged="hello.py")
+    clean = make_repo(tmp_path / "clean")
+    missing = tmp_path / "missing"
+    records = {r["repo"]: r for r in run_batch([str(dirty), str(clean), str(missing)], threads=2)}
+    assert records[str(dirty)]["status"] == "ok"
+    assert records[str(dirty)]["subject"].startswith("[ADD]")
+    assert records[str(dirty)]["source"] == "staged"
+    assert records[str(clean)]["status"] == "clean"
+    assert records[str(missing)]["status"] == "error"
+
+
+def test_run_batch_uses_each_repos_rules(tmp_path):
+    plain = make_repo(tmp_path / "plain", staged="hello.py")
+    ruled = make_repo(tmp_path / "ruled", staged="hello.py")
+    (ruled / ".smartcommit.toml").write_text('[[rule]]\nglob = "hello.py"\ntag = "[CONFIG]"\n')
+    records = {r["repo"]: r for r in run_batch([str(plain), str(ruled)], threads=2)}
+    assert records[str(plain)]["subject"].startswith("[ADD]")
+    assert records[str(ruled)]["subject"].startswith("[CONFIG]")
+
+
+def test_run_batch_timeout(tmp_path):
+    dirty = make_repo(tmp_path / "dirty", staged="hello.py")
+    [rec] = run_batch([str(dirty)], timeout=0)
+    assert rec["status"] == "timeout"
+
+
+def test_run_batch_isolates_analysis_errors(tmp_path, monkeypatch):
+    from gitsmartcommit import batch
+    good = make_repo(tmp_path / "good", staged="hello.py")
+    bad = make_repo(tmp_path / "bad", staged="boom.py")
+    real = batch.analyze
+
+    def analyze(diff, branch, rules=None, files=None):
+        if "boom.py" in diff:
+            raise UnicodeError("bad bytes")
+        return real(diff, branch, rules, files)
+
+    monkeypatch.setattr(batch, "analyze", analyze)
+    records = {r["repo"]: r for r in run_batch([str(good), str(bad)], threads=2)}
+    assert records[str(good)]["status"] == "ok"
+    assert records[str(bad)]["status"] == "error"
+    assert records[str(bad)]["error"] == "UnicodeError: bad bytes"
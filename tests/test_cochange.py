@@ -0,0 +1,116 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from gitsmartcommit.cochange import CoChangeGraph, suggest_groups
+from gitsmartcommit.generate_commit_message import describe_file
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def commit_files(repo, git, files, msg="c"):
+    for name, text in files.items():
+        path = repo / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+        git(repo, "add", name)
+    git(repo, "commit", "-qm", msg)
+
+
+def make_fd(path, added, removed=()):
+    return {
+        "path": path, "old_path": path, "added": list(added), "removed": list(removed), "hunk_ctx": [],
+        "is_new": False, "is_deleted": False, "is_rename": False, "is_binary": False,
+    }
+
+
+def test_incremental_graph_and_coupling(repo, git):
+    for n in range(3):
+        commit_files(repo, git, {"api/routes.py": f"v = {n}\n", "web/client.js": f"v = {n};\n"})
+    commit_files(repo, git, {"docs/guide.md": "hi\n"})
+
+    with CoChangeGraph(str(repo)) as graph:
+        assert graph.update() == 4
+        assert graph.update() == 0
+        assert graph.coupling(["api/routes.py", "web/client.js", "docs/guide.md"]) == {
+            ("api/routes.py", "web/client.js"): 1.0}
+
+    commit_files(repo, git, {"api/routes.py": "v = 9\n"})
+    with CoChangeGraph(str(repo)) as graph:
+        assert graph.update() == 1
+        assert graph.coupling(["api/routes.py", "web/client.js"]) == {
+            ("api/routes.py", "web/client.js"): 1.0}  # 3 shared / 3 commits of the rarer file
+
+    # A rewritten history is rebuilt
+    git(repo, "reset", "-q", "--hard", "HEAD~2")
+    with CoChangeGraph(str(repo)) as graph:
+        assert graph.update() == 3
+
+
+def test_neighbours_are_pruned_to_top_k(repo, git):
+    for n in range(6):
+        commit_files(repo, git, {"hub.py": f"v = {n}\n", f"spoke{n}.py": "x\n"})
+    commit_files(repo, git, {"hub.py": "v = 0\n", "spoke0.py": "y\n"})
+    with CoChangeGraph(str(repo), top_k=3) as graph:
+        graph.update()
+        assert graph.degree("hub.py") == 3
+        assert ("hub.py", "spoke0.py") in graph.coupling(["hub.py", "spoke0.py"])
+
+
+def test_suggest_groups_uses_history_directories_and_tags():
+    class Graph:
+        def coupling(self, paths):
+            return {("api/routes.py", "web/client.js"): 0.3}
+
+    fds = [
+        make_fd("api/routes.py", ["x = compute(2)"], ["x = compute(1)"]),
+        make_fd("docs/guide.md", ["More words"]),
+        make_fd("web/client.js", ["y = compute(2)"], ["y = compute(1)"]),
+        make_fd("docs/faq.md", ["Answer"]),
+        make_fd("scripts/deploy.sh", ["echo deploy"]),
+    ]
+    results = [describe_file(fd) for fd in fds]
+    assert suggest_groups(fds, results, Graph()) == [[0, 2], [1, 3], [4]]
+    assert suggest_groups(fds, results) == [[1, 3], [0], [2], [4]]
+
+
+def test_cli_split(repo, git):
+    commit_files(repo, git, {"api/routes.py": "v = 0\n", "web/client.js": "v = 0;\n", "docs/guide.md": "v0\n"})
+    for n in range(1, 3):
+        commit_files(repo, git, {"api/routes.py": f"v = {n}\n", "web/client.js": f"v = {n};\n"})
+        commit_files(repo, git, {"docs/guide.md": f"v{n}\n"})
+    (repo / "api/routes.py").write_text("v = 5\n")
+    (repo / "web/client.js").write_text("v = 5;\n")
+    (repo / "docs/guide.md").write_text("new\n")
+    git(repo, "add", "-A")
+
+    out = subprocess.run([sys.executable, "-m", "gitsmartcommit.git", "--path", str(repo), "--split"],
+                         cwd=ROOT, capture_output=True, text=True)
+    assert out.returncode == 0, out.stdout + out.stderr
+    assert "Suggested split: 2 commits" in out.stdout
+    assert "git add -- api/routes.py web/client.js" in out.stdout
+    assert "git add -- docs/guide.md" in out.stdout
+
+
+def test_failed_git_log_keeps_old_tip(repo, git, monkeypatch):
+    import pytest
+    from gitsmartcommit import cochange
+
+    commit_files(repo, git, {"a.py": "1\n", "b.py": "1\n"})
+    with CoChangeGraph(str(repo)) as graph:
+        graph.update()
+        tip = graph.tip
+    commit_files(repo, git, {"a.py": "2\n", "b.py": "2\n"})
+
+    real = cochange.log_command
+    monkeypatch.setattr(cochange, "log_command",
+                        lambda path, rev_range: ["sh", "-c", '"$@"; exit 1', "sh"] + real(path, rev_range))
+    with CoChangeGraph(str(repo)) as graph:
+        with pytest.raises(subprocess.CalledProcessError):
+            graph.update()
+        assert graph.tip == tip
+        assert graph.coupling(["a.py", "b.py"]) == {("a.py", "b.py"): 1.0}  # 1 shared / 1 commit
+
+    monkeypatch.setattr(cochange, "log_command", real)
+    with CoChangeGraph(str(repo)) as graph:
+        assert graph.update() == 1
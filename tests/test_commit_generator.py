@@ -200,6 +200,18 @@ index 123..456
     assert "[UPDATE]" in result["subject"]
     assert "Update script" in result["subject"]
 
+def test_update_single_token():
+    diff = """diff --git a/script.sh b/script.sh
+index 123..456
+--- a/script.sh
++++ b/script.sh
+@@ -1 +1 @@
+-RETRIES=3
++RETRIES=5
+"""
+    result = create_commit_message(diff)
+    assert result["subject"].startswith("[UPDATE] Change RETRIES 3 → 5 in script")
+
 def test_multiple_files():
     diff = """diff --git a/file1.py b/file1.py
 new file mode 100644
@@ -322,4 +334,35 @@ def test_invalid_path_language():
 def test_skip_names_in_defs():
     fd = make_fd("app.py", added=["def if(): pass"])  # Invalid but skip
     names = find_defined_names(fd["added"])
-    assert not names  # Skipped 'if'
\ No newline at end of file
+    assert not names  # Skipped 'if'
+
+
+def test_pathspecs_from_include_exclude():
+    from gitsmartcommit.git import pathspecs
+    assert pathspecs() == []
+    assert pathspecs(["src/**"], ["*.lock"]) == ["--", ":(glob)src/**", ":(glob,exclude)**/*.lock"]
+
+
+def test_exclude_glob_matches_nested_files(repo, git):
+    from gitsmartcommit.git import git_diff
+    (repo / "sub" / "pkg").mkdir(parents=True)
+    (repo / "sub" / "pkg" / "yarn.lock").write_text("lock\n")
+    (repo / "yarn.lock").write_text("lock\n")
+    (repo / "app.py").write_text("x = 1\n")
+    git(repo, "add", "-A")
+    diff = git_diff(str(repo), exclude=["*.lock"])
+    assert "app.py" in diff and ".lock" not in diff
+
+
+def test_classify_path_record():
+    from gitsmartcommit.generate_commit_message import (
+        classify_path, PATH_TEST, PATH_CONFIG, PATH_DEPS, PATH_DOC,
+    )
+    info = classify_path("src/tests/test_api.py")
+    assert (info.name, info.ext, info.module, info.lang, info.icon) == ("test_api.py", ".py", "test_api", "Python", "🐍")
+    assert info.flags == PATH_TEST
+    assert classify_path("package.json").flags == PATH_CONFIG | PATH_DEPS
+    assert classify_path("docs/Guide.MD").flags == PATH_DOC
+    assert classify_path("Makefile").module == "Makefile"
+    # Cached: the same record comes back for the same path
+    assert classify_path("src/tests/test_api.py") is info
@@ -0,0 +1,119 @@
+import io
+import subprocess
+from gitsmartcommit.history import SENTINEL, split_commits, run_range
+from gitsmartcommit.rules import Rules
+
+
+def test_split_commits_stream():
+    lines = [
+        SENTINEL + "a" * 40 + "\x1fDev <d@x>\x1f2024-01-01T00:00:00+00:00\x1fFirst",
+        "",
+        "diff --git a/x.py b/x.py",
+        "+x = 1",
+        SENTINEL + "b" * 40 + "\x1fDev <d@x>\x1f2024-01-02T00:00:00+00:00\x1fSecond",
+    ]
+    commits = list(split_commits(iter(lines)))
+    assert [c["subject"] for c in commits] == ["First", "Second"]
+    assert commits[0]["lines"][-1] == "+x = 1"
+    assert commits[1]["lines"] == []
+
+
+def test_run_range_ndjson_in_order(repo, git, commit_file):
+    import json
+    commit_file(repo, "a.py", "def alpha():\n    return 1\n", "one")
+    for i in range(4):
+        commit_file(repo, f"m{i}.py", f"def mod{i}():\n    pass\n", f"add m{i}")
+
+    serial, pooled = io.StringIO(), io.StringIO()
+    assert run_range(str(repo), "HEAD~4..HEAD", 0, serial) == 4
+    assert run_range(str(repo), "HEAD~4..HEAD", 2, pooled) == 4
+    assert serial.getvalue() == pooled.getvalue()
+
+    records = [json.loads(l) for l in serial.getvalue().splitlines()]
+    assert [r["original"] for r in records] == ["add m3", "add m2", "add m1", "add m0"]
+    assert records[0]["files"][0]["path"] == "m3.py"
+    assert records[0]["subject"].startswith("[ADD]")
+
+
+def test_run_range_applies_rules(repo, git, commit_file):
+    import json
+    commit_file(repo, "api/user.pb.go", "package api\n", "gen")
+    rules = Rules.parse('[[rule]]\nglob = "*.pb.go"\ngenerated = true\n')
+    for jobs in (0, 2):
+        out = io.StringIO()
+        run_range(str(repo), "HEAD", jobs, out, rules)
+        assert json.loads(out.getvalue())["subject"] == "[CHORE] Regenerate user.pb.go"
+
+
+def test_run_range_survives_chatty_stderr(repo, git, commit_file, monkeypatch):
+    from gitsmartcommit import history
+    commit_file(repo, "a.py", "x = 1\n", "one")
+    real = history.log_command
+    # More warnings than a pipe buffer holds, before any stdout
+    monkeypatch.setattr(history, "log_command", lambda *a: [
+        "sh", "-c", 'head -c 300000 /dev/zero | tr "\\0" w >&2; exec "$@"', "sh"] + real(*a))
+    out = io.StringIO()
+    assert run_range(str(repo), "HEAD", 0, out) == 1
+
+
+def test_combined_diff_keeps_only_resolution_lines():
+    from gitsmartcommit.generate_commit_message import parse_diff
+    p1, p2, res = "1" * 40, "2" * 40, "3" * 40
+    files = parse_diff("\n".join([
+        "diff --cc app.py",
+        f"index {p1},{p2}..{res}",
+        "--- a/app.py",
+        "+++ b/app.py",
+        "@@@ -2,1 -2,1 +2,1 @@@ def run():",
+        "-    return 3",
+        " -    return 2",
+        "++    return 5",
+        "@@@ -9,1 -9,1 +9,0 @@@",
+        "--old = True",
+        "diff --cc side.py",
+        f"index {p1},{p2}..{res}",
+        "@@@ -1,1 -1,0 +1,1 @@@",
+        "- x = 1",
+        " +x = 2",
+        "diff --git a/b.py b/b.py",
+        "+y = 1",
+    ]))
+    assert [fd["path"] for fd in files] == ["app.py", "b.py"]  # side.py only took one side
+    app = files[0]
+    assert app["combined"] and app["parents"] == [p1, p2]
+    assert app["added"] == ["    return 5"] and app["removed"] == ["old = True"]
+    assert app["hunks"] == [(2, 1, 2, 1), (9, 1, 9, 0)] and app["hunk_ctx"] == ["def run():"]
+    assert files[1]["added"] == ["y = 1"] and "combined" not in files[1]
+
+
+def test_merges_in_history(repo, git, commit_file):
+    import json
+    commit_file(repo, "app.py", "def run():\n    return 1\n", "init")
+    git(repo, "checkout", "-q", "-b", "feature")
+    commit_file(repo, "app.py", "def run():\n    return 2\n", "feature change")
+    commit_file(repo, "api.py", "def get():\n    return 1\n", "add api")
+    git(repo, "checkout", "-q", "main")
+    commit_file(repo, "other.py", "x = 1\n", "main moves on")
+    git(repo, "merge", "-q", "--no-edit", "feature")
+    clean = git(repo, "rev-parse", "HEAD")
+
+    git(repo, "checkout", "-q", "-b", "fix", "feature")
+    commit_file(repo, "app.py", "def run():\n    return 3\n", "fix branch")
+    git(repo, "checkout", "-q", "main")
+    commit_file(repo, "app.py", "def run():\n    return 4\n", "main branch")
+    subprocess.run(["git", "-C", str(repo), "merge", "-q", "fix"], capture_output=True)
+    (repo / "app.py").write_text("def run():\n    return 3 + 4\n\n\ndef check():\n    return True\n")
+    git(repo, "commit", "-qam", "Merge branch 'fix'")
+
+    out = io.StringIO()
+    run_range(str(repo), f"{clean}~1..HEAD", 0, out)
+    records = {r["original"]: r for r in map(json.loads, out.getvalue().splitlines())}
+    merged = records["Merge branch 'feature'"]
+    assert merged["merge"] and merged["files"] == []
+    assert merged["subject"] == "[CHORE] Merge branch 'feature'"
+
+    resolved = records["Merge branch 'fix'"]
+    assert resolved["merge"] and [f["path"] for f in resolved["files"]] == ["app.py"]
+    assert resolved["files"][0]["names"] == ["check"]
+    assert (resolved["added"], resolved["removed"]) == (5, 0)
+    assert not records["fix branch"]["merge"]
@@ -0,0 +1,65 @@
+from gitsmartcommit.historydb import HistoryIndex
+
+
+def test_incremental_index_and_rewrite(repo, git, commit_file):
+    commit_file(repo, "app.py", "def run():\n    return 1\n", "add app")
+    commit_file(repo, "app.py", "def run():\n    return 2\n\ndef stop():\n    pass\n", "add stop")
+
+    with HistoryIndex(str(repo)) as index:
+        assert index.update() == 2
+        assert index.update() == 0
+        assert index.tag_counts() == {"[ADD]": 2}
+        newest = index.file_history("app.py")[0]
+        assert newest["names"] == ["stop"]
+
+    commit_file(repo, "b.py", "x = 1\n", "add b")
+    with HistoryIndex(str(repo)) as index:
+        assert index.update() == 1
+        assert index.commit_count() == 3
+
+    # Rewrite the last two commits: the orphaned ones must disappear
+    git(repo, "reset", "-q", "--hard", "HEAD~2")
+    commit_file(repo, "c.py", "y = 2\n", "add c")
+    with HistoryIndex(str(repo)) as index:
+        assert index.update() == 1
+        assert index.commit_count() == 2
+        assert index.file_history("b.py") == []
+        assert [p for p, *_ in index.hot_files()] == ["app.py", "c.py"]
+
+
+def test_failed_git_log_keeps_old_tip(repo, commit_file, monkeypatch):
+    import pytest
+    import subprocess
+    from gitsmartcommit import historydb
+
+    commit_file(repo, "app.py", "x = 1\n", "one")
+    with HistoryIndex(str(repo)) as index:
+        index.update()
+        tip = index.tip
+    commit_file(repo, "app.py", "x = 2\n", "two")
+    commit_file(repo, "app.py", "x = 3\n", "three")
+
+    # git writes the commits, then dies
+    real = historydb.log_command
+    monkeypatch.setattr(historydb, "log_command",
+                        lambda path, rev_range, partial=False: ["sh", "-c", '"$@"; exit 1', "sh"] + real(path, rev_range, partial))
+    with HistoryIndex(str(repo)) as index:
+        with pytest.raises(subprocess.CalledProcessError):
+            index.update()
+        assert (index.tip, index.commit_count()) == (tip, 1)
+
+    monkeypatch.setattr(historydb, "log_command", real)
+    with HistoryIndex(str(repo)) as index:
+        assert index.update() == 2
+
+
+def test_update_survives_chatty_stderr(repo, commit_file, monkeypatch):
+    from gitsmartcommit import historydb
+    commit_file(repo, "a.py", "x = 1\n", "one")
+    real = historydb.log_command
+    # More warnings than a pipe buffer holds, before any stdout
+    monkeypatch.setattr(historydb, "log_command", lambda path, rev_range, partial=False: [
+        "sh", "-c", 'head -c 300000 /dev/zero | tr "\\0" w >&2; exec "$@"', "sh"]
+        + real(path, rev_range, partial))
+    with HistoryIndex(str(repo)) as index:
+        assert index.update() == 1
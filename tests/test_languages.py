@@ -0,0 +1,160 @@
+import re
+import subprocess
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+from gitsmartcommit import languages
+from gitsmartcommit.generate_commit_message import describe_file, detect_scope, extract_details
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def make_fd(path, added=(), removed=(), is_new=False, hunk_ctx=()):
+    return {
+        "path": path, "old_path": path, "added": list(added), "removed": list(removed),
+        "hunk_ctx": list(hunk_ctx), "is_new": is_new, "is_deleted": False,
+        "is_rename": False, "is_binary": False,
+    }
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """A private copy of the analyzer registry for the test to extend."""
+    monkeypatch.setattr(languages, "_targets", dict(languages.BUILTIN))
+    monkeypatch.setattr(languages, "_loaded", {})
+    return languages
+
+
+def test_builtin_sql_analyzer_details():
+    fd = make_fd("db/report.sql", ["SELECT id FROM invoices", "INSERT INTO ledger VALUES (1)"])
+    details = extract_details(fd, "sql")
+    assert details == ["ops: SELECT, INSERT", "tables: invoices, ledger"]
+
+
+def test_analyzers_are_imported_only_for_their_extensions():
+    script = (
+        "import sys\n"
+        "from gitsmartcommit.generate_commit_message import describe_file\n"
+        "fd = lambda p, a: {'path': p, 'old_path': p, 'added': a, 'removed': ['x = 1'], 'hunk_ctx': [],\n"
+        "                   'is_new': False, 'is_deleted': False, 'is_rename': False, 'is_binary': False}\n"
+        "describe_file(fd('app/main.py', ['x = 2']))\n"
+        "print(sorted(m for m in sys.modules if m.startswith('gitsmartcommit.languages.')))\n"
+        "describe_file(fd('db/schema.sql', ['SELECT 1 FROM t']))\n"
+        "print(sorted(m for m in sys.modules if m.startswith('gitsmartcommit.languages.')))\n"
+    )
+    out = subprocess.check_output([sys.executable, "-c", script], cwd=ROOT, text=True).splitlines()
+    assert out == ["[]", "['gitsmartcommit.languages.sql']"]
+
+
+def test_third_party_analyzer_is_loaded_lazily(registry, tmp_path, monkeypatch):
+    (tmp_path / "proto_lang.py").write_text(
+        "import re\n"
+        "DEF_PATTERNS = [re.compile(r'^\\s*(?:message|service|rpc)\\s+(\\w+)')]\n"
+        "def extract_details(fd, ctype):\n"
+        "    return ['messages: ' + ', '.join(l.split()[1] for l in fd['added'] if l.startswith('message'))]\n"
+        "def guess_purpose(lines, path):\n"
+        "    return 'protobuf schema'\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "proto_lang", raising=False)
+    registry.register(".proto", "proto_lang")
+    assert "proto_lang" not in sys.modules
+
+    fd = make_fd("api/billing.proto", ["message Invoice {", "  int64 id = 1;", "}"],
+                 ["message Bill {"], hunk_ctx=["service Billing {"])
+    assert detect_scope(fd) == "Billing"
+    assert extract_details(fd, "update") == ["messages: Invoice"]
+    assert "proto_lang" in sys.modules
+
+    new = make_fd("api/users.proto", ["message User {}"], is_new=True)
+    assert describe_file(new)["summary"] == "Add protobuf schema"
+
+
+def test_analyzer_returning_none_falls_back(registry):
+    registry.register(".py", types.SimpleNamespace(extract_details=lambda fd, ctype: None))
+    fd = make_fd("app/util.py", ["def helper():", "    return 1"])
+    assert extract_details(fd, "feat") == ["added: helper"]
+
+
+def test_entry_points_replace_builtins(monkeypatch):
+    class EntryPoint:
+        name = ".sql"
+
+        def load(self):
+            return types.SimpleNamespace(extract_details=lambda fd, ctype: ["from plugin"])
+
+    monkeypatch.setattr(languages, "_entry_points", lambda: {".sql": EntryPoint()})
+    monkeypatch.setattr(languages, "_targets", None)
+    monkeypatch.setattr(languages, "_loaded", {})
+    assert extract_details(make_fd("q.sql", ["SELECT 1"]), "sql") == ["from plugin"]
+    assert languages.analyzer_for(".css") is not None  # other built-ins still served
+
+
+def test_broken_analyzer_warns_and_is_skipped(registry):
+    registry.register(".zig", "no_such_module_for_tests")
+    with pytest.warns(UserWarning, match=re.escape("'.zig'")):
+        assert registry.analyzer_for(".zig") is None
+    fd = make_fd("src/main.zig", ["pub fn main() void {"])
+    assert describe_file(fd)["tag"]
+
+
+def test_analyzer_def_patterns_reach_the_outline(registry):
+    blob = "rule Login {\n  when user.signs_in\n  then audit\n}\n"
+
+    class Store:
+        def read_text(self, oid):
+            return blob
+
+    fd = dict(make_fd("auth.rules", ["  then audit"], ["  then log"]),
+              old_oid="a" * 40, new_oid="b" * 40, hunks=[(3, 1, 3, 1)])
+    assert detect_scope(fd, Store()) == ""
+    registry.register(".rules", types.SimpleNamespace(DEF_PATTERNS=[re.compile(r"^\s*rule\s+(\w+)")]))
+    assert detect_scope(fd, Store()) == "Login"
+
+
+def test_config_key_paths_from_hunks_and_blobs(repo, git, commit_file):
+    from gitsmartcommit.generate_commit_message import parse_diff
+    from gitsmartcommit.git import DIFF_PROFILE
+    from gitsmartcommit.objects import ObjectStore
+
+    commit_file(repo, "values.yaml", "image:\n  tag: '1.0'\nspec:\n  template:\n    spec:\n"
+                "      containers:\n        - name: api\n          image: api:1\n  replicas: 2\n")
+    commit_file(repo, "tsconfig.json", '{\n  "compilerOptions": {\n    "target": "es2019",\n'
+                '    "strict": false\n  },\n  "include": ["src"]\n}\n')
+    commit_file(repo, "pyproject.toml", '[project]\nname = "x"\n\n[tool.pytest.ini_options]\naddopts = "-q"\n')
+    for name, old, new in [("values.yaml", "api:1", "api:2"), ("values.yaml", "replicas: 2", "replicas: 3"),
+                           ("tsconfig.json", "false", "true"), ("pyproject.toml", '"-q"', '"-q -x"')]:
+        path = repo / name
+        path.write_text(path.read_text().replace(old, new))
+    git(repo, "add", "-A")
+
+    diff = git(repo, "diff", "--cached", *DIFF_PROFILE)
+    with ObjectStore.open(str(repo)) as store:
+        infos = {fd["path"]: describe_file(fd, store) for fd in parse_diff(diff)}
+    assert {path: info["summary"] for path, info in infos.items() if path != "values.yaml"} == {
+        "tsconfig.json": "Update compilerOptions.strict in tsconfig",
+        "pyproject.toml": "Update tool.pytest.ini_options.addopts in pyproject",
+    }
+    # YAML is not classified as config, but its summary still names the keys
+    assert infos["values.yaml"]["details"] == ["keys: spec.template.spec.containers.image, spec.replicas"]
+    assert infos["values.yaml"]["summary"] == (
+        "Update spec.template.spec.containers.image, spec.replicas in values.yaml")
+    # Without the blobs only the hunks' own keys and `@@` context are known
+    blobless = {fd["path"]: describe_file(fd)["details"] for fd in parse_diff(diff)}
+    assert blobless["tsconfig.json"] == ["keys: strict"]
+    assert blobless["values.yaml"] == ["keys: spec.image, spec.replicas"]
+
+
+def test_config_key_paths_fold_into_parents():
+    from gitsmartcommit.languages.config import top_key_paths
+    added = ["resources:", "  limits:", "    cpu: 1", "    memory: 2Gi", "  requests:", "    cpu: 1",
+             "tolerations: []", "affinity: {}", "nodeSelector:", "  disk: ssd"]
+    fd = make_fd("chart/values.yaml", added[:6])
+    assert top_key_paths(fd) == (["resources.limits.cpu", "resources.limits.memory", "resources.requests.cpu"], 0)
+    fd = make_fd("chart/values.yaml", added)
+    assert top_key_paths(fd) == (["resources", "tolerations", "affinity"], 1)
+    fd = make_fd("Cargo.toml", ['serde = "1"'])
+    assert extract_details(fd, "config") == ["+ serde"]  # dependency files keep their own details
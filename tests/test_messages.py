@@ -0,0 +1,49 @@
+from gitsmartcommit.generate_commit_message import compose_message
+from gitsmartcommit.messages import compose_formats
+from gitsmartcommit.workspace import PackageIndex
+
+
+def fd(path):
+    return {"path": path, "old_path": path, "added": ["x"], "removed": [], "hunk_ctx": [],
+            "is_new": False, "is_deleted": False, "is_rename": False, "is_binary": False}
+
+
+def res(path, tag, summary, lang="Python"):
+    return {"tag": tag, "summary": summary, "details": [], "lang": lang, "path": path,
+            "verb": summary.split(" ", 1)[0]}
+
+
+def formats(results, branch="", packages=None):
+    result = compose_message([fd(r["path"]) for r in results], results, branch, render=False)
+    return compose_formats(result, branch, packages)
+
+
+def test_all_formats_from_one_result():
+    out = formats([
+        res("api/charge.py", "[FIX]", "Fix null/None handling in charge()"),
+        res("api/models.py", "[ADD]", "Add invoice model [Python]"),
+    ], branch="dev")
+    assert out["bracket"] == "[FIX][dev] Fix null/None handling in charge() (+1 more)"
+    assert out["conventional"] == "fix(dev): fix null/None handling in charge()"
+    assert out["body"] == ("Apply the following changes:\n"
+                           "- Fix null/None handling in charge()\n- Add invoice model")
+    assert out["changelog"] == ("### Added\n- Add invoice model\n\n"
+                                "### Fixed\n- Fix null/None handling in charge()")
+
+
+def test_common_verb_and_package_split():
+    packages = PackageIndex({"services/billing": "billing-api", "web": "storefront"})
+    out = formats([
+        res("services/billing/a.py", "[UPDATE]", "Update retry logic"),
+        res("web/b.js", "[UPDATE]", "Update checkout form", "JavaScript"),
+    ], branch="main", packages=packages)
+    assert out["conventional"] == "chore: update retry logic"
+    assert out["body"] == ("Update the following:\nbilling-api:\n- retry logic\n\n"
+                           "storefront:\n- checkout form")
+    assert "- Update checkout form (storefront)" in out["changelog"]
+
+
+def test_single_package_is_the_scope():
+    packages = PackageIndex({"services/billing": "billing-api"})
+    out = formats([res("services/billing/a.py", "[FIX]", "Fix rounding")], "feature/x", packages)
+    assert out["conventional"] == "fix(billing-api): fix rounding"
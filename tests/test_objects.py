@@ -0,0 +1,70 @@
+import subprocess
+import pytest
+from gitsmartcommit.objects import ObjectStore, ObjectNotFound, apply_delta
+from gitsmartcommit.generate_commit_message import parse_diff, detect_scope
+
+
+def test_apply_delta_copy_and_insert():
+    base = b"hello world"
+    # src=11, dst=11, copy offset 0 size 6, insert "there"
+    delta = bytes([11, 11, 0x90, 6, 5]) + b"there"
+    assert apply_delta(base, delta) == b"hello there"
+
+
+def test_read_loose_and_packed_objects(repo, git, commit_file):
+    for i in range(1, 15):
+        commit_file(repo, "f.txt", "".join(f"line {n}\n" for n in range(i * 40)), f"c{i}")
+    loose_oids = git(repo, "rev-list", "--all", "--objects").split()
+    git(repo, "gc", "-q")
+    commit_file(repo, "g.txt", "loose\n")
+
+    oids = [o for o in git(repo, "rev-list", "--all", "--objects").split() if len(o) == 40]
+    assert len(oids) > len([o for o in loose_oids if len(o) == 40])
+    with ObjectStore.open(str(repo), fallback=False) as store:
+        for oid in oids:
+            kind, data = store.read(oid)
+            assert data == subprocess.check_output(["git", "-C", str(repo), "cat-file", kind, oid])
+
+
+def test_missing_object_and_fallback(repo, git, commit_file):
+    commit_file(repo, "a.txt", "a\n")
+    with ObjectStore.open(str(repo), fallback=False) as store:
+        with pytest.raises(ObjectNotFound):
+            store.read("0" * 40)
+    head = git(repo, "rev-parse", "HEAD")
+    with ObjectStore.open(str(repo)) as store:
+        # Abbreviated ids are resolved by the cat-file pipe
+        assert store.read(head[:8])[0] == "commit"
+
+
+def test_store_shared_by_threads(repo, git, commit_file):
+    from concurrent.futures import ThreadPoolExecutor
+    for i in range(1, 8):
+        commit_file(repo, "f.txt", "".join(f"line {n}\n" for n in range(i * 40)), f"c{i}")
+    git(repo, "gc", "-q")
+    oids = [o for o in git(repo, "rev-list", "--all", "--objects").split() if len(o) == 40]
+    expected = {o: subprocess.check_output(["git", "-C", str(repo), "cat-file", "-p", o]) for o in oids}
+
+    with ObjectStore.open(str(repo)) as store:
+        def read(oid):
+            # Abbreviated ids go through the shared cat-file pipe, full ones through the packs
+            return store.read(oid[:12])[1], store.read(oid)[1]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            for oid, (piped, packed) in zip(oids * 20, pool.map(read, oids * 20)):
+                assert piped == packed
+                if store.read(oid)[0] == "blob":
+                    assert packed == expected[oid]
+
+
+def test_detect_scope_uses_post_image(repo, git, commit_file):
+    body = "class Foo:\n    def bar(self):\n" + "".join(f"        x{i} = {i}\n" for i in range(20))
+    commit_file(repo, "app.py", body)
+    (repo / "app.py").write_text(body.replace("x15 = 15", "x15 = 16"))
+    git(repo, "add", "app.py")
+    diff = git(repo, "diff", "--cached", "--full-index", "-U0")
+    fd = parse_diff(diff)[0]
+    # git's default funcname header only sees the unindented class line
+    assert detect_scope(fd) == "Foo"
+    with ObjectStore.open(str(repo)) as store:
+        assert detect_scope(fd, store) == "Foo.bar"
@@ -0,0 +1,71 @@
+from gitsmartcommit.outline import build_outline, outline_for
+
+PY = """import os
+
+class Foo:
+    x = 1
+
+    def bar(self,
+            a):
+        if a:
+            return helper(a)
+        return 2
+
+    @property
+    def baz(self):
+        pass
+
+
+def top(
+    a,
+):
+    return a
+"""
+
+JS = """class Api {
+  async run(x) {
+    return 1;
+  }
+}
+
+function fetchIt()
+{
+  x();
+}
+"""
+
+
+def test_python_outline_entries():
+    outline = build_outline(PY.splitlines())
+    assert outline.entries() == [
+        (3, 14, "Foo"), (6, 10, "Foo.bar"), (13, 14, "Foo.baz"), (17, 20, "top"),
+    ]
+
+
+def test_enclosing_lookup():
+    outline = build_outline(PY.splitlines())
+    assert outline.enclosing(1) == ""
+    assert outline.enclosing(4) == "Foo"
+    assert outline.enclosing(9) == "Foo.bar"
+    assert outline.enclosing(12) == "Foo"
+    assert outline.enclosing(16) == ""
+    assert outline.enclosing(20) == "top"
+
+
+def test_brace_language_outline():
+    outline = build_outline(JS.splitlines())
+    assert outline.enclosing(3) == "Api.run"
+    assert outline.enclosing(5) == "Api"
+    assert outline.enclosing(9) == "fetchIt"
+
+
+def test_outline_cached_per_blob():
+    calls = []
+
+    def load():
+        calls.append(1)
+        return PY.splitlines()
+
+    first = outline_for("deadbeef" * 5, load)
+    assert outline_for("deadbeef" * 5, load) is first
+    assert len(calls) == 1
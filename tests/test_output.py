@@ -0,0 +1,87 @@
+import io
+import json
+import os
+import subprocess
+import sys
+from gitsmartcommit.generate_commit_message import iter_file_diffs, parse_diff
+from gitsmartcommit.output import SCHEMA_VERSION, json_document, write_ndjson
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DIFF = """diff --git a/app.py b/app.py
+new file mode 100644
+--- /dev/null
++++ b/app.py
+@@ -0,0 +1,2 @@
++def main():
++    pass
+diff --git a/README.md b/README.md
+--- a/README.md
++++ b/README.md
+@@ -1 +1 @@
+-old
++new
+"""
+
+
+def test_iter_file_diffs_matches_parse_diff():
+    assert list(iter_file_diffs(DIFF.splitlines())) == parse_diff(DIFF)
+
+
+def test_ndjson_streams_files_then_summary():
+    out = io.StringIO()
+    write_ndjson(iter_file_diffs(DIFF.splitlines()), "dev", "staged", out=out)
+    assert "\x1b[" not in out.getvalue()
+    records = [json.loads(l) for l in out.getvalue().splitlines()]
+    assert [r["type"] for r in records] == ["file", "file", "summary"]
+    assert all(r["schema"] == SCHEMA_VERSION for r in records)
+    assert records[0]["path"] == "app.py" and records[0]["status"] == "added"
+    summary = records[-1]
+    assert summary["subject"].startswith("[ADD][dev]")
+    assert summary["counts"]["files"] == 2
+    assert summary["counts"]["added"] == 3
+
+
+def test_ndjson_streams_records_and_reports_retagging():
+    fds = []
+    for n in range(3):
+        path = f"app/page{n}.py"
+        fds.append({
+            "path": path, "old_path": path, "hunk_ctx": [], "is_new": False, "is_deleted": False,
+            "is_rename": False, "is_binary": False,
+            "added": ["    user = fetch_user(request.id)"],
+            "removed": ["    user = get_user(request.id)"],
+        })
+    out = io.StringIO()
+
+    def files():
+        for n, fd in enumerate(fds):
+            # Each record is written before the next file is even read
+            assert out.getvalue().count("\n") == n
+            yield fd
+
+    summary = write_ndjson(files(), out=out)
+    streamed = [json.loads(l) for l in out.getvalue().splitlines()][:-1]
+    assert all(f["tag"] != "[REFACTOR]" for f in streamed)
+    assert summary["counts"]["tags"] == {"[REFACTOR]": 3}
+    assert [(r["path"], r["tag"], r["summary"]) for r in summary["retagged"]] == [
+        (fd["path"], "[REFACTOR]", "Rename get_user → fetch_user") for fd in fds]
+    assert [f["tag"] for f in json_document(fds)["files"]] == ["[REFACTOR]"] * 3
+
+
+def test_json_document_for_no_changes():
+    doc = json_document([])
+    assert doc["type"] == "commit" and doc["subject"] == "" and doc["files"] == []
+
+
+def test_cli_format_json(repo, commit_file, git):
+    commit_file(repo, "a.py", "x = 1\n")
+    (repo / "a.py").write_text("x = 2\n")
+    out = subprocess.check_output(
+        [sys.executable, "-m", "gitsmartcommit.git", "--path", str(repo), "--format", "json"],
+        cwd=ROOT,
+    ).decode()
+    doc = json.loads(out)
+    assert doc["schema"] == SCHEMA_VERSION
+    assert doc["source"] == "unstaged" and doc["branch"] == "main"
+    assert [f["path"] for f in doc["files"]] == ["a.py"]
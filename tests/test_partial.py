@@ -0,0 +1,144 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from gitsmartcommit.objects import ObjectStore
+from gitsmartcommit.partial import is_partial_clone, raw_changes, safe_file_diffs
+from gitsmartcommit.git import DIFF_PROFILE
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def missing_objects(git, repo) -> int:
+    out = git(repo, "rev-list", "--objects", "--all", "--missing=print")
+    return sum(1 for line in out.splitlines() if line.startswith("?"))
+
+
+@pytest.fixture
+def blobless(repo, git, commit_file, tmp_path):
+    """A --filter=blob:none clone of `repo` with `feature` checked out."""
+    git(repo, "config", "uploadpack.allowFilter", "true")
+    commit_file(repo, "app.py", "def run():\n    return 1\n", "init")
+    git(repo, "checkout", "-q", "-b", "feature")
+    commit_file(repo, "app.py", "def run():\n    return 2\n", "tweak app")
+    commit_file(repo, "api.py", "def get():\n    return 1\n", "add api")
+    git(repo, "checkout", "-q", "main")
+    commit_file(repo, "app.py", "def run():\n    return 3\n", "main moves on")
+
+    clone = tmp_path / "clone"
+    subprocess.check_call(["git", "clone", "-q", "--filter=blob:none", f"file://{repo}", str(clone)],
+                          stderr=subprocess.DEVNULL)
+    git(clone, "checkout", "-q", "-b", "feature", "origin/feature")
+    git(clone, "config", "user.email", "t@example.com")
+    git(clone, "config", "user.name", "t")
+    return clone
+
+
+def test_detects_promisor_remote(blobless, repo):
+    assert is_partial_clone(str(blobless))
+    assert not is_partial_clone(str(repo))
+
+
+def test_missing_blobs_are_described_from_status(blobless, git):
+    base = git(blobless, "merge-base", "origin/main", "HEAD")
+    before = missing_objects(git, blobless)
+    assert before > 0
+
+    assert {c["path"]: c["status"] for c in raw_changes(str(blobless), [base, "HEAD"])} == {
+        "api.py": "A", "app.py": "M"}
+    with ObjectStore.open(str(blobless), fallback=False) as store:
+        files, status_only = safe_file_diffs(str(blobless), [base, "HEAD"], [], store, DIFF_PROFILE)
+        files = {fd["path"]: fd for fd in files}
+    assert status_only == 1
+    assert files["app.py"]["status_only"] and files["app.py"]["added"] == []
+    assert files["api.py"]["added"] == ["def get():", "    return 1"]
+    assert missing_objects(git, blobless) == before  # nothing was fetched
+
+
+def test_cli_pr_in_partial_clone_fetches_nothing(blobless, git):
+    before = missing_objects(git, blobless)
+    out = subprocess.run([sys.executable, "-m", "gitsmartcommit.git", "--path", str(blobless),
+                          "--base", "origin/main", "--format", "json"],
+                         cwd=ROOT, capture_output=True, text=True)
+    assert out.returncode == 0, out.stderr
+    doc = json.loads(out.stdout)
+    assert sorted(f["path"] for f in doc["files"]) == ["api.py", "app.py"]
+    assert doc["notes"] == ["partial clone: 1 file described from name-status only "
+                            "(blobs not available locally, not fetched); rename detection off"]
+    assert missing_objects(git, blobless) == before
+
+
+def test_cli_working_tree_in_partial_clone(blobless, git):
+    (blobless / "api.py").write_text("def get():\n    return 2\n")
+    git(blobless, "add", "api.py")
+    out = subprocess.run([sys.executable, "-m", "gitsmartcommit.git", "--path", str(blobless)],
+                         cwd=ROOT, capture_output=True, text=True)
+    assert out.returncode == 0, out.stdout
+    assert "Note: partial clone: rename detection off" in out.stdout
+    assert "git commit -m" in out.stdout
+
+
+def test_batch_and_aio_describe_missing_blobs_from_status(blobless, git):
+    import asyncio
+    from gitsmartcommit import batch
+    from gitsmartcommit.aio import analyze_repo
+
+    (blobless / "api.py").write_text("def get():\n    return 2\n")
+    git(blobless, "rm", "-q", "--cached", "app.py")
+    git(blobless, "add", "api.py")
+    before = missing_objects(git, blobless)
+
+    [rec] = batch.run_batch([str(blobless)], threads=1)
+    assert (rec["status"], rec["source"]) == ("ok", "staged")
+    assert sorted(f["path"] for f in rec["files"]) == ["api.py", "app.py"]
+    result = asyncio.run(analyze_repo(str(blobless)))
+    assert result["source"] == "staged"
+    assert missing_objects(git, blobless) == before
+    # Both files' blobs came with the checkout, so only renames are lost
+    assert rec["notes"] == result["notes"] == ["partial clone: rename detection off"]
+
+
+def test_range_and_index_describe_missing_blobs_from_status(blobless, git):
+    from gitsmartcommit.historydb import HistoryIndex
+    before = missing_objects(git, blobless)
+    note = ("partial clone: 2 files described from name-status only "
+            "(blobs not available locally, not fetched); rename detection off")
+
+    out = subprocess.run([sys.executable, "-m", "gitsmartcommit.git", "--path", str(blobless),
+                          "--range", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+    assert out.returncode == 0, out.stderr
+    records = {r["original"]: r for r in map(json.loads, out.stdout.splitlines())}
+    # The first app.py blob was never downloaded: both commits touching it
+    # are described from status; api.py is checked out, so it gets a patch
+    assert records["init"]["status_only"] == records["tweak app"]["status_only"] == 1
+    assert records["tweak app"]["files"][0]["added"] == 0
+    assert "status_only" not in records["add api"] and records["add api"]["added"] == 2
+    assert f"Note: {note}" in out.stderr
+
+    with HistoryIndex(str(blobless)) as index:
+        assert index.update(partial=True) == 3
+        assert index.notes == [note]
+        assert index.tip == git(blobless, "rev-parse", "HEAD")
+    assert missing_objects(git, blobless) == before
+
+
+def test_missing_manifest_is_not_fetched(blobless, git):
+    from gitsmartcommit.workspace import PackageIndex
+    # The first app.py blob was never downloaded; list it as a manifest
+    oid = git(blobless, "rev-parse", "HEAD~2:app.py")
+    env = dict(os.environ, GIT_NO_LAZY_FETCH="1")
+    subprocess.check_call(["git", "-C", str(blobless), "update-index", "--add", "--cacheinfo",
+                           f"100644,{oid},web/package.json"], env=env)
+    before = missing_objects(git, blobless)
+    cache = blobless / "packages.json"
+
+    index = PackageIndex.load(str(blobless), str(cache))
+    assert index.package_of("web/app.js") == "web"
+    assert index.missing == ["web/package.json"]
+    assert not cache.exists()  # an unknown name is not cached
+    assert missing_objects(git, blobless) == before
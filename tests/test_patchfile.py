@@ -0,0 +1,102 @@
+import io
+import os
+import threading
+
+import pytest
+
+from gitsmartcommit.generate_commit_message import parse_diff
+from gitsmartcommit.patchfile import open_diff_lines, read_patches, iter_stream_lines
+
+SERIES = """From 1111111111111111111111111111111111111111 Mon Sep 17 00:00:00 2001
+From: Dev <dev@example.com>
+Date: Tue, 1 Oct 2024 10:00:00 +0200
+Subject: [PATCH 1/2] Add helper for
+ parsing
+
+---
+ util.py | 1 +
+ 1 file changed, 1 insertion(+)
+
+diff --git a/util.py b/util.py
+new file mode 100644
+index 0000000..e69de29
+--- /dev/null
++++ b/util.py
+@@ -0,0 +1 @@
++def helper(): pass
+-- 
+2.39.5
+
+From 2222222222222222222222222222222222222222 Mon Sep 17 00:00:00 2001
+From: Dev <dev@example.com>
+Date: Tue, 1 Oct 2024 10:05:00 +0200
+Subject: [PATCH 2/2] Drop list marker
+
+---
+diff --git a/notes.md b/notes.md
+index 1111111..2222222 100644
+--- a/notes.md
++++ b/notes.md
+@@ -1,2 +1 @@
+-- 
+ keep
+-- 
+2.39.5
+"""
+
+PLAIN = """diff --git a/app.py b/app.py
+index 123..456
+--- a/app.py
++++ b/app.py
+@@ -1 +1 @@
+-x = 1
++x = 2
+"""
+
+
+def test_format_patch_series_split(tmp_path):
+    path = tmp_path / "series.mbox"
+    path.write_text(SERIES)
+    patches = read_patches(open_diff_lines(str(path)))
+    assert [p["commit"][:4] for p in patches] == ["1111", "2222"]
+    assert patches[0]["subject"] == "Add helper for parsing"
+    assert patches[0]["author"] == "Dev <dev@example.com>"
+    assert patches[0]["files"][0]["added"] == ["def helper(): pass"]
+    # the removed "- " line is content, the trailing "-- " is the signature
+    assert patches[1]["files"][0]["removed"] == ["- "]
+    assert patches[1]["files"][0]["added"] == []
+
+
+def test_plain_diff_from_mmap_matches_parse_diff(tmp_path):
+    path = tmp_path / "change.diff"
+    path.write_bytes(PLAIN.replace("\n", "\r\n").encode())
+    patches = read_patches(open_diff_lines(str(path)))
+    assert len(patches) == 1
+    assert patches[0]["commit"] == ""
+    assert patches[0]["files"] == parse_diff(PLAIN)
+
+
+def test_stream_lines_and_empty_file(tmp_path):
+    stream = io.BytesIO(PLAIN.encode())
+    assert read_patches(iter_stream_lines(stream))[0]["files"] == parse_diff(PLAIN)
+    empty = tmp_path / "empty.diff"
+    empty.write_bytes(b"")
+    assert read_patches(open_diff_lines(str(empty)))[0]["files"] == []
+
+
+@pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="needs FIFOs")
+def test_diff_from_fifo_is_streamed(tmp_path):
+    fifo = tmp_path / "change.fifo"
+    os.mkfifo(fifo)
+
+    def write():
+        with open(fifo, "wb") as f:
+            f.write(PLAIN.encode())
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    try:
+        patches = read_patches(open_diff_lines(str(fifo)))
+    finally:
+        writer.join()
+    assert patches[0]["files"] == parse_diff(PLAIN)
@@ -0,0 +1,84 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from gitsmartcommit.analyzer import Analyzer
+from gitsmartcommit.pr import BaseError, analyze_pr, default_base, merge_base, open_analyzer, save_analyzer
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def feature(repo, git, commit_file):
+    """main with one commit, feature branch two commits ahead, main one commit ahead."""
+    commit_file(repo, "app.py", "def run():\n    return 1\n", "init")
+    git(repo, "checkout", "-q", "-b", "feature")
+    commit_file(repo, "api.py", "def get():\n    return 1\n", "add api")
+    commit_file(repo, "app.py", "def run():\n    return 2\n", "tweak app")
+    git(repo, "checkout", "-q", "main")
+    commit_file(repo, "other.py", "x = 1\n", "main moves on")
+    git(repo, "checkout", "-q", "feature")
+    return repo
+
+
+def test_merge_base_is_cached_by_tip_ids(feature, git, tmp_path):
+    cache = tmp_path / "mb.json"
+    expected = git(feature, "merge-base", "main", "HEAD")
+    assert merge_base(str(feature), "main", cache_file=str(cache)) == expected
+
+    key = f"{git(feature, 'rev-parse', 'main')}:{git(feature, 'rev-parse', 'HEAD')}"
+    assert json.loads(cache.read_text()) == {key: expected}
+    cache.write_text(json.dumps({key: "cached"}))
+    assert merge_base(str(feature), "main", cache_file=str(cache)) == "cached"
+
+    with pytest.raises(BaseError):
+        merge_base(str(feature), "no-such-branch", cache_file=str(cache))
+
+
+def test_default_base(feature):
+    assert default_base(str(feature)) == "main"
+
+
+def test_rerun_after_push_only_describes_touched_files(feature, commit_file):
+    path = str(feature)
+    analyzer = open_analyzer(path)
+    result = analyze_pr(path, "main", "feature", analyzer)
+    assert sorted(r["path"] for r in result["_files"]) == ["api.py", "app.py"]  # not other.py
+    assert analyzer.misses == 2
+    save_analyzer(path, analyzer)
+
+    commit_file(feature, "api.py", "def get():\n    return 3\n", "another push")
+    analyzer = open_analyzer(path)
+    analyze_pr(path, "main", "feature", analyzer)
+    assert (analyzer.hits, analyzer.misses) == (1, 1)
+
+
+def test_cache_roundtrip_ignores_other_stamps(tmp_path):
+    fd = {"path": "a.py", "old_path": "a.py", "added": ["x = 2"], "removed": ["x = 1"], "hunk_ctx": [],
+          "is_new": False, "is_deleted": False, "is_rename": False, "is_binary": False,
+          "old_oid": "1" * 40, "new_oid": "2" * 40, "hunks": [(1, 1, 1, 1)]}
+    first = Analyzer(render=False)
+    first.describe(fd)
+    first.save_cache(str(tmp_path / "c.json"), "v1")
+
+    second = Analyzer(render=False)
+    assert second.load_cache(str(tmp_path / "c.json"), "v2") == 0
+    assert second.load_cache(str(tmp_path / "c.json"), "v1") == 1
+    second.describe(fd)
+    assert (second.hits, second.misses) == (1, 0)
+
+
+def test_cli_base(feature):
+    cmd = [sys.executable, "-m", "gitsmartcommit.git", "--path", str(feature)]
+    out = subprocess.run(cmd + ["--base", "main", "--format", "json"], cwd=ROOT, capture_output=True, text=True)
+    assert out.returncode == 0, out.stderr
+    doc = json.loads(out.stdout)
+    assert doc["source"] == "pr"
+    assert sorted(f["path"] for f in doc["files"]) == ["api.py", "app.py"]
+
+    out = subprocess.run(cmd + ["--base", "nope"], cwd=ROOT, capture_output=True, text=True)
+    assert out.returncode == 1
+    assert "Error: unknown revision 'nope'" in out.stdout
@@ -0,0 +1,66 @@
+from gitsmartcommit.generate_commit_message import commit_message_for_files
+from gitsmartcommit.messages import compose_formats
+from gitsmartcommit.renames import dominant_rename, find_renames, substitution
+
+
+def make_fd(path, added, removed):
+    return {
+        "path": path, "old_path": path, "added": added, "removed": removed, "hunk_ctx": [],
+        "is_new": False, "is_deleted": False, "is_rename": False, "is_binary": False,
+    }
+
+
+def caller(n):
+    return make_fd(
+        f"app/views/page{n}.py",
+        ["    user = fetch_user(request.id)", f"    log(fetch_user, {n})"],
+        ["    user = get_user(request.id)", f"    log(get_user, {n})"],
+    )
+
+
+def test_substitution():
+    assert substitution("x = get_user(a, b)", "x = fetch_user(a, b)") == ("get_user", "fetch_user")
+    assert substitution("get_user(get_user(a))", "fetch_user(fetch_user(a))") == ("get_user", "fetch_user")
+    assert substitution("x = get_user(a)", "y = fetch_user(a)") is None
+    assert substitution("if a:", "while a:") is None
+    assert substitution("x = 1", "x = 1") is None
+
+
+def test_rename_across_files_names_the_commit():
+    fds = [caller(n) for n in range(5)]
+    fds.append(make_fd("app/models.py", ["def fetch_user(uid):"], ["def get_user(uid):"]))
+    fds.append(make_fd("README.md", ["Some new docs"], []))
+
+    result = commit_message_for_files(fds, render=False)
+    assert result["subject"] == "[REFACTOR] Rename get_user → fetch_user across 6 files"
+    files = result["_files"]
+    assert files[0]["summary"] == "Rename get_user → fetch_user"
+    assert files[0]["details"] == []
+    assert files[-1]["tag"] == "[DOCS]"
+    assert compose_formats(result)["conventional"] == "refactor: rename get_user → fetch_user across 6 files"
+
+
+def test_partly_explained_file_keeps_its_own_summary():
+    fds = [caller(n) for n in range(3)]
+    fds[0]["added"].append("    audit(request)")
+    renames = find_renames(fds)
+    assert renames[0]["files"] == [0, 1, 2]
+    assert renames[0]["explained"] == [1, 2]
+    result = commit_message_for_files(fds, render=False)
+    assert result["_files"][0]["summary"] != "Rename get_user → fetch_user"
+
+
+def test_no_rename_for_unrelated_edits():
+    fds = [
+        make_fd("a.py", ["x = compute(1)"], ["x = compute(2)"]),
+        make_fd("b.py", ["total = price * qty"], ["total = price + qty"]),
+        make_fd("c.py", ["name = old_name"], ["name = new_name"]),
+    ]
+    assert dominant_rename(fds) is None
+    assert "Rename" not in commit_message_for_files(fds, render=False)["subject"]
+
+
+def test_rename_detection_scales_linearly():
+    fds = [caller(n) for n in range(3000)]
+    top = dominant_rename(fds)
+    assert (top["old"], top["new"], len(top["files"]), top["lines"]) == ("get_user", "fetch_user", 3000, 6000)
@@ -0,0 +1,45 @@
+import io
+from gitsmartcommit.render import FULL_LIMIT, TOP_PER_DIR, render, use_color
+
+
+def make_results(count, dirs=3):
+    return [
+        {"path": f"pkg{i % dirs}/mod_{i}.py", "tag": "[ADD]" if i % 7 else "[FIX]",
+         "summary": f"Add mod_{i}", "details": ["added: thing"], "lang": "Python"}
+        for i in range(count)
+    ]
+
+
+def draw(results, **kwargs):
+    out = io.StringIO()
+    render(out, "[ADD] Add mod_0 (+more)", "[ADD]", "", results, 10, 2, {"[ADD]": 1}, **kwargs)
+    return out.getvalue()
+
+
+def test_small_sets_list_every_file_with_details():
+    text = draw(make_results(FULL_LIMIT))
+    assert text.count("↳") == FULL_LIMIT
+    assert "added: thing" in text
+
+
+def test_large_sets_collapse_by_directory():
+    text = draw(make_results(3000), width=78)
+    assert text.count("↳") == 3 * TOP_PER_DIR
+    assert "…and 995 more" in text
+    assert "pkg0/  1000 files" in text
+    # FIX entries outrank ADD ones within each directory
+    assert "[FIX]" in text.split("pkg0/")[1].split("…and")[0]
+    assert len(text.splitlines()) < 60
+    assert max(len(l) for l in text.splitlines()) <= 80
+
+
+def test_no_escape_codes_without_a_tty(monkeypatch):
+    assert "\x1b[" not in draw(make_results(3))
+
+    class Tty(io.StringIO):
+        def isatty(self):
+            return True
+
+    assert use_color(Tty())
+    monkeypatch.setenv("NO_COLOR", "1")
+    assert not use_color(Tty())
@@ -0,0 +1,81 @@
+import pytest
+from gitsmartcommit.generate_commit_message import classify, describe_file
+from gitsmartcommit.messages import message_scope
+from gitsmartcommit.rules import Rules, RulesError, glob_to_regex
+
+RULES = r'''
+[[rule]]
+glob = "migrations/**"
+tag = "[CONFIG]"
+
+[[rule]]
+glob = "*.pb.go"
+generated = true
+
+[[rule]]
+glob = "ops/"
+scope = "ops"
+
+[fix]
+keywords = ["SEV-\\d+"]
+'''
+
+
+def fd(path, added=("x = 1",), removed=(), is_new=False):
+    return {"path": path, "old_path": path, "added": list(added), "removed": list(removed),
+            "hunk_ctx": [], "is_new": is_new, "is_deleted": False, "is_rename": False,
+            "is_binary": False, "old_oid": "", "new_oid": ""}
+
+
+def test_glob_translation():
+    import re
+    assert re.search(glob_to_regex("*.pb.go"), "api/v1/user.pb.go")
+    assert not re.search(glob_to_regex("*.pb.go"), "api/v1/user.go")
+    assert re.search(glob_to_regex("migrations/**"), "migrations/0001_init.py")
+    assert not re.search(glob_to_regex("migrations/**"), "app/migrations/0001_init.py")
+    assert re.search(glob_to_regex("src/**/test_*.py"), "src/test_a.py")
+
+
+def test_rules_override_heuristics():
+    rules = Rules.parse(RULES)
+    assert classify(fd("migrations/0002_add_col.py"), rules) == "config"
+    assert describe_file(fd("migrations/0003.py", is_new=True), rules=rules)["tag"] == "[CONFIG]"
+
+    gen = describe_file(fd("api/user.pb.go"), rules=rules)
+    assert (gen["tag"], gen["summary"]) == ("[CHORE]", "Regenerate user.pb.go")
+
+    info = describe_file(fd("ops/deploy.sh"), rules=rules)
+    assert info["rule_scope"] == "ops"
+    assert message_scope([info], "feature/x")[0] == "ops"
+
+    change = fd("app.py", added=["# SEV-12", "value = data.get('k') if data is not None else 0"])
+    assert classify(change) != "fix"
+    assert classify(change, rules) == "fix"
+
+
+def test_first_listed_rule_wins():
+    rules = Rules.parse('[[rule]]\nglob = "*.pb.go"\ngenerated = true\n\n'
+                        '[[rule]]\nglob = "api/"\nscope = "api"\n\n'
+                        '[[rule]]\nregex = "v1"\ntag = "[CONFIG]"\n')
+    # "api/" and "v1" match further left, but "*.pb.go" is listed first
+    assert rules.match("api/v1/user.pb.go")["generated"]
+    assert rules.match("api/v1/user.go")["scope"] == "api"
+    assert rules.match("lib/v1/user.go")["tag"] == "[CONFIG]"
+    assert rules.match("lib/user.go") is None
+
+
+def test_load_caches_compiled_rules(tmp_path):
+    (tmp_path / ".smartcommit.toml").write_text(RULES)
+    cache = tmp_path / "cache.json"
+    first = Rules.load(str(tmp_path), str(cache))
+    assert cache.exists()
+    again = Rules.load(str(tmp_path), str(cache))
+    assert again.pattern == first.pattern and again.actions == first.actions
+    assert not Rules.load(str(tmp_path / "missing"))
+
+
+def test_invalid_rules():
+    with pytest.raises(RulesError):
+        Rules.parse('[[rule]]\ntag = "[CONFIG]"\n')
+    with pytest.raises(RulesError):
+        Rules.parse('[[rule]]\nregex = "("\n')
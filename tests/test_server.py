@@ -0,0 +1,122 @@
+import json
+import socket
+import threading
+import time
+import http.client
+import pytest
+from gitsmartcommit.server import AnalysisServer
+
+DIFF = """diff --git a/app.py b/app.py
+index 123..456
+--- a/app.py
++++ b/app.py
+@@ -1 +1,2 @@
+-x = 1
++def helper():
++    pass
+"""
+
+
+@pytest.fixture
+def server_factory():
+    servers = []
+
+    def start(**options):
+        server = AnalysisServer(("127.0.0.1", 0), **options)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def wait_for(cond, timeout=2.0):
+    end = time.monotonic() + timeout
+    while not cond() and time.monotonic() < end:
+        time.sleep(0.01)
+
+
+def request(server, method, path, body=None):
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+    conn.request(method, path, body=body)
+    resp = conn.getresponse()
+    data = resp.read()
+    conn.close()
+    return resp.status, data
+
+
+def test_analyze_and_metrics(server_factory):
+    server = server_factory()
+    status, data = request(server, "POST", "/analyze?branch=dev", DIFF.encode())
+    assert status == 200
+    payload = json.loads(data)
+    assert payload["subject"].startswith("[ADD][dev] Add helper")
+    assert payload["counts"] == {"files": 1, "added": 2, "removed": 1, "tags": {"[ADD]": 1}}
+    assert payload["files"][0]["path"] == "app.py"
+
+    status, data = request(server, "GET", "/metrics")
+    text = data.decode()
+    assert 'smartcommit_request_duration_seconds_bucket{le="+Inf"} 1' in text
+    assert 'smartcommit_responses_total{code="200"} 1' in text
+
+
+def test_body_size_limit(server_factory):
+    server = server_factory(max_body=64)
+    status, data = request(server, "POST", "/analyze", DIFF.encode())
+    assert status == 413
+
+
+def test_full_queue_returns_503(server_factory):
+    server = server_factory(workers=1, queue_size=1, deadline=2.0)
+    port = server.server_address[1]
+    # Occupy the only worker, then the only queue slot, with idle connections
+    busy = [socket.create_connection(("127.0.0.1", port))]
+    wait_for(lambda: server.metrics.in_flight == 1)
+    busy.append(socket.create_connection(("127.0.0.1", port)))
+    wait_for(lambda: server.queue.qsize() == 1)
+    try:
+        # The server may answer and close before reading anything, so talk raw
+        with socket.create_connection(("127.0.0.1", port), timeout=5) as s:
+            reply = s.recv(4096).decode()
+        assert reply.startswith("HTTP/1.0 503")
+        assert server.metrics.rejected >= 1
+    finally:
+        for s in busy:
+            s.close()
+
+
+def test_analysis_error_returns_500(server_factory):
+    class Broken:
+        def analyze_files(self, file_diffs, branch=""):
+            raise ValueError("boom")
+
+    server = server_factory(analyzer=Broken())
+    status, data = request(server, "POST", "/analyze", DIFF.encode())
+    assert status == 500
+    assert "ValueError: boom" in json.loads(data)["error"]
+    # An accepted request: timed like any other, not counted as shed load
+    text = server.metrics.render(0)
+    assert "smartcommit_request_duration_seconds_count 1" in text
+    assert 'smartcommit_responses_total{code="500"} 1' in text
+    assert server.metrics.rejected == 0
+    # The worker survives and keeps answering
+    status, _ = request(server, "GET", "/healthz")
+    assert status == 200
+
+
+def test_body_after_deadline_returns_503(server_factory):
+    server = server_factory(deadline=0.3)
+    port = server.server_address[1]
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as s:
+        s.sendall(f"POST /analyze HTTP/1.1\r\nContent-Length: {len(DIFF)}\r\n\r\n".encode())
+        # Each read finishes within the socket timeout, the body does not
+        for chunk in (DIFF[:10], DIFF[10:]):
+            time.sleep(0.2)
+            s.sendall(chunk.encode())
+        reply = s.recv(4096).decode()
+    assert reply.startswith("HTTP/1.0 503")
+    assert "smartcommit_request_duration_seconds_count 1" in server.metrics.render(0)
+    assert server.metrics.rejected == 0
@@ -0,0 +1,68 @@
+from gitsmartcommit.generate_commit_message import describe_file
+from gitsmartcommit.tokendiff import MAX_LINES, micro_change, token_change
+
+
+def make_fd(path, added, removed, hunk_ctx=(), hunks=()):
+    return {
+        "path": path, "old_path": path, "added": added, "removed": removed, "hunk_ctx": list(hunk_ctx),
+        "is_new": False, "is_deleted": False, "is_rename": False, "is_binary": False,
+        "hunks": list(hunks),
+    }
+
+
+def test_token_change_kinds():
+    assert token_change("TIMEOUT = 30", "TIMEOUT = 60") == ("constant", "30", "60", "TIMEOUT")
+    assert token_change("    if n < limit:", "    if n <= limit:") == ("operator", "<", "<=", "")
+    assert token_change("def fetch(url, retries=3):", "def fetch(url, retries=5):") == ("default", "3", "5", "retries")
+    assert token_change("    total = total + x", "    subtotal = subtotal + x") == ("name", "total", "subtotal", "")
+    assert token_change("x = a + b", "y = a - b") is None
+    assert token_change("x = 1", "x = foo") is None
+
+
+def test_micro_change_needs_one_consistent_substitution():
+    fd = make_fd("calc.py", ["    total = price * qty", "    return total"],
+                 ["    total = price + qty", "    return total"])
+    assert micro_change(fd) == ""  # the second pair is unchanged
+    fd = make_fd("calc.py", ["    subtotal = 0", "    return subtotal"], ["    total = 0", "    return total"])
+    assert micro_change(fd) == "Rename total → subtotal"
+    fd = make_fd("calc.py", ["a = 1", "b = 3"], ["a = 2", "b = 4"])
+    assert micro_change(fd) == ""
+
+
+def test_lines_are_paired_within_hunks():
+    # A line deleted near the top and a similar one added further down: the
+    # totals match, but neither has a counterpart in its own hunk
+    fd = make_fd("calc.py", ["LIMIT = 2"], ["LIMIT = 1"], hunks=[(1, 1, 1, 0), (9, 0, 9, 1)])
+    assert micro_change(fd) == ""
+    fd["hunks"] = [(1, 2, 1, 2), (9, 1, 10, 1)]
+    fd["added"] = ["    subtotal = 1", "    extra = 2", "    return subtotal"]
+    fd["removed"] = ["    total = 1", "    extra = 2", "    return total"]
+    assert micro_change(fd) == ""  # the unchanged middle pair
+    fd["added"], fd["removed"] = fd["added"][::2], fd["removed"][::2]
+    fd["hunks"] = [(1, 1, 1, 1), (9, 1, 10, 1)]
+    assert micro_change(fd) == "Rename total → subtotal"
+
+
+def test_keywords_calls_and_bare_literals_are_not_named():
+    assert token_change("    return total", "    yield total") is None
+    assert token_change("    x = foo(a)", "    x = bar(a)") is None
+    assert token_change("def foo(a):", "def bar(a):") == ("name", "foo", "bar", "")
+    assert micro_change(make_fd("run.sh", ['echo "new"'], ['echo "old"'])) == ""
+
+
+def test_single_reference_is_a_change_not_a_rename():
+    fd = make_fd("calc.py", ["    return subtotal"], ["    return total"])
+    assert micro_change(fd) == "Change total → subtotal"
+
+
+def test_large_edits_are_not_paired():
+    added = [f"x{i} = 2" for i in range(MAX_LINES + 1)]
+    removed = [f"x{i} = 1" for i in range(MAX_LINES + 1)]
+    assert micro_change(make_fd("big.py", added, removed)) == ""
+
+
+def test_describe_file_names_the_micro_change():
+    fd = make_fd("app/net.py", ["def fetch(url, retries=5):"], ["def fetch(url, retries=3):"])
+    assert describe_file(fd)["summary"] == "Change default retries 3 → 5 in fetch() in net"
+    fd = make_fd("app/limits.py", ["TIMEOUT = 60"], ["TIMEOUT = 30"])
+    assert describe_file(fd)["summary"] == "Change TIMEOUT 30 → 60 in limits"
@@ -0,0 +1,47 @@
+from gitsmartcommit.generate_commit_message import commit_message_for_files
+from gitsmartcommit.tree import build_tree, focus, aggregate_subject
+
+
+def fd(path, added=("x = 1",), removed=()):
+    return {"path": path, "old_path": path, "added": list(added), "removed": list(removed),
+            "hunk_ctx": [], "is_new": False, "is_deleted": False, "is_rename": False,
+            "is_binary": False}
+
+
+def info(tag):
+    return {"tag": tag, "summary": "s", "details": [], "lang": "Python", "path": ""}
+
+
+def test_tree_rolls_up_counts_tags_and_names():
+    diffs = [fd("services/billing/a.py", added=["def charge():", "    pass"]),
+             fd("services/billing/sub/b.py", removed=["y"]),
+             fd("web/c.js")]
+    root = build_tree(diffs, [info("[ADD]"), info("[REFACTOR]"), info("[FIX]")])
+    billing = root.children["services"].children["billing"]
+    assert billing.path == "services/billing"
+    assert (billing.files, billing.added, billing.removed) == (2, 3, 1)
+    assert billing.tags == {"[ADD]": 1, "[REFACTOR]": 1}
+    assert billing.names == ["charge"]
+    assert root.files == 3 and len(list(root.walk())) == 5
+
+
+def test_focus_picks_deepest_dominant_directory():
+    diffs = [fd(f"services/billing/m{i}.py") for i in range(8)] + [fd("README.md"), fd("web/x.js")]
+    results = [info("[REFACTOR]")] * 8 + [info("[DOCS]"), info("[FIX]")]
+    root = build_tree(diffs, results)
+    node = focus(root)
+    assert node.path == "services/billing"
+    assert aggregate_subject(node, root.files) == ("[REFACTOR]", "Refactor services/billing (8 of 10 files)")
+
+
+def test_large_commit_subject_names_the_directory():
+    diffs = [fd(f"services/billing/m{i}.py", added=["def f():", "    return 1"]) for i in range(12)]
+    result = commit_message_for_files(diffs, render=False)
+    assert "services/billing (12 files)" in result["subject"]
+    assert "more)" not in result["subject"]
+
+
+def test_no_dominant_directory_keeps_lead_subject():
+    diffs = [fd(f"d{i}/m.py") for i in range(12)]
+    result = commit_message_for_files(diffs, render=False)
+    assert "(+11 more)" in result["subject"]
@@ -0,0 +1,54 @@
+import json
+import os
+import subprocess
+import sys
+from gitsmartcommit.workspace import PackageIndex, manifest_name
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_manifest_names():
+    assert manifest_name("package.json", '{"name": "@acme/billing-api"}') == "billing-api"
+    assert manifest_name("go.mod", "module github.com/acme/ledger\n\ngo 1.21\n") == "ledger"
+    assert manifest_name("Cargo.toml", '[dependencies]\nname = "x"\n[package]\nname = "core"\n') == "core"
+    assert manifest_name("pyproject.toml", '[tool.poetry]\nname = "etl"\n') == "etl"
+    assert manifest_name("package.json", "not json") == ""
+
+
+def test_index_maps_paths_to_nearest_package(repo, commit_file, git):
+    commit_file(repo, "package.json", '{"name": "workspace"}')
+    commit_file(repo, "services/billing/package.json", '{"name": "billing-api"}')
+    commit_file(repo, "services/billing/plugins/tax/Cargo.toml", '[package]\nname = "tax"\n')
+    commit_file(repo, "tools/go.mod", "module example.com/tools\n")
+    cache = repo / "cache.json"
+
+    index = PackageIndex.load(str(repo), str(cache))
+    assert index.package_of("services/billing/src/charge.js") == "billing-api"
+    assert index.package_of("services/billing/plugins/tax/src/lib.rs") == "tax"
+    assert index.package_of("tools/main.go") == "tools"
+    assert index.package_of("README.md") == ""  # the root manifest is the workspace
+    assert json.loads(cache.read_text())["packages"]["tools"] == "tools"
+
+    # A manifest change invalidates the cached index
+    commit_file(repo, "web/package.json", '{"name": "storefront"}')
+    assert PackageIndex.load(str(repo), str(cache)).package_of("web/app.js") == "storefront"
+
+
+def test_cli_scope_from_package(repo, commit_file):
+    commit_file(repo, "services/billing/package.json", '{"name": "billing-api"}')
+    commit_file(repo, "services/billing/charge.js", "let a = 1;\n")
+    (repo / "services/billing/charge.js").write_text("let a = 2;\n")
+    out = subprocess.check_output(
+        [sys.executable, "-m", "gitsmartcommit.git", "--path", str(repo)], cwd=ROOT,
+    ).decode()
+    assert "(billing-api): " in out
+
+
+def test_index_reads_the_keyed_manifest_blobs(repo, commit_file, git):
+    commit_file(repo, "web/package.json", '{"name": "storefront"}')
+    cache = repo / "cache.json"
+    # An unstaged edit is not what the key (the index blob ids) describes
+    (repo / "web/package.json").write_text('{"name": "shop"}')
+    assert PackageIndex.load(str(repo), str(cache)).package_of("web/app.js") == "storefront"
+    git(repo, "add", "web/package.json")
+    assert PackageIndex.load(str(repo), str(cache)).package_of("web/app.js") == "shop"